@@ -1,8 +1,14 @@
 import pulumi
 import pulumi_aws as aws
 import pulumi_awsx as awsx
-import base64
 from json import loads
+from src.boot_agent import boot_agent_preamble
+from src.ebs import Gp3Profile, gp3_profile_for, effective_throughput
+from src.instance_store import get_instance_store_layout, instance_store_script
+from src.shared_storage import SharedStorage, SharedStorageArgs
+from src.network import get_network_performance, expected_throughput
+from src.network_stack import get_shared_network
+from src.user_data import UserDataPart, render_template, render_user_data
 
 # Get some configuration values or set default values.
 dir_name = pulumi.get_project()
@@ -11,11 +17,38 @@ project_name = "aws-graphstorm"
 config = pulumi.Config()
 instance_types = config.get("instanceTypes") if config.get("instanceTypes") is not None else ['t3.micro', 't4g.small']
 vpc_network_cidr = config.get("vpcNetworkCidr") if config.get("vpcNetworkCidr") is not None else "10.0.0.0/16"
+network_stack = config.get("networkStack") # i.e: "my-org/aws-network-python/dev", creates a vpc when unset
 keypair = config.get("keypair") if config.get("keypair") is not None else "jarvis"
+enable_load_balancer = config.get_bool("enableLoadBalancer") if config.get_bool("enableLoadBalancer") is not None else False
+min_size = config.get_int("minSize") if config.get_int("minSize") is not None else 1
+max_size = config.get_int("maxSize") if config.get_int("maxSize") is not None else (4 if enable_load_balancer else 1)
+ebs_sizing = config.get("ebsSizing") if config.get("ebsSizing") is not None else "baseline" # "baseline" (sustained) or "burst" (opt-in, smaller instances only sustain it 30 min a day)
+fast_snapshot_restore = config.get_bool("fastSnapshotRestore") if config.get_bool("fastSnapshotRestore") is not None else False
+fast_snapshot_restore_azs = config.get("fastSnapshotRestoreAzs") # defaults to all the AZs used by the vpc
+root_snapshot_id = config.get("rootSnapshotId") if config.get("rootSnapshotId") is not None else "snap-01c7cdb5e9eaf8fde" # "" for the root volume of the AMI
+prewarm_root_volume = config.get_bool("prewarmRootVolume") # defaults to true for a snapshot root volume in the AZs without FSR
+training_mode = config.get_bool("trainingMode") if config.get_bool("trainingMode") is not None else False
+training_instance_types = config.get("trainingInstanceTypes") if config.get("trainingInstanceTypes") is not None else ['g4dn.8xlarge', 'g4dn.12xlarge', 'g5.8xlarge', 'g5.12xlarge', 'c5n.9xlarge']
+shared_storage_kind = config.get("sharedStorage") if config.get("sharedStorage") is not None else "none" # "none", "fsx" or "efs"
+dataset_s3_uri = config.get("datasetS3Uri")
+dataset_size_gib = config.get_int("datasetSizeGib") if config.get_int("datasetSizeGib") is not None else 100
+node_throughput = config.get_int("nodeThroughput") if config.get_int("nodeThroughput") is not None else 250 # MB/s per node
+spot_max_price = config.get("spotMaxPrice") if config.get("spotMaxPrice") is not None else (None if training_mode else "0.04") # None: up to the on-demand price
+target_requests_per_instance = config.get_float("targetRequestsPerInstance") if config.get_float("targetRequestsPerInstance") is not None else 1000.0
 
 user_data_file = f"user_data.sh"
 instance_types = loads(instance_types) if isinstance(instance_types, str) else instance_types
 
+# In training mode, only keep the instance types with EFA/ENA Express networking (for distributed GNN training)
+if training_mode:
+    training_instance_types = loads(training_instance_types) if isinstance(training_instance_types, str) else training_instance_types
+    skipped_instance_types = [t for t in training_instance_types if not (get_network_performance(t) and get_network_performance(t).training_capable)]
+    if skipped_instance_types: pulumi.log.warn(f"Skipping instance types without EFA/ENA Express support in training mode: {skipped_instance_types}")
+    instance_types = [t for t in training_instance_types if t not in skipped_instance_types]
+    if not instance_types: raise ValueError("No EFA/ENA Express capable instance type in 'trainingInstanceTypes'")
+# Use EFA when every instance type supports it, otherwise the default ENA interface
+efa_enabled = training_mode and all(get_network_performance(t).efa for t in instance_types)
+
 # Look up the latest AWS Deep Learning AMI GPU CUDA i.e: ami-0a8da46354e76997e
 ami = aws.ec2.get_ami(
     filters=[
@@ -29,128 +62,324 @@ ami = aws.ec2.get_ami(
 # Get all availability zones
 azs = aws.get_availability_zones(state="available")
 
-# Create a vpc https://www.pulumi.com/docs/clouds/aws/guides/vpc/
-vpc_name = f"{project_name}-vpc"
-vpc = awsx.ec2.Vpc(vpc_name, awsx.ec2.VpcArgs(
-    cidr_block=vpc_network_cidr,
-    number_of_availability_zones=len(azs.names),
-    subnet_specs=[
-        awsx.ec2.SubnetSpecArgs(
-            type=awsx.ec2.SubnetType.PUBLIC,
-            cidr_mask=22,
+# Enable Fast Snapshot Restore of the root volume snapshot, so volumes are fully initialized at creation
+root_snapshot_id = root_snapshot_id or None
+if fast_snapshot_restore and not root_snapshot_id: pulumi.log.warn("'fastSnapshotRestore' is ignored without a 'rootSnapshotId'")
+fast_snapshot_restore_azs = loads(fast_snapshot_restore_azs) if isinstance(fast_snapshot_restore_azs, str) else fast_snapshot_restore_azs
+fsr_azs = [az for az in (fast_snapshot_restore_azs or azs.names) if az in azs.names] if fast_snapshot_restore and root_snapshot_id else []
+fast_snapshot_restores = [
+    aws.ebs.FastSnapshotRestore(
+        f"{project_name}-fsr-{az}",
+        availability_zone=az,
+        snapshot_id=root_snapshot_id,
+    )
+    for az in fsr_azs
+]
+# Volumes restored from a snapshot load their blocks lazily from S3, pre-warm them only where FSR doesn't initialize them
+prewarm_root_volume = prewarm_root_volume if prewarm_root_volume is not None else (root_snapshot_id is not None and set(fsr_azs) != set(azs.names))
+
+# Use the shared network stack (VPC, subnets and security group) when configured, otherwise create them
+if network_stack:
+    vpc = get_shared_network(network_stack)
+    vpc_name = network_stack
+    security_group_id = vpc.security_group_id
+else:
+    # Create a vpc https://www.pulumi.com/docs/clouds/aws/guides/vpc/
+    vpc_name = f"{project_name}-vpc"
+    vpc = awsx.ec2.Vpc(vpc_name, awsx.ec2.VpcArgs(
+        cidr_block=vpc_network_cidr,
+        number_of_availability_zones=len(azs.names),
+        subnet_specs=[
+            awsx.ec2.SubnetSpecArgs(
+                type=awsx.ec2.SubnetType.PUBLIC,
+                cidr_mask=22,
+            ),
+            awsx.ec2.SubnetSpecArgs(
+                type=awsx.ec2.SubnetType.PRIVATE,
+                cidr_mask=22,
+            ),
+        ],
+        nat_gateways=awsx.ec2.NatGatewayConfigurationArgs(
+            strategy=awsx.ec2.NatGatewayStrategy.NONE,
         ),
-        awsx.ec2.SubnetSpecArgs(
-            type=awsx.ec2.SubnetType.PRIVATE,
-            cidr_mask=22,
+        subnet_strategy=awsx.ec2.SubnetAllocationStrategy.AUTO,
+        tags={
+            "Name": vpc_name,
+            "Project": project_name,
+        }
+    ))
+
+    # Create a security group allowing inbound access over port 22 and 443 (https) and outbound access to anywhere.
+    security_group_name = f"{project_name}-security-group"
+    security_group = aws.ec2.SecurityGroup(
+        security_group_name,
+        vpc_id=vpc.vpc_id,
+        ingress=[
+            aws.ec2.SecurityGroupIngressArgs(
+                from_port=22,
+                to_port=22,
+                protocol="tcp",
+                cidr_blocks=["0.0.0.0/0"],
+            ),
+            aws.ec2.SecurityGroupIngressArgs(
+                from_port=80,
+                to_port=80,
+                protocol="tcp",
+                cidr_blocks=["0.0.0.0/0"],
+            ),
+        ],
+        egress=[
+            aws.ec2.SecurityGroupEgressArgs(
+                from_port=0,
+                to_port=0,
+                protocol="-1",
+                cidr_blocks=["0.0.0.0/0"],
+            )
+        ],
+        tags={
+            "Name": security_group_name,
+            "Project": project_name,
+        }
+    )
+    security_group_id = security_group.id
+
+# In training mode, pack the fleet in a cluster placement group (single AZ) for inter-node bandwidth and latency
+placement_group = None
+efa_security_group = None
+efa_security_group_id = None
+if training_mode:
+    placement_group_name = f"{project_name}-cluster-placement-group"
+    placement_group = aws.ec2.PlacementGroup(
+        placement_group_name,
+        strategy="cluster",
+        tags={
+            "Name": placement_group_name,
+            "Project": project_name,
+        },
+    )
+
+    # EFA needs all traffic allowed between the members of the security group
+    efa_security_group_name = f"{project_name}-efa-security-group"
+    efa_security_group = aws.ec2.SecurityGroup(
+        efa_security_group_name,
+        vpc_id=vpc.vpc_id,
+        ingress=[
+            aws.ec2.SecurityGroupIngressArgs(
+                from_port=0,
+                to_port=0,
+                protocol="-1",
+                self=True,
+            ),
+        ],
+        egress=[
+            aws.ec2.SecurityGroupEgressArgs(
+                from_port=0,
+                to_port=0,
+                protocol="-1",
+                self=True,
+            ),
+        ],
+        tags={
+            "Name": efa_security_group_name,
+            "Project": project_name,
+        },
+    )
+    efa_security_group_id = efa_security_group.id
+
+# Optionally, put an application load balancer in front of the fleet so traffic is spread across instances
+load_balancer = None
+target_group = None
+if enable_load_balancer:
+    load_balancer_name = f"{project_name}-alb"
+    load_balancer = aws.lb.LoadBalancer(
+        load_balancer_name,
+        internal=False,
+        load_balancer_type="application",
+        security_groups=[security_group_id],
+        subnets=vpc.public_subnet_ids,
+        idle_timeout=60,
+        enable_http2=True,
+        tags={
+            "Name": load_balancer_name,
+            "Project": project_name,
+        },
+    )
+
+    # Short health check intervals so new instances join (and dead ones leave) quickly,
+    # and a short deregistration delay since the apache site has no long-lived requests.
+    target_group_name = f"{project_name}-tg"
+    target_group = aws.lb.TargetGroup(
+        target_group_name,
+        port=80,
+        protocol="HTTP",
+        target_type="instance",
+        vpc_id=vpc.vpc_id,
+        deregistration_delay=30,
+        slow_start=0,
+        load_balancing_algorithm_type="least_outstanding_requests",
+        health_check=aws.lb.TargetGroupHealthCheckArgs(
+            enabled=True,
+            path="/",
+            port="traffic-port",
+            protocol="HTTP",
+            matcher="200",
+            interval=10,
+            timeout=5,
+            healthy_threshold=2,
+            unhealthy_threshold=2,
         ),
-    ],
-    nat_gateways=awsx.ec2.NatGatewayConfigurationArgs(
-        strategy=awsx.ec2.NatGatewayStrategy.NONE,
-    ),
-    subnet_strategy=awsx.ec2.SubnetAllocationStrategy.AUTO,
-    tags={
-        "Name": vpc_name,
-        "Project": project_name,
-    }
-))
-
-# Create a security group allowing inbound access over port 22 and 443 (https) and outbound access to anywhere.
-security_group_name = f"{project_name}-security-group"
-security_group = aws.ec2.SecurityGroup(
-    security_group_name,
-    vpc_id=vpc.vpc_id,
-    ingress=[
-        aws.ec2.SecurityGroupIngressArgs(
-            from_port=22,
-            to_port=22,
-            protocol="tcp",
-            cidr_blocks=["0.0.0.0/0"],
+        tags={
+            "Name": target_group_name,
+            "Project": project_name,
+        },
+    )
+
+    listener_name = f"{project_name}-listener"
+    listener = aws.lb.Listener(
+        listener_name,
+        load_balancer_arn=load_balancer.arn,
+        port=80,
+        protocol="HTTP",
+        default_actions=[
+            aws.lb.ListenerDefaultActionArgs(
+                type="forward",
+                target_group_arn=target_group.arn,
+            )
+        ],
+        tags={
+            "Name": listener_name,
+            "Project": project_name,
+        },
+    )
+
+# Define the EBS block device mappings, the root volume performance is tuned per instance type
+root_volume_size = 100
+default_instance_type = instance_types[0] if training_mode else "c5.large"
+def get_block_device_mappings(root_volume: Gp3Profile):
+    return [
+        aws.ec2.LaunchTemplateBlockDeviceMappingArgs(
+            device_name="/dev/sda1",
+            ebs=aws.ec2.LaunchTemplateBlockDeviceMappingEbsArgs(
+                delete_on_termination=True,
+                iops=root_volume.iops,
+                snapshot_id=root_snapshot_id,
+                volume_size=root_volume_size,
+                volume_type="gp3",
+                throughput=root_volume.throughput,
+                encrypted=False
+            ),
         ),
-        aws.ec2.SecurityGroupIngressArgs(
-            from_port=80,
-            to_port=80,
-            protocol="tcp",
-            cidr_blocks=["0.0.0.0/0"],
+        aws.ec2.LaunchTemplateBlockDeviceMappingArgs(
+            device_name="/dev/sdb",
+            ebs=aws.ec2.LaunchTemplateBlockDeviceMappingEbsArgs(
+                delete_on_termination=True,
+                volume_size=10,
+                iops=3000,
+                volume_type="gp3",
+                throughput=125,
+                encrypted=False
+            ),
         ),
-    ],
-    egress=[
-        aws.ec2.SecurityGroupEgressArgs(
-            from_port=0,
-            to_port=0,
-            protocol="-1",
-            cidr_blocks=["0.0.0.0/0"],
+        aws.ec2.LaunchTemplateBlockDeviceMappingArgs(
+            device_name="/dev/sdc",
+            ebs=aws.ec2.LaunchTemplateBlockDeviceMappingEbsArgs(
+                delete_on_termination=True,
+                volume_size=10,
+                iops=3000,
+                volume_type="gp3",
+                throughput=125,
+                encrypted=False
+            ),
         )
-    ],
-    tags={
-        "Name": security_group_name,
-        "Project": project_name,
-    }
-)
+    ]
 
-# Define the EBS block device mappings
-block_device_mappings = [
-    aws.ec2.LaunchTemplateBlockDeviceMappingArgs(
-        device_name="/dev/sda1",
-        ebs=aws.ec2.LaunchTemplateBlockDeviceMappingEbsArgs(
-            delete_on_termination=True,
-            iops=3000,
-            snapshot_id="snap-01c7cdb5e9eaf8fde",
-            volume_size=100,
-            volume_type="gp3",
-            throughput=125,
-            encrypted=False
-        ),
-    ),
-    aws.ec2.LaunchTemplateBlockDeviceMappingArgs(
-        device_name="/dev/sdb",
-        virtual_name="ephemeral0",
-        ebs=aws.ec2.LaunchTemplateBlockDeviceMappingEbsArgs(
-            delete_on_termination=True,
-            volume_size=10,
-            iops=3000,
-            volume_type="gp3",
-            throughput=125,
-            encrypted=False
-        ),
-    ),
-    aws.ec2.LaunchTemplateBlockDeviceMappingArgs(
-        device_name="/dev/sdc",
-        virtual_name="ephemeral1",
-        ebs=aws.ec2.LaunchTemplateBlockDeviceMappingEbsArgs(
-            delete_on_termination=True,
-            volume_size=10,
-            iops=3000,
-            volume_type="gp3",
-            throughput=125,
-            encrypted=False
+# Shared dataset storage (FSx for Lustre linked to s3, or EFS), mounted by every node instead of copying the dataset
+shared_storage = None
+if shared_storage_kind != "none":
+    shared_storage = SharedStorage(
+        f"{project_name}-dataset",
+        SharedStorageArgs(
+            kind=shared_storage_kind,
+            vpc_id=vpc.vpc_id,
+            subnet_ids=vpc.public_subnet_ids,
+            subnet_count=len(azs.names),
+            client_security_group_id=security_group_id,
+            dataset_size_gib=dataset_size_gib,
+            node_count=max_size,
+            node_throughput=node_throughput,
+            dataset_s3_uri=dataset_s3_uri,
+            tags={
+                "Project": project_name,
+            },
         ),
     )
-]
+
+# Render the user data template with the stack values, as a gzip compressed multipart cloud-init document
+def render_fleet_user_data(mount_shared_storage: str):
+    return render_user_data([
+        UserDataPart(render_template(user_data_file, {
+            # One IMDSv2 session for the metadata and per-phase boot timings (see `src/boot_agent.py`)
+            "boot_agent": boot_agent_preamble(),
+            # Assemble the local NVMe instance store (if any) of whichever instance type gets launched
+            "setup_instance_store": instance_store_script(instance_types, mount_point="/mnt/scratch", owner="ubuntu"),
+            "mount_shared_storage": mount_shared_storage,
+            "prewarm_root_volume": str(prewarm_root_volume).lower(),
+            "fsr_azs": " ".join(fsr_azs),
+        })),
+    ])
+
+rendered_user_data = pulumi.Output.from_input(shared_storage.mount_script if shared_storage else "").apply(render_fleet_user_data)
+user_data = rendered_user_data.apply(lambda rendered: rendered.base64)
+
+def create_launch_template(name: str, root_volume: Gp3Profile):
+    return aws.ec2.LaunchTemplate(
+        name,
+        block_device_mappings=get_block_device_mappings(root_volume),
+        image_id=ami,
+        key_name=keypair,
+        instance_type=default_instance_type,
+        vpc_security_group_ids=None if training_mode else [security_group_id],
+        # In training mode, the primary network interface is an EFA (or ENA) one in both security groups
+        network_interfaces=[
+            aws.ec2.LaunchTemplateNetworkInterfaceArgs(
+                device_index=0,
+                network_card_index=0,
+                interface_type="efa" if efa_enabled else None,
+                associate_public_ip_address="true",
+                delete_on_termination="true",
+                security_groups=[security_group_id, efa_security_group_id],
+            )
+        ] if training_mode else None,
+        update_default_version=True,
+        user_data=user_data,
+        tags={
+            "Name": name,
+            "Project": project_name,
+        },
+    )
 
 # Launch template for the spot fleet
+default_root_volume = gp3_profile_for(default_instance_type, root_volume_size, ebs_sizing)
 launch_template_name = f"{project_name}-launch-template"
-launch_template = aws.ec2.LaunchTemplate(
-    launch_template_name,
-    block_device_mappings=block_device_mappings,
-    image_id=ami,
-    key_name=keypair,
-    instance_type="c5.large",
-    vpc_security_group_ids=[security_group.id],
-    update_default_version=True,
-    user_data=(lambda path: base64.b64encode(open(path).read().encode()).decode())(f"{user_data_file}"),
-    tags={
-        "Name": launch_template_name,
-        "Project": project_name,
-    },
-)
+launch_template = create_launch_template(launch_template_name, default_root_volume)
+
+# Instance types whose EBS bandwidth doesn't match the default root volume get their own launch template (one per gp3 profile)
+root_volumes = { instance_type: gp3_profile_for(instance_type, root_volume_size, ebs_sizing) for instance_type in instance_types }
+launch_templates = { default_root_volume: launch_template }
+for root_volume in sorted(set(root_volumes.values()) - {default_root_volume}, key=lambda profile: profile.name):
+    launch_templates[root_volume] = create_launch_template(f"{launch_template_name}-{root_volume.name}", root_volume)
 
 # Override the instance type for the spot fleet
 auto_scaling_group_overrides = []
 for instance_type in instance_types:
+    root_volume = root_volumes[instance_type]
     auto_scaling_group_overrides.append(
         aws.autoscaling.GroupMixedInstancesPolicyLaunchTemplateOverrideArgs(    
             instance_type=instance_type,
             weighted_capacity="1",
+            launch_template_specification=aws.autoscaling.GroupMixedInstancesPolicyLaunchTemplateOverrideLaunchTemplateSpecificationArgs(
+                launch_template_id=launch_templates[root_volume].id,
+            ) if root_volume != default_root_volume else None,
         )
     )
 
@@ -159,9 +388,12 @@ auto_scaling_group_name = f"{project_name}-auto-scaling-group"
 auto_scaling_group = aws.autoscaling.Group(
     auto_scaling_group_name,
     capacity_rebalance=True,
-    desired_capacity=1,
-    max_size=1,
-    min_size=1,
+    desired_capacity=min_size,
+    max_size=max_size,
+    min_size=min_size,
+    target_group_arns=[target_group.arn] if target_group else None,
+    health_check_type="ELB" if target_group else "EC2",
+    health_check_grace_period=120 if target_group else None,
     mixed_instances_policy=aws.autoscaling.GroupMixedInstancesPolicyArgs(
         launch_template=aws.autoscaling.GroupMixedInstancesPolicyLaunchTemplateArgs(
             launch_template_specification=aws.autoscaling.GroupMixedInstancesPolicyLaunchTemplateLaunchTemplateSpecificationArgs(
@@ -174,14 +406,15 @@ auto_scaling_group = aws.autoscaling.Group(
             on_demand_base_capacity=0,
             on_demand_percentage_above_base_capacity=0,
             spot_allocation_strategy="price-capacity-optimized",
-            spot_max_price="0.04",
+            spot_max_price=spot_max_price,
         ),
     ),
     instance_maintenance_policy=aws.autoscaling.GroupInstanceMaintenancePolicyArgs( # Launch before terminating
         max_healthy_percentage=110,
         min_healthy_percentage=100,
     ),
-    vpc_zone_identifiers=vpc.public_subnet_ids,
+    vpc_zone_identifiers=vpc.public_subnet_ids.apply(lambda ids: ids[:1]) if training_mode else vpc.public_subnet_ids,
+    placement_group=placement_group.id if placement_group else None,
     tags=[
         aws.autoscaling.GroupTagArgs(
             key="Name",
@@ -199,13 +432,65 @@ auto_scaling_group = aws.autoscaling.Group(
             propagate_at_launch=True,
         ),
     ],
+    # Let the scaling policy own the desired capacity once the group exists
+    opts=pulumi.ResourceOptions(ignore_changes=["desired_capacity"]) if target_group else None,
 )
 
+# Scale the fleet horizontally on the number of requests each instance receives from the load balancer
+if load_balancer and target_group:
+    scaling_policy_name = f"{project_name}-request-count-scaling"
+    scaling_policy = aws.autoscaling.Policy(
+        scaling_policy_name,
+        autoscaling_group_name=auto_scaling_group.name,
+        policy_type="TargetTrackingScaling",
+        estimated_instance_warmup=120,
+        target_tracking_configuration=aws.autoscaling.PolicyTargetTrackingConfigurationArgs(
+            predefined_metric_specification=aws.autoscaling.PolicyTargetTrackingConfigurationPredefinedMetricSpecificationArgs(
+                predefined_metric_type="ALBRequestCountPerTarget",
+                resource_label=pulumi.Output.concat(load_balancer.arn_suffix, "/", target_group.arn_suffix),
+            ),
+            target_value=target_requests_per_instance,
+        ),
+    )
+
 # Export the instance's publicly accessible IP address and hostname.
 pulumi.export("aws_region", aws_region)
 pulumi.export("ami", ami)
 pulumi.export("azs", azs.names)
 pulumi.export("vpc", vpc_name)
-pulumi.export("security_group", security_group.id)
+pulumi.export("fsr_azs", fsr_azs)
+pulumi.export("security_group", security_group_id)
 pulumi.export("launch_template", launch_template.id)
+pulumi.export("user_data_size", rendered_user_data.apply(lambda rendered: rendered.report()))
+pulumi.export("launch_templates", { profile.name: template.id for profile, template in launch_templates.items() })
+pulumi.export("ebs_root_volume", {
+    instance_type: {
+        "iops": root_volume.iops,
+        "throughput": root_volume.throughput,
+        "effective_throughput": effective_throughput(instance_type, root_volume, ebs_sizing),
+    }
+    for instance_type, root_volume in root_volumes.items()
+})
+if shared_storage:
+    pulumi.export("shared_storage", {
+        "kind": shared_storage.kind,
+        "file_system_id": shared_storage.file_system.id,
+        "mount_point": shared_storage.mount_point,
+        "storage_capacity": shared_storage.storage_capacity,
+        "throughput": shared_storage.throughput,
+    })
+pulumi.export("training_mode", { "enabled": training_mode, "efa": efa_enabled })
+pulumi.export("expected_network_throughput", {
+    instance_type: expected_throughput(instance_type, cluster_placement=training_mode)
+    for instance_type in instance_types
+    if get_network_performance(instance_type) is not None
+})
+pulumi.export("instance_store", {
+    instance_type: vars(layout)
+    for instance_type, layout in ((instance_type, get_instance_store_layout(instance_type)) for instance_type in instance_types)
+    if layout is not None
+})
 pulumi.export("auto_scaling_group", auto_scaling_group.id)
+if load_balancer:
+    pulumi.export("load_balancer_dns", load_balancer.dns_name)
+    pulumi.export("target_group", target_group.arn)
@@ -0,0 +1,84 @@
+"""
+Contains the boot agent preamble shared by the user data scripts.
+
+The preamble replaces the per-script metadata lookups and `log`/`run` helpers:
+
+  - A single IMDSv2 session, with every metadata key fetched in parallel
+  - `run <phase> [args...]`, which times a phase and appends it as a JSON line to the boot log
+  - The time from kernel start to user data is recorded as the `kernel` phase
+
+Analyze the boot logs of many instances with `python -m src.boot_analyzer`.
+"""
+
+BOOT_LOG = "/var/log/boot-phases.jsonl"
+
+# Metadata keys fetched at boot and the variables they're exported as.
+METADATA = {
+    "AMI_ID": "ami-id",
+    "INSTANCE_ID": "instance-id",
+    "HOSTNAME": "hostname",
+    "AWS_REGION": "placement/region",
+    "AVAILABILITY_ZONE": "placement/availability-zone",
+    "INSTANCE_TYPE": "instance-type",
+    "PUBLIC_IP": "public-ipv4",
+    "IDENTITY": "identity-credentials/ec2/info",
+}
+
+def boot_agent_preamble(boot_log: str = BOOT_LOG) -> str:
+    """
+    Generate the boot agent preamble, to put right after the shebang of a user data script.
+
+    :param boot_log: Where to append the JSON lines with the per-phase timings.
+    """
+    fetches = "\n".join(f'imds "{key}" > "$_imds_dir/{variable}" &' for variable, key in METADATA.items())
+    assignments = "\n".join(f'{variable}=$(cat "$_imds_dir/{variable}")' for variable in METADATA)
+
+    return f'''
+# ------------------------------
+# Boot agent
+# ------------------------------
+_boot_start=$(date +%s.%N)
+_kernel_uptime=$(cut -d " " -f 1 /proc/uptime)
+boot_log="{boot_log}"
+output_file="${{output_file:-/var/log/user-data.log}}"
+
+IMDS="http://169.254.169.254/latest"
+IMDS_TOKEN=$(curl -s -X PUT "$IMDS/api/token" -H "X-aws-ec2-metadata-token-ttl-seconds: 21600")
+
+imds() {{
+    curl -s -H "X-aws-ec2-metadata-token: $IMDS_TOKEN" "$IMDS/meta-data/$1"
+}}
+
+_imds_dir=$(mktemp -d)
+{fetches}
+wait
+{assignments}
+ACCOUNT_ID=$(sed -n 's/.*"AccountId" *: *"\\([0-9]*\\)".*/\\1/p' <<< "$IDENTITY")
+rm -rf "$_imds_dir"
+
+_boot_phase() {{
+    local phase=$1 start=$2 end=$3 exit_code=$4
+    printf '{{"instance_id":"%s","instance_type":"%s","availability_zone":"%s","ami_id":"%s","phase":"%s","start":%s,"end":%s,"duration":%s,"exit_code":%d}}\\n' \\
+        "$INSTANCE_ID" "$INSTANCE_TYPE" "$AVAILABILITY_ZONE" "$AMI_ID" "$phase" "$start" "$end" \\
+        "$(awk "BEGIN {{ printf \\"%.3f\\", $end - $start }}")" "$exit_code" >> "$boot_log"
+}}
+
+log() {{
+    echo "[ log ] $1" | tee -a "$output_file"
+}}
+
+run() {{
+    local start end exit_code
+    start=$(date +%s.%N);
+    # shellcheck disable=SC2048
+    "$@" 2>&1 | tee -a "$output_file"
+    exit_code=${{PIPESTATUS[0]}}
+    end=$(date +%s.%N);
+    _boot_phase "$1" "$start" "$end" "$exit_code"
+    echo "[ run ] $* took $(awk "BEGIN {{ print $end - $start }}") secs with exit code $exit_code" | tee -a "$output_file"
+    return $exit_code
+}}
+
+_boot_phase "kernel" "$(awk "BEGIN {{ printf \\"%.3f\\", $_boot_start - $_kernel_uptime }}")" "$_boot_start" 0
+_boot_phase "imds" "$_boot_start" "$(date +%s.%N)" 0
+'''
@@ -0,0 +1,135 @@
+"""
+Aggregates the boot phase logs (JSON lines written by the boot agent, see `boot_agent.py`)
+of many instances into per-phase latency percentiles.
+
+### Example Usage
+
+```bash
+# Collect the logs, i.e: scp ubuntu@<ip>:/var/log/boot-phases.jsonl logs/<ip>.jsonl
+python -m src.boot_analyzer logs/*.jsonl --by instance_type
+```
+"""
+import argparse
+import json
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+TOTAL_PHASE = "total"
+
+def load_phases(paths: Iterable[str]) -> List[dict]:
+    """
+    Read the boot phase records from the given JSON lines files, skipping malformed lines.
+
+    Parameters:
+        paths: Paths to boot phase logs.
+    """
+    records = []
+    for path in paths:
+        with open(path) as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "phase" in record and "duration" in record:
+                    records.append(record)
+    return records
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    The q-th percentile (0-100) of the values, linearly interpolated between the closest ranks.
+
+    Parameters:
+        values: The values, in any order (NaN when empty).
+        q: The percentile, from 0 to 100.
+    """
+    if not values:
+        return math.nan
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+def add_total_phase(records: List[dict]) -> List[dict]:
+    """
+    Add a `total` record per instance, from the start of its first phase to the end of its last one.
+    The `kernel` phase is left out, so `total` is the time spent in user data.
+
+    Parameters:
+        records: The boot phase records.
+    """
+    instances: Dict[str, List[dict]] = defaultdict(list)
+    for record in records:
+        if record["phase"] != "kernel":
+            instances[record.get("instance_id", "")].append(record)
+    totals = []
+    for instance_id, phases in instances.items():
+        start, end = min(p["start"] for p in phases), max(p["end"] for p in phases)
+        totals.append({
+            **{k: phases[0].get(k) for k in ("instance_id", "instance_type", "availability_zone", "ami_id")},
+            "phase": TOTAL_PHASE,
+            "start": start,
+            "end": end,
+            "duration": end - start,
+            "exit_code": max(p.get("exit_code", 0) for p in phases),
+        })
+    return records + totals
+
+def summarize(records: List[dict], by: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
+    """
+    Per-phase latency stats: count, failures, p50, p95, max (seconds), grouped by `by` (i.e: instance_type).
+
+    Parameters:
+        records: The boot phase records.
+        by: A record field to group by, or None to aggregate across all instances.
+    """
+    groups: Dict[str, Dict[str, List[dict]]] = defaultdict(lambda: defaultdict(list))
+    for record in records:
+        groups[str(record.get(by)) if by else "all"][record["phase"]].append(record)
+
+    summary: Dict[str, Dict[str, dict]] = {}
+    for group, phases in groups.items():
+        summary[group] = {}
+        for phase, phase_records in phases.items():
+            durations = [float(r["duration"]) for r in phase_records]
+            summary[group][phase] = {
+                "count": len(durations),
+                "failures": sum(1 for r in phase_records if r.get("exit_code", 0) != 0),
+                "p50": percentile(durations, 50),
+                "p95": percentile(durations, 95),
+                "max": max(durations),
+            }
+    return summary
+
+def format_summary(summary: Dict[str, Dict[str, dict]]) -> str:
+    """
+    Render the summary as a table per group, slowest phase (by p95) first.
+
+    Parameters:
+        summary: The per-phase stats of `summarize`.
+    """
+    lines = []
+    for group, phases in sorted(summary.items()):
+        lines.append(f"[ {group} ]")
+        lines.append(f"{'phase':<28}{'count':>7}{'fail':>6}{'p50 (s)':>10}{'p95 (s)':>10}{'max (s)':>10}")
+        for phase, stats in sorted(phases.items(), key=lambda item: (item[0] == TOTAL_PHASE, -item[1]["p95"])):
+            lines.append(f"{phase:<28}{stats['count']:>7}{stats['failures']:>6}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['max']:>10.2f}")
+        lines.append("")
+    return "\n".join(lines)
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Aggregate boot phase logs into p50/p95 latency per phase.")
+    parser.add_argument("paths", nargs="+", help="Boot phase logs (JSON lines)")
+    parser.add_argument("--by", default=None, help="Group by a record field, i.e: instance_type, availability_zone, ami_id")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    summary = summarize(add_total_phase(load_phases(args.paths)), by=args.by)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Contains helpers to size gp3 volumes from the EBS-optimized bandwidth of an instance type.
+
+Link: https://docs.aws.amazon.com/AWSEC2/latest/UserGuide/ebs-optimized.html
+"""
+from dataclasses import dataclass
+from typing import Dict, Literal
+
+# gp3 limits: 3000 IOPS / 125 MB/s are included in the price, anything above is billed.
+GP3_BASELINE_IOPS = 3000
+GP3_BASELINE_THROUGHPUT = 125 # MB/s
+GP3_MAX_IOPS = 16000
+GP3_MAX_THROUGHPUT = 1000 # MB/s
+GP3_MAX_IOPS_PER_GIB = 500
+GP3_MAX_THROUGHPUT_PER_IOPS = 0.25 # MB/s
+
+@dataclass(frozen=True)
+class EbsBandwidth:
+    """
+    EBS-optimized performance of an instance type (bandwidth in Mbps, as documented by AWS).
+    """
+    baseline_mbps: float
+    baseline_iops: int
+    max_mbps: float
+    max_iops: int
+
+@dataclass(frozen=True)
+class Gp3Profile:
+    """
+    Provisioned performance of a gp3 volume.
+    """
+    iops: int
+    throughput: int # MB/s
+
+    @property
+    def name(self) -> str:
+        return f"{self.iops}iops-{self.throughput}mbs"
+
+# EBS-optimized bandwidth per instance type (baseline and burst).
+EBS_OPTIMIZED_BANDWIDTH: Dict[str, EbsBandwidth] = {
+    "t3.micro": EbsBandwidth(baseline_mbps=87, baseline_iops=500, max_mbps=2085, max_iops=11800),
+    "t4g.small": EbsBandwidth(baseline_mbps=174, baseline_iops=1000, max_mbps=2085, max_iops=11800),
+    "c5.large": EbsBandwidth(baseline_mbps=650, baseline_iops=4000, max_mbps=4750, max_iops=20000),
+    "c5a.large": EbsBandwidth(baseline_mbps=200, baseline_iops=800, max_mbps=3170, max_iops=13300),
+    "c5d.large": EbsBandwidth(baseline_mbps=650, baseline_iops=4000, max_mbps=4750, max_iops=20000),
+    "c5n.large": EbsBandwidth(baseline_mbps=650, baseline_iops=4000, max_mbps=4750, max_iops=20000),
+    "r4.large": EbsBandwidth(baseline_mbps=425, baseline_iops=3000, max_mbps=425, max_iops=3000),
+    "r5n.large": EbsBandwidth(baseline_mbps=650, baseline_iops=3600, max_mbps=4750, max_iops=18750),
+    "r5d.large": EbsBandwidth(baseline_mbps=650, baseline_iops=3600, max_mbps=4750, max_iops=18750),
+    "r5dn.large": EbsBandwidth(baseline_mbps=650, baseline_iops=3600, max_mbps=4750, max_iops=18750),
+    "r5ad.large": EbsBandwidth(baseline_mbps=650, baseline_iops=3600, max_mbps=2880, max_iops=16000),
+    "i3.large": EbsBandwidth(baseline_mbps=425, baseline_iops=3000, max_mbps=425, max_iops=3000),
+    "i4i.large": EbsBandwidth(baseline_mbps=625, baseline_iops=2500, max_mbps=10000, max_iops=40000),
+    "m7i.large": EbsBandwidth(baseline_mbps=650, baseline_iops=3600, max_mbps=10000, max_iops=40000),
+    "m7i-flex.large": EbsBandwidth(baseline_mbps=312.5, baseline_iops=2500, max_mbps=10000, max_iops=40000),
+    "inf1.xlarge": EbsBandwidth(baseline_mbps=1190, baseline_iops=4000, max_mbps=4750, max_iops=20000),
+    "c5n.9xlarge": EbsBandwidth(baseline_mbps=9500, baseline_iops=40000, max_mbps=9500, max_iops=40000),
+    "c5n.18xlarge": EbsBandwidth(baseline_mbps=19000, baseline_iops=80000, max_mbps=19000, max_iops=80000),
+    "g4dn.8xlarge": EbsBandwidth(baseline_mbps=9500, baseline_iops=40000, max_mbps=9500, max_iops=40000),
+    "g4dn.12xlarge": EbsBandwidth(baseline_mbps=9500, baseline_iops=40000, max_mbps=9500, max_iops=40000),
+    "g5.8xlarge": EbsBandwidth(baseline_mbps=16000, baseline_iops=65000, max_mbps=16000, max_iops=65000),
+    "g5.12xlarge": EbsBandwidth(baseline_mbps=16000, baseline_iops=65000, max_mbps=16000, max_iops=65000),
+    "p3dn.24xlarge": EbsBandwidth(baseline_mbps=19000, baseline_iops=80000, max_mbps=19000, max_iops=80000),
+    "m6i.32xlarge": EbsBandwidth(baseline_mbps=40000, baseline_iops=160000, max_mbps=40000, max_iops=160000),
+    "c6in.32xlarge": EbsBandwidth(baseline_mbps=80000, baseline_iops=350000, max_mbps=80000, max_iops=350000),
+}
+
+def gp3_profile_for(
+        instance_type: str,
+        volume_size: int,
+        sizing: Literal["baseline", "burst"] = "baseline",
+    ) -> Gp3Profile:
+    """
+    Derive gp3 IOPS/throughput that matches what the instance type can actually push to EBS.
+
+    Never goes below the free gp3 baseline (3000 IOPS / 125 MB/s), and respects the gp3
+    IOPS-per-GiB and throughput-per-IOPS ratios. Unknown instance types get the gp3 baseline.
+
+    :param instance_type: The EC2 instance type, i.e: `m7i.large`.
+    :param volume_size: The size of the volume in GiB.
+    :param sizing: Size to the sustained `baseline` bandwidth, or to the `burst` (max) bandwidth.
+    """
+    bandwidth = EBS_OPTIMIZED_BANDWIDTH.get(instance_type)
+    if bandwidth is None: return Gp3Profile(iops=GP3_BASELINE_IOPS, throughput=GP3_BASELINE_THROUGHPUT)
+
+    mbps, iops = (bandwidth.max_mbps, bandwidth.max_iops) if sizing == "burst" else (bandwidth.baseline_mbps, bandwidth.baseline_iops)
+    throughput = int(mbps / 8) # Mbps -> MB/s
+    throughput = max(GP3_BASELINE_THROUGHPUT, min(GP3_MAX_THROUGHPUT, throughput))
+    iops = max(GP3_BASELINE_IOPS, iops, int(throughput / GP3_MAX_THROUGHPUT_PER_IOPS))
+    iops = min(GP3_MAX_IOPS, GP3_MAX_IOPS_PER_GIB * volume_size, iops)
+    throughput = min(throughput, int(iops * GP3_MAX_THROUGHPUT_PER_IOPS))
+    return Gp3Profile(iops=iops, throughput=throughput)
+
+def effective_throughput(instance_type: str, profile: Gp3Profile, sizing: Literal["baseline", "burst"] = "baseline") -> float:
+    """
+    The storage throughput (MB/s) actually reachable: the lower of the volume and the instance EBS link.
+    """
+    bandwidth = EBS_OPTIMIZED_BANDWIDTH.get(instance_type)
+    if bandwidth is None: return float(profile.throughput)
+    mbps = bandwidth.max_mbps if sizing == "burst" else bandwidth.baseline_mbps
+    return min(float(profile.throughput), mbps / 8)
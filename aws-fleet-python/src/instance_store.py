@@ -0,0 +1,121 @@
+"""
+Contains helpers to put the local NVMe instance store of an instance type to use.
+
+Generates a bash function (`setup_instance_store`) for the user data that detects the
+local NVMe devices, assembles them into a RAID0 array (when there is more than one),
+formats and mounts them.
+
+Link: https://docs.aws.amazon.com/AWSEC2/latest/UserGuide/InstanceStorage.html
+"""
+from dataclasses import dataclass
+from typing import Dict, Literal, Optional, Sequence
+
+@dataclass(frozen=True)
+class InstanceStore:
+    """
+    The local NVMe instance store of an instance type.
+    """
+    devices: int
+    size_gib: int # per device
+
+# Instance store volumes per instance type.
+INSTANCE_STORE: Dict[str, InstanceStore] = {
+    "c5d.large": InstanceStore(devices=1, size_gib=50),
+    "r5d.large": InstanceStore(devices=1, size_gib=75),
+    "r5ad.large": InstanceStore(devices=1, size_gib=75),
+    "r5dn.large": InstanceStore(devices=1, size_gib=75),
+    "i3.large": InstanceStore(devices=1, size_gib=475),
+    "i4i.large": InstanceStore(devices=1, size_gib=468),
+    "i3.16xlarge": InstanceStore(devices=8, size_gib=1900),
+    "g4dn.8xlarge": InstanceStore(devices=1, size_gib=900),
+    "g4dn.12xlarge": InstanceStore(devices=1, size_gib=900),
+    "g5.8xlarge": InstanceStore(devices=1, size_gib=900),
+    "g5.12xlarge": InstanceStore(devices=1, size_gib=3800),
+    "p3dn.24xlarge": InstanceStore(devices=2, size_gib=900),
+}
+
+@dataclass(frozen=True)
+class InstanceStoreLayout:
+    """
+    How the instance store of an instance type is assembled and formatted.
+    """
+    devices: int
+    size_gib: int # total
+    raid_level: Optional[Literal["0"]]
+    filesystem: Literal["ext4", "xfs"]
+
+def get_instance_store_layout(instance_type: str) -> Optional[InstanceStoreLayout]:
+    """
+    Pick the layout for the instance store of an instance type, or None if it has no instance store.
+
+    Several devices are striped (RAID0) for bandwidth. Large or striped volumes use xfs
+    (parallel allocation groups, fast mkfs), small single devices use ext4.
+
+    :param instance_type: The EC2 instance type, i.e: `i3.16xlarge`.
+    """
+    instance_store = INSTANCE_STORE.get(instance_type)
+    if instance_store is None: return None
+    size_gib = instance_store.devices * instance_store.size_gib
+    return InstanceStoreLayout(
+        devices=instance_store.devices,
+        size_gib=size_gib,
+        raid_level="0" if instance_store.devices > 1 else None,
+        filesystem="xfs" if instance_store.devices > 1 or size_gib >= 1024 else "ext4",
+    )
+
+def instance_store_script(instance_types: Sequence[str], mount_point: str = "/mnt/scratch", owner: str = "ubuntu") -> str:
+    """
+    Generate the `setup_instance_store` bash function for the given instance types.
+
+    The function looks up `$INSTANCE_TYPE` at boot, so a single user data works for
+    every instance type of a mixed instances fleet.
+
+    :param instance_types: The instance types the user data may run on.
+    :param mount_point: Where to mount the instance store.
+    :param owner: The user owning the mount point.
+    """
+    cases = []
+    for instance_type in sorted(set(instance_types)):
+        layout = get_instance_store_layout(instance_type)
+        if layout is None: continue
+        cases.append(f'        {instance_type}) expected={layout.devices}; raid_level="{layout.raid_level or ""}"; filesystem="{layout.filesystem}" ;;')
+    cases = "\n".join(cases)
+
+    return f'''
+setup_instance_store() {{
+    local expected raid_level filesystem device devices
+    local mount_point="{mount_point}"
+    case "$INSTANCE_TYPE" in
+{cases}
+        *) echo "No instance store on '$INSTANCE_TYPE'"; return 0 ;;
+    esac
+
+    # Local NVMe instance store devices (EBS volumes show up as "Amazon Elastic Block Store")
+    mapfile -t devices < <(lsblk -dpno NAME,MODEL | awk '/Instance Storage/ {{print $1}}')
+    if [[ ${{#devices[@]}} -eq 0 ]]; then
+        echo "Expected $expected instance store device(s) on '$INSTANCE_TYPE', found none"
+        return 1
+    fi
+    [[ ${{#devices[@]}} -ne $expected ]] && echo "Expected $expected instance store device(s), found ${{#devices[@]}}"
+
+    [[ "$filesystem" == "xfs" ]] && ! command -v mkfs.xfs &> /dev/null && sudo apt install -y xfsprogs
+
+    if [[ -n "$raid_level" && ${{#devices[@]}} -gt 1 ]]; then
+        command -v mdadm &> /dev/null || sudo apt install -y mdadm
+        device="/dev/md0"
+        sudo mdadm --create "$device" --run --level="$raid_level" --chunk=256 --raid-devices=${{#devices[@]}} "${{devices[@]}}"
+    else
+        device="${{devices[0]}}"
+    fi
+
+    if [[ "$filesystem" == "xfs" ]]; then
+        sudo mkfs.xfs -f -K "$device"
+    else
+        sudo mkfs.ext4 -F -E nodiscard,lazy_itable_init=1,lazy_journal_init=1 "$device"
+    fi
+    sudo mkdir -p "$mount_point"
+    sudo mount -o noatime "$device" "$mount_point"
+    sudo chown {owner}:{owner} "$mount_point"
+    df -h "$mount_point"
+}}
+'''
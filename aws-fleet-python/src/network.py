@@ -0,0 +1,84 @@
+"""
+Contains the network performance of instance types, used to pick and size the distributed training fleet.
+
+Link: https://docs.aws.amazon.com/AWSEC2/latest/UserGuide/efa.html
+Link: https://docs.aws.amazon.com/AWSEC2/latest/UserGuide/ena-express.html
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Inside a cluster placement group a single TCP flow gets up to 10 Gbps (5 Gbps otherwise),
+# ENA Express (SRD) raises it to 25 Gbps, EFA isn't bound by it.
+SINGLE_FLOW_GBPS_CLUSTER = 10
+SINGLE_FLOW_GBPS = 5
+SINGLE_FLOW_GBPS_ENA_EXPRESS = 25
+
+@dataclass(frozen=True)
+class NetworkPerformance:
+    """
+    Network performance of an instance type (bandwidth in Gbps).
+    """
+    baseline_gbps: float
+    burst_gbps: float
+    efa: bool = False
+    ena_express: bool = False
+
+    @property
+    def training_capable(self) -> bool:
+        return self.efa or self.ena_express
+
+# Network performance per instance type.
+NETWORK_PERFORMANCE: Dict[str, NetworkPerformance] = {
+    "t3.micro": NetworkPerformance(baseline_gbps=0.064, burst_gbps=5),
+    "t4g.small": NetworkPerformance(baseline_gbps=0.128, burst_gbps=5),
+    "c5.large": NetworkPerformance(baseline_gbps=0.75, burst_gbps=10),
+    "c5a.large": NetworkPerformance(baseline_gbps=0.75, burst_gbps=10),
+    "c5d.large": NetworkPerformance(baseline_gbps=0.75, burst_gbps=10),
+    "c5n.large": NetworkPerformance(baseline_gbps=3, burst_gbps=25),
+    "r4.large": NetworkPerformance(baseline_gbps=0.75, burst_gbps=10),
+    "r5n.large": NetworkPerformance(baseline_gbps=2.1, burst_gbps=25),
+    "r5d.large": NetworkPerformance(baseline_gbps=0.75, burst_gbps=10),
+    "r5dn.large": NetworkPerformance(baseline_gbps=2.1, burst_gbps=25),
+    "r5ad.large": NetworkPerformance(baseline_gbps=0.75, burst_gbps=10),
+    "i3.large": NetworkPerformance(baseline_gbps=0.75, burst_gbps=10),
+    "i4i.large": NetworkPerformance(baseline_gbps=0.78, burst_gbps=10),
+    "m7i.large": NetworkPerformance(baseline_gbps=0.78, burst_gbps=12.5),
+    "m7i-flex.large": NetworkPerformance(baseline_gbps=0.39, burst_gbps=12.5),
+    "inf1.xlarge": NetworkPerformance(baseline_gbps=5, burst_gbps=25),
+    # EFA and/or ENA Express capable
+    "c5n.9xlarge": NetworkPerformance(baseline_gbps=50, burst_gbps=50, efa=True),
+    "c5n.18xlarge": NetworkPerformance(baseline_gbps=100, burst_gbps=100, efa=True),
+    "g4dn.8xlarge": NetworkPerformance(baseline_gbps=50, burst_gbps=50, efa=True),
+    "g4dn.12xlarge": NetworkPerformance(baseline_gbps=50, burst_gbps=50, efa=True),
+    "g5.8xlarge": NetworkPerformance(baseline_gbps=25, burst_gbps=25, efa=True),
+    "g5.12xlarge": NetworkPerformance(baseline_gbps=40, burst_gbps=40, efa=True),
+    "p3dn.24xlarge": NetworkPerformance(baseline_gbps=100, burst_gbps=100, efa=True),
+    "m6i.32xlarge": NetworkPerformance(baseline_gbps=50, burst_gbps=50, efa=True, ena_express=True),
+    "c6in.32xlarge": NetworkPerformance(baseline_gbps=200, burst_gbps=200, efa=True, ena_express=True),
+}
+
+def get_network_performance(instance_type: str) -> Optional[NetworkPerformance]:
+    """
+    The network performance of an instance type, or None if it isn't known.
+    """
+    return NETWORK_PERFORMANCE.get(instance_type)
+
+def expected_throughput(instance_type: str, cluster_placement: bool = True) -> Optional[Dict[str, float]]:
+    """
+    Expected inter-node throughput (Gbps) of an instance type: aggregate (sustained baseline) and per flow.
+
+    :param instance_type: The EC2 instance type.
+    :param cluster_placement: Whether the instances are in a cluster placement group.
+    """
+    performance = get_network_performance(instance_type)
+    if performance is None: return None
+    single_flow = SINGLE_FLOW_GBPS_CLUSTER if cluster_placement else SINGLE_FLOW_GBPS
+    if performance.ena_express and cluster_placement: single_flow = SINGLE_FLOW_GBPS_ENA_EXPRESS
+    if performance.efa and cluster_placement: single_flow = performance.baseline_gbps
+    return {
+        "aggregate_gbps": performance.baseline_gbps,
+        "burst_gbps": performance.burst_gbps,
+        "single_flow_gbps": min(single_flow, performance.baseline_gbps),
+        "efa": performance.efa,
+        "ena_express": performance.ena_express,
+    }
@@ -0,0 +1,204 @@
+"""
+Rolls the fleet program out to several regions at once with the Pulumi Automation API.
+
+Each region gets its own stack (`<template stack>-<region>`), configured from a template (the
+config of an existing stack and/or `key=value` overrides, where `{region}` is replaced by the
+region). Stacks are deployed in parallel on a bounded thread pool; a failing region doesn't
+stop the others, and every region reports its outputs, timing and error.
+
+### Example Usage
+
+```bash
+python -m src.rollout --regions eu-west-3 eu-west-1 us-east-1 --template-stack dev --max-workers 3
+python -m src.rollout --regions eu-west-3 eu-west-1 --action destroy
+
+# Local file backend (no Pulumi Cloud)
+python -m src.rollout --regions eu-west-3 --backend file://~/.pulumi-local --action preview
+```
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Literal, Mapping, Optional, Sequence
+
+from pulumi import automation as auto
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+Action = Literal["up", "preview", "destroy"]
+
+@dataclass
+class RegionResult:
+    """
+    The outcome of the rollout in one region.
+    """
+    region: str
+    stack: str
+    action: str
+    status: Literal["succeeded", "failed"] = "succeeded"
+    duration: float = 0.0
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    summary: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+
+def region_config(region: str, template: Mapping[str, auto.ConfigValue]) -> Dict[str, auto.ConfigValue]:
+    """
+    The config of the stack of a region: the template with `{region}` replaced, and `aws:region` set.
+
+    :param region: The AWS region, i.e: `eu-west-3`.
+    :param template: The config template.
+    """
+    config = {
+        key: auto.ConfigValue(value=str(value.value).replace("{region}", region), secret=value.secret)
+        for key, value in template.items()
+    }
+    config["aws:region"] = auto.ConfigValue(value=region)
+    return config
+
+def select_stack(
+        stack_name: str,
+        program: Optional[Callable[[], None]] = None,
+        project_name: Optional[str] = None,
+        env_vars: Optional[Mapping[str, str]] = None,
+    ) -> auto.Stack:
+    """
+    Create or select a stack, for the fleet program on disk, or for an inline `program` (i.e: in tests).
+    """
+    opts = auto.LocalWorkspaceOptions(env_vars=dict(env_vars or {}))
+    if program is not None:
+        return auto.create_or_select_stack(stack_name=stack_name, project_name=project_name or "aws-fleet-python", program=program, opts=opts)
+    return auto.create_or_select_stack(stack_name=stack_name, work_dir=PROJECT_DIR, opts=opts)
+
+def deploy_region(
+        region: str,
+        stack_name: str,
+        template: Mapping[str, auto.ConfigValue],
+        action: Action = "up",
+        environments: Sequence[str] = (),
+        program: Optional[Callable[[], None]] = None,
+        project_name: Optional[str] = None,
+        env_vars: Optional[Mapping[str, str]] = None,
+    ) -> RegionResult:
+    """
+    Configure and run `action` on the stack of one region. Never raises: errors are reported in the result.
+    """
+    result = RegionResult(region=region, stack=stack_name, action=action)
+    start = time.perf_counter()
+    try:
+        stack = select_stack(stack_name, program=program, project_name=project_name, env_vars=env_vars)
+        if environments: stack.add_environments(*environments)
+        stack.set_all_config(region_config(region, template))
+        if action == "up":
+            up = stack.up(on_output=lambda line: None)
+            result.outputs = { key: output.value for key, output in up.outputs.items() }
+            result.summary = dict(up.summary.resource_changes or {})
+        elif action == "preview":
+            preview = stack.preview(on_output=lambda line: None)
+            result.summary = { str(op): count for op, count in preview.change_summary.items() }
+        else:
+            destroy = stack.destroy(on_output=lambda line: None)
+            result.summary = dict(destroy.summary.resource_changes or {})
+    except Exception as e:
+        result.status = "failed"
+        result.error = str(e).strip().splitlines()[-1] if str(e).strip() else repr(e)
+    result.duration = time.perf_counter() - start
+    return result
+
+def rollout(
+        regions: Sequence[str],
+        template: Mapping[str, auto.ConfigValue],
+        stack_prefix: str = "dev",
+        action: Action = "up",
+        max_workers: int = 4,
+        environments: Sequence[str] = (),
+        program: Optional[Callable[[], None]] = None,
+        project_name: Optional[str] = None,
+        env_vars: Optional[Mapping[str, str]] = None,
+        on_result: Optional[Callable[[RegionResult], None]] = None,
+    ) -> List[RegionResult]:
+    """
+    Run `action` on the stacks of all regions, at most `max_workers` at a time.
+
+    :param regions: The AWS regions to roll out to.
+    :param template: The config template of the region stacks.
+    :param stack_prefix: The region stacks are named `<stack_prefix>-<region>`.
+    :param action: `up`, `preview` or `destroy`.
+    :param max_workers: The maximum number of stacks deployed at once.
+    :param environments: Pulumi ESC environments to add to the region stacks, i.e: `aws-jarvis`.
+    :param program: An inline program to deploy instead of the fleet program on disk.
+    :param project_name: The project name for the inline program.
+    :param env_vars: Environment variables for the Pulumi CLI, i.e: `PULUMI_BACKEND_URL`.
+    :param on_result: Called with each region result as soon as it's done.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [
+            executor.submit(deploy_region, region, f"{stack_prefix}-{region}", template, action, environments, program, project_name, env_vars)
+            for region in regions
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if on_result: on_result(result)
+            results.append(result)
+    order = { region: i for i, region in enumerate(regions) }
+    return sorted(results, key=lambda result: order[result.region])
+
+def load_template(template_stack: Optional[str], overrides: Sequence[str], env_vars: Optional[Mapping[str, str]] = None) -> Dict[str, auto.ConfigValue]:
+    """
+    Build the config template from an existing stack's config and `key=value` overrides.
+    """
+    template: Dict[str, auto.ConfigValue] = {}
+    if template_stack:
+        stack = select_stack(template_stack, env_vars=env_vars)
+        template.update({ key: value for key, value in stack.get_all_config().items() if key != "aws:region" })
+    for override in overrides:
+        key, value = override.split("=", 1)
+        template[key if ":" in key else f"aws-fleet-python:{key}"] = auto.ConfigValue(value=value)
+    return template
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Deploy the fleet to several regions in parallel.")
+    parser.add_argument("--regions", nargs="+", required=True, help="AWS regions to deploy to")
+    parser.add_argument("--action", choices=["up", "preview", "destroy"], default="up")
+    parser.add_argument("--template-stack", default="dev", help="Stack whose config is the template for the region stacks (empty for none)")
+    parser.add_argument("--stack-prefix", default=None, help="Region stacks are named <prefix>-<region> (default: the template stack)")
+    parser.add_argument("--config", nargs="*", default=[], help="Config overrides as key=value, '{region}' is replaced by the region")
+    parser.add_argument("--environment", nargs="*", default=[], help="Pulumi ESC environments for the region stacks, i.e: aws-jarvis (none by default)")
+    parser.add_argument("--max-workers", type=int, default=4, help="Maximum number of stacks deployed at once")
+    parser.add_argument("--backend", default=None, help="Pulumi backend URL, i.e: file://~/.pulumi-local")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    env_vars = { "PULUMI_BACKEND_URL": args.backend } if args.backend else {}
+    template = load_template(args.template_stack or None, args.config, env_vars)
+
+    def report(result: RegionResult):
+        if args.json: return
+        status = "✔" if result.status == "succeeded" else "✘"
+        print(f"{status} {result.region:<16}{result.stack:<32}{result.duration:>8.1f}s  {result.error or result.summary}")
+
+    start = time.perf_counter()
+    results = rollout(
+        args.regions,
+        template,
+        stack_prefix=args.stack_prefix or args.template_stack or "dev",
+        action=args.action,
+        max_workers=args.max_workers,
+        environments=args.environment,
+        env_vars=env_vars,
+        on_result=report,
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps({ "elapsed": elapsed, "results": [asdict(result) for result in results] }, indent=2, default=str))
+    else:
+        failed = [result.region for result in results if result.status == "failed"]
+        print(f"\n{len(results) - len(failed)}/{len(results)} regions {args.action} in {elapsed:.1f}s (sum of stacks: {sum(r.duration for r in results):.1f}s)")
+        if failed: print(f"Failed: {failed}")
+    return 1 if any(result.status == "failed" for result in results) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
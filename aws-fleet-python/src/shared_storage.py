@@ -0,0 +1,245 @@
+"""
+Contains a Pulumi ComponentResource for the shared dataset storage of the fleet.
+"""
+import math
+from typing import Literal, Mapping, Optional, Sequence, Tuple
+
+import pulumi
+import pulumi_aws as aws
+
+# FSx for Lustre (PERSISTENT_2): throughput tiers (MB/s per TiB) and storage capacity steps (GiB).
+LUSTRE_THROUGHPUT_TIERS = [125, 250, 500, 1000]
+LUSTRE_MIN_CAPACITY = 1200
+LUSTRE_CAPACITY_INCREMENT = 2400
+
+def size_lustre(dataset_size_gib: int, node_count: int, node_throughput: int) -> Tuple[int, int]:
+    """
+    Size an FSx for Lustre file system: the storage capacity (GiB) and the per-unit storage
+    throughput (MB/s/TiB) so that every node can read at `node_throughput` MB/s at once.
+
+    :param dataset_size_gib: The size of the dataset, in GiB (20% headroom is added).
+    :param node_count: The (max) number of nodes reading the dataset.
+    :param node_throughput: The read throughput wanted per node, in MB/s.
+    """
+    needed = dataset_size_gib * 1.2
+    capacity = LUSTRE_MIN_CAPACITY if needed <= LUSTRE_MIN_CAPACITY else math.ceil(needed / LUSTRE_CAPACITY_INCREMENT) * LUSTRE_CAPACITY_INCREMENT
+    aggregate = node_count * node_throughput
+    while True:
+        tier = next((tier for tier in LUSTRE_THROUGHPUT_TIERS if tier * capacity / 1024 >= aggregate), None)
+        if tier is not None: return capacity, tier
+        # Even the highest tier is too slow: throughput scales with capacity, so grow it
+        capacity = (capacity // LUSTRE_CAPACITY_INCREMENT + 1) * LUSTRE_CAPACITY_INCREMENT
+
+class SharedStorageArgs:
+    """
+    The arguments necessary to construct a `SharedStorage` resource.
+    """
+
+    def __init__(
+            self,
+            kind: Literal["fsx", "efs"],
+            vpc_id: pulumi.Input[str],
+            subnet_ids: pulumi.Input[Sequence[pulumi.Input[str]]],
+            subnet_count: int,
+            client_security_group_id: pulumi.Input[str],
+            dataset_size_gib: int = 100,
+            node_count: int = 1,
+            node_throughput: int = 250,
+            dataset_s3_uri: Optional[str] = None,
+            mount_point: str = "/mnt/dataset",
+            tags: Optional[Mapping[str, str]] = {},
+        ):
+        """
+        Constructs a SharedStorageArgs.
+
+        :param kind: `fsx` for FSx for Lustre (linked to `dataset_s3_uri`), or `efs` for EFS in elastic throughput mode.
+        :param vpc_id: The VPC of the fleet.
+        :param subnet_ids: The subnets of the fleet, FSx uses the first one, EFS gets a mount target in each.
+        :param subnet_count: The number of subnets (known ahead of `subnet_ids`).
+        :param client_security_group_id: The security group of the instances mounting the storage.
+        :param dataset_size_gib: The size of the dataset, in GiB.
+        :param node_count: The (max) number of nodes reading the dataset.
+        :param node_throughput: The read throughput wanted per node, in MB/s.
+        :param dataset_s3_uri: The s3 prefix of the dataset, i.e: `s3://bucket/datasets/ogbn-papers100M`.
+        :param mount_point: Where the instances mount the storage.
+        :param tags: Tags which are applied to all taggable resources.
+        """
+        self.kind = kind
+        self.vpc_id = vpc_id
+        self.subnet_ids = subnet_ids
+        self.subnet_count = subnet_count
+        self.client_security_group_id = client_security_group_id
+        self.dataset_size_gib = dataset_size_gib
+        self.node_count = node_count
+        self.node_throughput = node_throughput
+        self.dataset_s3_uri = dataset_s3_uri
+        self.mount_point = mount_point
+        self.tags = tags
+
+class SharedStorage(pulumi.ComponentResource):
+    """
+    Shared, high-throughput dataset storage for the fleet, so a dataset isn't copied onto every node:
+
+      - FSx for Lustre (PERSISTENT_2), linked to an s3 prefix (files are lazily loaded from s3 on first read),
+        with capacity and throughput sized from the dataset size and the node count
+      - Or EFS in elastic throughput mode, with a mount target in every subnet
+
+    `mount_script` is a bash function (`mount_shared_storage`) to add to the user data.
+
+    ### Example Usage
+
+    ```python
+    from src.shared_storage import SharedStorage, SharedStorageArgs
+
+    storage = SharedStorage("dataset", SharedStorageArgs(
+        kind="fsx",
+        vpc_id=vpc.vpc_id,
+        subnet_ids=vpc.public_subnet_ids,
+        subnet_count=len(azs.names),
+        client_security_group_id=security_group.id,
+        dataset_size_gib=500,
+        node_count=4,
+        dataset_s3_uri="s3://my-bucket/datasets/ogbn-papers100M",
+    ))
+    ```
+    """
+
+    def __init__(self,
+                 name: str,
+                 args: SharedStorageArgs,
+                 opts: pulumi.ResourceOptions = None):
+        """
+        Constructs a SharedStorage.
+
+        :param name: The Pulumi resource name. Child resource names are constructed based on this.
+        :param args: A SharedStorageArgs object containing the arguments for the storage.
+        :param opts: A pulumi.ResourceOptions object.
+        """
+        super().__init__(f"{pulumi.get_project()}:storage:SharedStorage", name, None, opts)
+
+        self.kind = args.kind
+        self.mount_point = args.mount_point
+        self.file_system = None
+        self.data_repository_association = None
+        self.storage_capacity = None
+        self.throughput = None
+
+        # Allow the fleet to reach the storage (Lustre: 988, 1018-1023, NFS: 2049)
+        ports = [(988, 988), (1018, 1023)] if args.kind == "fsx" else [(2049, 2049)]
+        security_group_name = f"{name}-security-group"
+        self.security_group = aws.ec2.SecurityGroup(
+            security_group_name,
+            vpc_id=args.vpc_id,
+            ingress=[
+                aws.ec2.SecurityGroupIngressArgs(
+                    from_port=from_port,
+                    to_port=to_port,
+                    protocol="tcp",
+                    security_groups=[args.client_security_group_id],
+                    self=True,
+                )
+                for from_port, to_port in ports
+            ],
+            egress=[
+                aws.ec2.SecurityGroupEgressArgs(
+                    from_port=0,
+                    to_port=0,
+                    protocol="-1",
+                    cidr_blocks=["0.0.0.0/0"],
+                )
+            ],
+            tags={ "Name": security_group_name, **args.tags },
+            opts=pulumi.ResourceOptions( parent=self ),
+        )
+
+        first_subnet_id = pulumi.Output.from_input(args.subnet_ids).apply(lambda ids: ids[0])
+
+        if args.kind == "fsx":
+            self.storage_capacity, self.throughput = size_lustre(args.dataset_size_gib, args.node_count, args.node_throughput)
+            self.file_system = aws.fsx.LustreFileSystem(
+                f"{name}-lustre",
+                deployment_type="PERSISTENT_2",
+                storage_type="SSD",
+                storage_capacity=self.storage_capacity,
+                per_unit_storage_throughput=self.throughput,
+                data_compression_type="LZ4",
+                file_system_type_version="2.15",
+                subnet_ids=[first_subnet_id],
+                security_group_ids=[self.security_group.id],
+                tags={ "Name": f"{name}-lustre", **args.tags },
+                opts=pulumi.ResourceOptions( parent=self ),
+            )
+
+            # Link the s3 dataset: metadata is imported, file contents are loaded lazily on first access
+            if args.dataset_s3_uri:
+                self.data_repository_association = aws.fsx.DataRepositoryAssociation(
+                    f"{name}-s3-link",
+                    file_system_id=self.file_system.id,
+                    file_system_path="/",
+                    data_repository_path=args.dataset_s3_uri,
+                    batch_import_meta_data_on_create=True,
+                    imported_file_chunk_size=1024,
+                    s3=aws.fsx.DataRepositoryAssociationS3Args(
+                        auto_import_policy=aws.fsx.DataRepositoryAssociationS3AutoImportPolicyArgs(
+                            events=["NEW", "CHANGED", "DELETED"],
+                        ),
+                    ),
+                    tags={ "Name": f"{name}-s3-link", **args.tags },
+                    opts=pulumi.ResourceOptions( parent=self.file_system ),
+                )
+
+            self.mount_script = pulumi.Output.all(self.file_system.dns_name, self.file_system.mount_name).apply(
+                lambda a: self._lustre_mount_script(a[0], a[1])
+            )
+        else:
+            self.throughput = "elastic"
+            self.file_system = aws.efs.FileSystem(
+                f"{name}-efs",
+                encrypted=True,
+                performance_mode="generalPurpose",
+                throughput_mode="elastic",
+                tags={ "Name": f"{name}-efs", **args.tags },
+                opts=pulumi.ResourceOptions( parent=self ),
+            )
+            self.mount_targets = [
+                aws.efs.MountTarget(
+                    f"{name}-efs-mount-target-{i}",
+                    file_system_id=self.file_system.id,
+                    subnet_id=pulumi.Output.from_input(args.subnet_ids).apply(lambda ids, i=i: ids[i]),
+                    security_groups=[self.security_group.id],
+                    opts=pulumi.ResourceOptions( parent=self.file_system ),
+                )
+                for i in range(args.subnet_count)
+            ]
+            # Only mount once the mount targets exist
+            self.mount_script = pulumi.Output.all(self.file_system.dns_name, *[mt.id for mt in self.mount_targets]).apply(
+                lambda a: self._efs_mount_script(a[0])
+            )
+
+        super().register_outputs({
+            "file_system_id": self.file_system.id,
+            "security_group_id": self.security_group.id,
+            "storage_capacity": self.storage_capacity,
+            "throughput": self.throughput,
+        })
+
+    def _lustre_mount_script(self, dns_name: str, mount_name: str) -> str:
+        return f'''
+mount_shared_storage() {{
+    sudo apt install -y "lustre-client-modules-$(uname -r)" || sudo apt install -y lustre-client-modules-aws
+    sudo mkdir -p {self.mount_point}
+    sudo mount -t lustre -o relatime,flock {dns_name}@tcp:/{mount_name} {self.mount_point}
+    df -h {self.mount_point}
+}}
+'''
+
+    def _efs_mount_script(self, dns_name: str) -> str:
+        return f'''
+mount_shared_storage() {{
+    command -v mount.nfs4 &> /dev/null || sudo apt install -y nfs-common
+    sudo mkdir -p {self.mount_point}
+    # Several TCP connections (nconnect) and 1 MiB reads/writes for throughput
+    sudo mount -t nfs4 -o nfsvers=4.1,nconnect=16,rsize=1048576,wsize=1048576,hard,timeo=600,retrans=2,noresvport {dns_name}:/ {self.mount_point}
+    df -h {self.mount_point}
+}}
+'''
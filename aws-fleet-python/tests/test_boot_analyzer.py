@@ -0,0 +1,83 @@
+"""
+Tests of the boot phase log aggregation.
+"""
+import math
+
+import pytest
+
+from src.boot_analyzer import TOTAL_PHASE, add_total_phase, load_phases, percentile, summarize
+
+def phase(instance_id, name, start, end, instance_type="g5.xlarge", exit_code=0):
+    return {
+        "instance_id": instance_id,
+        "instance_type": instance_type,
+        "availability_zone": "us-east-1a",
+        "ami_id": "ami-0123",
+        "phase": name,
+        "start": start,
+        "end": end,
+        "duration": end - start,
+        "exit_code": exit_code,
+    }
+
+@pytest.mark.parametrize("values, q, expected", [
+    ([3.0], 50, 3.0),
+    ([1.0, 2.0, 3.0, 4.0], 0, 1.0),
+    ([1.0, 2.0, 3.0, 4.0], 100, 4.0),
+    ([4.0, 1.0, 3.0, 2.0], 50, 2.5),
+    ([1.0, 2.0, 3.0, 4.0, 5.0], 95, 4.8),
+    ([10.0, 20.0], 25, 12.5),
+])
+def test_percentile(values, q, expected):
+    assert percentile(values, q) == pytest.approx(expected)
+
+def test_percentile_of_no_values():
+    assert math.isnan(percentile([], 50))
+
+def test_add_total_phase():
+    records = [
+        phase("i-1", "kernel", 0.0, 12.0),
+        phase("i-1", "imds", 12.0, 13.0),
+        phase("i-1", "instance_store", 13.0, 20.0, exit_code=1),
+        phase("i-2", "imds", 5.0, 6.5),
+    ]
+    totals = {record["instance_id"]: record for record in add_total_phase(records) if record["phase"] == TOTAL_PHASE}
+
+    # The kernel phase is left out of the total
+    assert totals["i-1"]["start"] == 12.0
+    assert totals["i-1"]["end"] == 20.0
+    assert totals["i-1"]["duration"] == 8.0
+    assert totals["i-1"]["exit_code"] == 1
+    assert totals["i-1"]["instance_type"] == "g5.xlarge"
+    assert totals["i-2"]["duration"] == 1.5
+    assert totals["i-2"]["exit_code"] == 0
+
+def test_add_total_phase_keeps_the_records():
+    records = [phase("i-1", "imds", 0.0, 1.0)]
+    assert add_total_phase(records)[:1] == records
+
+def test_summarize():
+    records = [
+        phase("i-1", "imds", 0.0, 1.0),
+        phase("i-2", "imds", 0.0, 3.0, exit_code=2),
+        phase("i-3", "imds", 0.0, 2.0, instance_type="p4d.24xlarge"),
+    ]
+    summary = summarize(records)
+    assert summary == {"all": {"imds": {"count": 3, "failures": 1, "p50": 2.0, "p95": pytest.approx(2.9), "max": 3.0}}}
+
+def test_summarize_by_field():
+    records = [
+        phase("i-1", "imds", 0.0, 1.0),
+        phase("i-2", "imds", 0.0, 3.0),
+        phase("i-3", "imds", 0.0, 2.0, instance_type="p4d.24xlarge"),
+    ]
+    summary = summarize(records, by="instance_type")
+    assert sorted(summary) == ["g5.xlarge", "p4d.24xlarge"]
+    assert summary["g5.xlarge"]["imds"]["count"] == 2
+    assert summary["g5.xlarge"]["imds"]["p50"] == 2.0
+    assert summary["p4d.24xlarge"]["imds"]["max"] == 2.0
+
+def test_load_phases_skips_malformed_lines(tmp_path):
+    log = tmp_path / "boot-phases.jsonl"
+    log.write_text('{"phase": "imds", "duration": 1.0}\n\nnot json\n{"phase": "kernel"}\n')
+    assert load_phases([str(log)]) == [{"phase": "imds", "duration": 1.0}]
@@ -0,0 +1,95 @@
+"""
+Runs the fleet program (`__main__.py`) against Pulumi mocks, so no cloud calls are made.
+
+    pip install -r requirements.txt pytest
+    python -m pytest tests
+"""
+import os
+import runpy
+
+import pytest
+
+pulumi = pytest.importorskip("pulumi")
+pytest.importorskip("pulumi_aws")
+pytest.importorskip("pulumi_awsx")
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AZS = ["us-east-1a", "us-east-1b", "us-east-1c"]
+
+class FleetMocks(pulumi.runtime.Mocks):
+    """
+    Records the registered resources, and answers the data source invokes of the program.
+    """
+
+    def __init__(self):
+        self.resources = {}
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        # Component outputs are typed (i.e: the awsx Vpc `natGateways` are resources), only return the ones the program reads
+        if args.typ == "awsx:ec2:Vpc":
+            outputs = { "vpcId": "vpc-0123", "publicSubnetIds": [f"subnet-public-{az}" for az in AZS], "privateSubnetIds": [f"subnet-private-{az}" for az in AZS] }
+        else:
+            outputs = dict(args.inputs)
+        self.resources[args.name] = (args.typ, args.inputs)
+        return f"{args.name}-id", outputs
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        if args.token == "aws:index/getRegion:getRegion":
+            return { "name": "us-east-1", "id": "us-east-1" }
+        if args.token == "aws:ec2/getAmi:getAmi":
+            return { "id": "ami-0123", "name": "AWS Deep Learning AMI GPU CUDA" }
+        if args.token == "aws:index/getAvailabilityZones:getAvailabilityZones":
+            return { "id": "us-east-1", "names": AZS, "zoneIds": [f"use1-az{i}" for i in range(len(AZS))] }
+        return {}
+
+@pytest.fixture
+def mocks(monkeypatch):
+    # The program reads `user_data.sh` relative to the project directory
+    monkeypatch.chdir(PROJECT_DIR)
+    mocks = FleetMocks()
+    pulumi.runtime.set_mocks(mocks, project="aws-fleet-python", stack="test", preview=False)
+    yield mocks
+    pulumi.runtime.set_all_config({})
+
+def run_program(config):
+    pulumi.runtime.set_all_config({ f"aws-fleet-python:{key}": value for key, value in config.items() })
+    return runpy.run_path(os.path.join(PROJECT_DIR, "__main__.py"), run_name="__main__")
+
+@pulumi.runtime.test
+def test_training_mode(mocks):
+    program = run_program({ "trainingMode": "true" })
+
+    def check(_):
+        typ, inputs = mocks.resources["aws-graphstorm-launch-template"]
+        assert typ == "aws:ec2/launchTemplate:LaunchTemplate"
+        network_interface = inputs["networkInterfaces"][0]
+        assert network_interface["securityGroups"] == ["aws-graphstorm-security-group-id", "aws-graphstorm-efa-security-group-id"]
+        assert "vpcSecurityGroupIds" not in inputs
+        assert mocks.resources["aws-graphstorm-cluster-placement-group"][1]["strategy"] == "cluster"
+        assert mocks.resources["aws-graphstorm-auto-scaling-group"][1]["placementGroup"] == "aws-graphstorm-cluster-placement-group-id"
+
+    return pulumi.Output.all(program["launch_template"].id, program["auto_scaling_group"].id).apply(check)
+
+@pulumi.runtime.test
+def test_default_mode(mocks):
+    program = run_program({})
+
+    def check(_):
+        _, inputs = mocks.resources["aws-graphstorm-launch-template"]
+        assert inputs["vpcSecurityGroupIds"] == ["aws-graphstorm-security-group-id"]
+        assert "aws-graphstorm-efa-security-group" not in mocks.resources
+
+    return program["launch_template"].id.apply(check)
+
+@pytest.mark.parametrize("config, prewarm", [
+    ({}, True),
+    ({ "rootSnapshotId": "" }, False),
+    ({ "fastSnapshotRestore": "true" }, False),
+    ({ "fastSnapshotRestore": "true", "fastSnapshotRestoreAzs": '["us-east-1a"]' }, True),
+    ({ "prewarmRootVolume": "false" }, False),
+])
+@pulumi.runtime.test
+def test_prewarm_root_volume(mocks, config, prewarm):
+    program = run_program(config)
+    assert program["prewarm_root_volume"] is prewarm
+    return program["launch_template"].id
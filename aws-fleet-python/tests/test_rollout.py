@@ -0,0 +1,114 @@
+"""
+Tests of the multi-region rollout, with the stacks of the Automation API replaced by fakes.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pulumi")
+
+from pulumi import automation as auto
+from src import rollout
+
+class FakeStack:
+    """
+    A stack recording its config, environments and action, failing the action when `error` is set.
+    """
+
+    def __init__(self, name: str, error: str = None):
+        self.name = name
+        self.error = error
+        self.environments = []
+        self.config = {}
+        self.actions = []
+
+    def add_environments(self, *environments):
+        self.environments.extend(environments)
+
+    def set_all_config(self, config):
+        self.config = config
+
+    def _run(self, action):
+        self.actions.append(action)
+        # Shaped like the message of an `auto.CommandError`
+        if self.error: raise RuntimeError(f"code: 255\nstdout: \nstderr: error: {self.error}")
+
+    def up(self, on_output=None):
+        self._run("up")
+        return SimpleNamespace(outputs={ "region": auto.OutputValue(value=self.config["aws:region"].value, secret=False) }, summary=SimpleNamespace(resource_changes={ "create": 12 }))
+
+    def preview(self, on_output=None):
+        self._run("preview")
+        return SimpleNamespace(change_summary={ "same": 12 })
+
+    def destroy(self, on_output=None):
+        self._run("destroy")
+        return SimpleNamespace(summary=SimpleNamespace(resource_changes={ "delete": 12 }))
+
+@pytest.fixture
+def stacks(monkeypatch):
+    """
+    The fake stacks by name, the stacks named in `stacks.failing` raise on their action.
+    """
+    stacks = {}
+    failing = {}
+
+    def select_stack(stack_name, program=None, project_name=None, env_vars=None):
+        return stacks.setdefault(stack_name, FakeStack(stack_name, failing.get(stack_name)))
+
+    monkeypatch.setattr(rollout, "select_stack", select_stack)
+    return SimpleNamespace(by_name=stacks, failing=failing)
+
+TEMPLATE = {
+    "aws-fleet-python:keypair": auto.ConfigValue(value="jarvis-{region}"),
+    "aws-fleet-python:spotMaxPrice": auto.ConfigValue(value="0.04", secret=True),
+}
+
+def test_stack_naming_and_region_config(stacks):
+    results = rollout.rollout(["eu-west-3", "us-east-1"], TEMPLATE, stack_prefix="staging")
+
+    assert [result.stack for result in results] == ["staging-eu-west-3", "staging-us-east-1"]
+    assert sorted(stacks.by_name) == ["staging-eu-west-3", "staging-us-east-1"]
+    config = stacks.by_name["staging-us-east-1"].config
+    assert config["aws:region"].value == "us-east-1"
+    assert config["aws-fleet-python:keypair"].value == "jarvis-us-east-1"
+    assert config["aws-fleet-python:spotMaxPrice"].secret
+
+@pytest.mark.parametrize("action, summary", [
+    ("up", { "create": 12 }),
+    ("preview", { "same": 12 }),
+    ("destroy", { "delete": 12 }),
+])
+def test_action_dispatch(stacks, action, summary):
+    [result] = rollout.rollout(["eu-west-1"], TEMPLATE, action=action)
+
+    assert stacks.by_name["dev-eu-west-1"].actions == [action]
+    assert result.status == "succeeded"
+    assert result.action == action
+    assert result.summary == summary
+    assert result.outputs == ({ "region": "eu-west-1" } if action == "up" else {})
+
+def test_errors_are_aggregated_per_region(stacks):
+    stacks.failing["dev-eu-west-1"] = "InsufficientInstanceCapacity"
+    reported = []
+
+    results = rollout.rollout(["eu-west-3", "eu-west-1", "us-east-1"], TEMPLATE, max_workers=3, on_result=reported.append)
+
+    # Every region is reported, in the order given, and a failing region doesn't stop the others
+    assert [result.region for result in results] == ["eu-west-3", "eu-west-1", "us-east-1"]
+    assert sorted(result.region for result in reported) == ["eu-west-1", "eu-west-3", "us-east-1"]
+    assert [result.status for result in results] == ["succeeded", "failed", "succeeded"]
+    assert results[1].error == "stderr: error: InsufficientInstanceCapacity"
+    assert results[1].outputs == {}
+
+def test_main_exit_code(stacks, capsys):
+    assert rollout.main(["--regions", "eu-west-3", "--template-stack", "", "--json"]) == 0
+    stacks.failing["dev-us-east-1"] = "boom"
+    assert rollout.main(["--regions", "eu-west-3", "us-east-1", "--template-stack", "", "--json"]) == 1
+
+def test_environments_are_opt_in(stacks, capsys):
+    rollout.main(["--regions", "eu-west-3", "--template-stack", "", "--json"])
+    assert stacks.by_name["dev-eu-west-3"].environments == []
+
+    rollout.main(["--regions", "us-east-1", "--template-stack", "", "--environment", "aws-jarvis", "--json"])
+    assert stacks.by_name["dev-us-east-1"].environments == ["aws-jarvis"]
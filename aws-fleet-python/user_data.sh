@@ -1,15 +1,48 @@
 #!/bin/bash
+{{ boot_agent }}
+{{ setup_instance_store }}
+{{ mount_shared_storage }}
 
 home_dir="/home/ubuntu"
 output_file="$home_dir/output.log"
 
-AMI_ID=$(curl http://169.254.169.254/latest/meta-data/ami-id)
-INSTANCE_ID=$(curl http://169.254.169.254/latest/meta-data/instance-id)
-HOSTNAME=$(curl http://169.254.169.254/latest/meta-data/hostname)
-AWS_REGION=$(curl http://169.254.169.254/latest/meta-data/placement/region)
-INSTANCE_TYPE=$(curl http://169.254.169.254/latest/meta-data/instance-type)
-PUBLIC_IP=$(curl http://169.254.169.254/latest/meta-data/public-ipv4)
-ACCOUNT_ID=$(curl http://169.254.169.254/latest/meta-data/identity-credentials/ec2/info | jq -r .AccountId)
+# AMI_ID, INSTANCE_ID, INSTANCE_TYPE, AVAILABILITY_ZONE, ... and the `log`/`run` helpers come from the boot agent preamble (see `src/boot_agent.py`)
+# This is a template, rendered by `src/user_data.py`
+
+# Set by the pulumi program: pre-warm the root volume in AZs where Fast Snapshot Restore isn't enabled
+PREWARM_ROOT_VOLUME="{{ prewarm_root_volume }}"
+FSR_AZS="{{ fsr_azs }}"
+PREWARM_JOBS="${PREWARM_JOBS:-8}"
+
+prewarm_root_volume() {
+    if [[ "$PREWARM_ROOT_VOLUME" != "true" ]]; then
+        echo "Root volume pre-warm is disabled"
+        return 0
+    fi
+    if [[ " $FSR_AZS " == *" $AVAILABILITY_ZONE "* ]]; then
+        echo "Fast Snapshot Restore is enabled in '$AVAILABILITY_ZONE', skipping pre-warm"
+        return 0
+    fi
+
+    local root_device size chunk
+    root_device="/dev/$(lsblk -no pkname "$(findmnt -no SOURCE /)")"
+    size=$(sudo blockdev --getsize64 "$root_device")
+    chunk=$(( (size + PREWARM_JOBS - 1) / PREWARM_JOBS ))
+
+    # Read every block once (in parallel) so that it is fetched from S3 now, not on first use.
+    # Runs in the background, the rest of the setup doesn't wait for it.
+    if command -v fio &> /dev/null || sudo apt install -y fio &> /dev/null; then
+        sudo nohup fio --filename="$root_device" --rw=read --bs=1M --iodepth=32 --ioengine=libaio --direct=1 \
+            --numjobs="$PREWARM_JOBS" --size="$chunk" --offset_increment="$chunk" --group_reporting \
+            --name=volume-initialize &>> "$home_dir/prewarm.log" &
+    else
+        for (( i=0; i<PREWARM_JOBS; i++ )); do
+            sudo nohup dd if="$root_device" of=/dev/null bs=1M iflag=direct \
+                skip=$(( i * chunk / 1048576 )) count=$(( chunk / 1048576 + 1 )) &>> "$home_dir/prewarm.log" &
+        done
+    fi
+    echo "Pre-warming '$root_device' ($size bytes) with $PREWARM_JOBS parallel readers in '$AVAILABILITY_ZONE'"
+}
 
 setup_instance() {
     local WEB_PAGE="""
@@ -171,23 +204,18 @@ failure_notify() {
     send_to_ntfy "$json_data"
 }
 
-log() {
-    echo "[ log ] $1" | tee -a "$output_file"
-}
-
-run() {
-    start=$(date +%s.%N);
-    # shellcheck disable=SC2048
-    $* | tee -a "$output_file"
-    exit_code=$?
-    end=$(date +%s.%N);
-    _time_diff=$(echo "$end - $start" | bc);
-    echo "[ run ] $* took $_time_diff secs with exit code $exit_code" | tee -a "$output_file"
-    return $exit_code
-}
-
 main() {
     start_time=$(date +%s.%N);
+    log "prewarm_root_volume()";
+    run prewarm_root_volume;
+    if declare -F setup_instance_store > /dev/null; then
+        log "setup_instance_store()";
+        run setup_instance_store;
+    fi
+    if declare -F mount_shared_storage > /dev/null; then
+        log "mount_shared_storage()";
+        run mount_shared_storage;
+    fi
     log "start_notify()";
     run start_notify;
     log "setup_instance()";
@@ -0,0 +1,45 @@
+import pulumi
+import pulumi_aws as aws
+from src.vpc import INTERFACE_ENDPOINTS, Vpcx, VpcxArgs
+
+# Get some configuration values or set default values.
+aws_region = aws.get_region().name
+project_name = "aws-network"
+config = pulumi.Config()
+vpc_network_cidr = config.get("vpcNetworkCidr") if config.get("vpcNetworkCidr") is not None else "10.0.0.0/16"
+sg_ingress_ports = config.get_object("sgIngressPorts") if config.get_object("sgIngressPorts") is not None else [22, 80, 443]
+s3_endpoint = config.get_bool("s3Endpoint") if config.get_bool("s3Endpoint") is not None else True
+dynamodb_endpoint = config.get_bool("dynamodbEndpoint") if config.get_bool("dynamodbEndpoint") is not None else True
+interface_endpoints = config.get_object("interfaceEndpoints") if config.get_object("interfaceEndpoints") is not None else [] # i.e: ["ecr.api", "ecr.dkr", "sagemaker.runtime", "sts", "logs"]
+interface_endpoints = INTERFACE_ENDPOINTS if interface_endpoints is True else interface_endpoints
+
+# Get all availability zones
+azs = aws.get_availability_zones(state="available").names
+
+# Create the shared VPC (public and private subnets in every AZ) and security group, once per region.
+# Workload programs read the outputs with a StackReference (`networkStack` config) instead of creating their own.
+vpc = Vpcx(
+    project_name,
+    VpcxArgs(
+        vpc_cidr_block=vpc_network_cidr,
+        azs=azs,
+        aws_region=aws_region,
+        sg_ingress_ports=sg_ingress_ports,
+        tags={
+            "Project": project_name,
+            "Environment": pulumi.get_stack(),
+        },
+        create_s3_endpoint=s3_endpoint,
+        create_dynamodb_endpoint=dynamodb_endpoint,
+        interface_endpoints=interface_endpoints,
+    ),
+)
+
+# Export the network, these outputs are the contract with the workload programs.
+pulumi.export("aws_region", aws_region)
+pulumi.export("azs", azs)
+pulumi.export("vpc_id", vpc.vpc.vpc_id)
+pulumi.export("public_subnet_ids", vpc.vpc.public_subnet_ids)
+pulumi.export("private_subnet_ids", vpc.vpc.private_subnet_ids)
+pulumi.export("security_group_id", vpc.security_group.id)
+pulumi.export("vpc_endpoint_ids", {service: endpoint.id for service, endpoint in {**vpc.gateway_endpoints, **vpc.interface_endpoints}.items()})
@@ -0,0 +1,226 @@
+"""
+Contains a Pulumi ComponentResource for creating an AWS VPC with awsx.
+"""
+from typing import Mapping, Sequence, Optional
+
+import pulumi
+import pulumi_aws as aws
+import pulumi_awsx as awsx
+
+# Interface endpoints to pull container images (ECR), invoke SageMaker endpoints, assume roles (STS)
+# and ship logs (CloudWatch Logs) from private subnets. ECR image layers come from S3, over the gateway endpoint.
+INTERFACE_ENDPOINTS = ["ecr.api", "ecr.dkr", "sagemaker.runtime", "sts", "logs"]
+
+class VpcxArgs:
+    """
+    The arguments necessary to construct a `Vpcx` resource.
+    """
+
+    def __init__(
+            self,
+            vpc_cidr_block: str | None = "10.0.0.0/16",
+            azs: pulumi.Input[Sequence[pulumi.Input[str]]] | pulumi.Input[str]  = aws.get_availability_zones(state="available").names,
+            aws_region: pulumi.Input[str] = aws.get_region().name,
+            sg_ingress_ports: Optional[pulumi.Input[Sequence[pulumi.Input[int]]]] = [22, 80, 443],
+            tags: Optional[pulumi.Input[Mapping[str, pulumi.Input[str]]]] = {},
+            create_s3_endpoint: bool = True,
+            create_dynamodb_endpoint: bool = True,
+            interface_endpoints: Optional[Sequence[str]] = [],
+        ):
+        """
+        Constructs a VpcxArgs.
+
+        :param vpc_cidr_block: The CIDR block representing the address space of the entire VPC.
+        :param azs: A list of availability zone names in which to create subnets.
+        :param aws_region: The name of a AWS Region for the VPC.
+        :param sg_ingress_ports: Ingress ports for Security groups.
+        :param tags: Tags which are applied to all taggable resources.
+        :param create_s3_endpoint: Whether or not to create a gateway VPC endpoint and routes for S3 access.
+        :param create_dynamodb_endpoint: Whether or not to create a gateway VPC endpoint and routes for DynamoDB access.
+        :param interface_endpoints: Services to reach over interface VPC endpoints with private DNS, i.e: `INTERFACE_ENDPOINTS`.
+        """
+        self.vpc_cidr_block = vpc_cidr_block
+        self.azs = [azs] if isinstance(azs, str) else azs
+        self.aws_region = aws_region
+        self.sg_ingress_ports = sg_ingress_ports
+        self.tags = tags
+        self.create_s3_endpoint = create_s3_endpoint
+        self.create_dynamodb_endpoint = create_dynamodb_endpoint
+        self.interface_endpoints = interface_endpoints
+
+class Vpcx(pulumi.ComponentResource):
+    """
+    Creates a AWS VPC using Pulumi. The VPC consists of:
+
+      - DHCP options for the given private hosted zone name
+      - An Internet gateway
+      - Subnets of appropriate sizes for public and private subnets, for each availability zone specified
+      - A route table routing traffic from public subnets to the internet gateway
+      - No NAT gateways: AWS services are reached over VPC endpoints instead
+      - Optionally, S3 and DynamoDB gateway endpoints on every route table
+      - Optionally, interface endpoints with private DNS (i.e: ECR, SageMaker runtime, STS, CloudWatch Logs) in the private subnets
+
+    ### Example Usage
+
+    ```python
+    from vpc import INTERFACE_ENDPOINTS, Vpcx, VpcxArgs
+    import pulumi
+    import pulumi_aws as aws
+
+    zones = aws.get_availability_zones(state="available")
+
+    net = Vpcx("example-vpc", VpcxArgs(
+        vpc_cidr_block="192.168.0.0/16",
+        azs=zones.names,
+        aws_region=aws.get_region().name,
+        sg_ingress_ports=[22, 80, 443],
+        tags={
+            "Project": "Python Example VPC",
+        },
+        create_s3_endpoint=True,
+        create_dynamodb_endpoint=True,
+        interface_endpoints=INTERFACE_ENDPOINTS,
+    ))
+
+    pulumi.export("vpc_id", net.vpc.id)
+    pulumi.export("vpc_private_subnet_ids", net.vpc.private_subnet_ids)
+    pulumi.export("vpc_public_subnet_ids", net.vpc.public_subnet_ids)
+    pulumi.export("vpc_security_group_id", net.security_group.id)
+    ```
+
+    """
+
+    def __init__(self,
+                 name: str,
+                 args: VpcxArgs,
+                 opts: pulumi.ResourceOptions = None):
+        """
+        Constructs a Vpc.
+
+        :param name: The Pulumi resource name. Child resource names are constructed based on this.
+        :param args: A VpcArgs object containing the arguments for VPC constructin.
+        :param opts: A pulumi.ResourceOptions object.
+        """
+        project_name = name if name else pulumi.get_project()
+        super().__init__(f"{project_name}:VPCx", name, None, opts)
+
+        # Make base info available to other methods
+        self.name = name
+        self.base_tags = args.tags
+
+        # Create a vpc https://www.pulumi.com/docs/clouds/aws/guides/vpc/
+        vpc_name = f"{project_name}-vpc"
+        self.vpc = awsx.ec2.Vpc(
+            vpc_name, 
+            awsx.ec2.VpcArgs(
+                cidr_block=args.vpc_cidr_block,
+                number_of_availability_zones=len(args.azs),
+                subnet_specs=[
+                    awsx.ec2.SubnetSpecArgs(
+                        type=awsx.ec2.SubnetType.PUBLIC,
+                    ),
+                    awsx.ec2.SubnetSpecArgs(
+                        type=awsx.ec2.SubnetType.PRIVATE,
+                    ),
+                ],
+                nat_gateways=awsx.ec2.NatGatewayConfigurationArgs(
+                    strategy=awsx.ec2.NatGatewayStrategy.NONE,
+                ),
+                subnet_strategy=awsx.ec2.SubnetAllocationStrategy.AUTO,
+                # Required by the private DNS names of the interface endpoints
+                enable_dns_hostnames=True,
+                enable_dns_support=True,
+                tags={ "Name": vpc_name, **args.tags },
+            ),
+            opts=pulumi.ResourceOptions( parent=self ),
+        )
+
+        ingress_sg = [
+            aws.ec2.SecurityGroupIngressArgs(
+                from_port=port,
+                to_port=port,
+                protocol="tcp",
+                cidr_blocks=["0.0.0.0/0"],
+            )
+            for i, port in enumerate(args.sg_ingress_ports)
+        ]
+
+        egress_sg = [
+            aws.ec2.SecurityGroupEgressArgs(
+                from_port=0,
+                to_port=0,
+                protocol="-1",
+                cidr_blocks=["0.0.0.0/0"],
+            )
+        ]
+
+        # Create a security group allowing inbound access over "sg_ingress_ports" and outbound access to anywhere.
+        security_group_name = f"{project_name}-security-group"
+        self.security_group = aws.ec2.SecurityGroup(
+            security_group_name,
+            vpc_id=self.vpc.vpc_id,
+            ingress=ingress_sg,
+            egress=egress_sg,
+            tags={ "Name": security_group_name, **args.tags },
+            opts=pulumi.ResourceOptions( parent=self ),
+        )
+
+        # Keep the S3 and DynamoDB traffic (i.e: datasets, model weights, ECR layers) on the AWS network, with no NAT
+        # throughput cap or data processing charge. Gateway endpoints are free, and routed from every route table.
+        self.gateway_endpoints: dict[str, aws.ec2.VpcEndpoint] = dict()
+        route_table_ids = self.vpc.route_tables.apply(lambda route_tables: pulumi.Output.all(*[rt.id for rt in route_tables]))
+        for service, enabled in (("s3", args.create_s3_endpoint), ("dynamodb", args.create_dynamodb_endpoint)):
+            if not enabled:
+                continue
+            self.gateway_endpoints[service] = aws.ec2.VpcEndpoint(
+                f"{name}-{service}-endpoint",
+                vpc_id=self.vpc.vpc_id,
+                service_name=pulumi.Output.concat("com.amazonaws.", args.aws_region, f".{service}"),
+                vpc_endpoint_type="Gateway",
+                route_table_ids=route_table_ids,
+                tags={ "Name": f"{project_name}-{service}-endpoint", **args.tags },
+                opts=pulumi.ResourceOptions( parent=self ),
+            )
+
+        # Reach the other AWS APIs from the private subnets over interface endpoints (one network interface per AZ).
+        # Private DNS resolves the public service names (i.e: api.ecr.<region>.amazonaws.com) to them, so SDKs need no change.
+        self.interface_endpoints: dict[str, aws.ec2.VpcEndpoint] = dict()
+        self.endpoint_security_group = None
+        if args.interface_endpoints:
+            endpoint_security_group_name = f"{project_name}-endpoints-security-group"
+            self.endpoint_security_group = aws.ec2.SecurityGroup(
+                endpoint_security_group_name,
+                vpc_id=self.vpc.vpc_id,
+                ingress=[
+                    aws.ec2.SecurityGroupIngressArgs(
+                        from_port=443,
+                        to_port=443,
+                        protocol="tcp",
+                        cidr_blocks=[args.vpc_cidr_block],
+                    ),
+                ],
+                egress=egress_sg,
+                tags={ "Name": endpoint_security_group_name, **args.tags },
+                opts=pulumi.ResourceOptions( parent=self ),
+            )
+
+            for service in args.interface_endpoints:
+                self.interface_endpoints[service] = aws.ec2.VpcEndpoint(
+                    f"{name}-{service.replace('.', '-')}-endpoint",
+                    vpc_id=self.vpc.vpc_id,
+                    service_name=pulumi.Output.concat("com.amazonaws.", args.aws_region, f".{service}"),
+                    vpc_endpoint_type="Interface",
+                    private_dns_enabled=True,
+                    subnet_ids=self.vpc.private_subnet_ids,
+                    security_group_ids=[self.endpoint_security_group.id],
+                    tags={ "Name": f"{project_name}-{service.replace('.', '-')}-endpoint", **args.tags },
+                    opts=pulumi.ResourceOptions( parent=self ),
+                )
+
+        super().register_outputs({
+            "vpc_id": self.vpc.vpc_id,
+            "security_group_id": self.security_group.id,
+            "public_subnet_ids": self.vpc.public_subnet_ids,
+            "private_subnet_ids": self.vpc.private_subnet_ids,
+            "vpc_endpoint_ids": { service: endpoint.id for service, endpoint in {**self.gateway_endpoints, **self.interface_endpoints}.items() },
+        })
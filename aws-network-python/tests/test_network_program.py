@@ -0,0 +1,83 @@
+"""
+Runs the network program (`__main__.py`) against Pulumi mocks, so no cloud calls are made.
+
+    pip install -r requirements.txt pytest
+    python -m pytest tests
+"""
+import os
+import runpy
+
+import pytest
+
+pulumi = pytest.importorskip("pulumi")
+pytest.importorskip("pulumi_aws")
+pytest.importorskip("pulumi_awsx")
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AZS = ["eu-west-3a", "eu-west-3b", "eu-west-3c"]
+
+class NetworkMocks(pulumi.runtime.Mocks):
+    """
+    Records the registered resources, and answers the data source invokes of the program.
+    """
+
+    def __init__(self):
+        self.resources = {}
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        # Component outputs are typed (i.e: the awsx Vpc `natGateways` are resources), only return the ones the program reads
+        if args.typ == "awsx:ec2:Vpc":
+            outputs = { "vpcId": "vpc-0123", "publicSubnetIds": [f"subnet-public-{az}" for az in AZS], "privateSubnetIds": [f"subnet-private-{az}" for az in AZS], "routeTables": [] }
+        else:
+            outputs = dict(args.inputs)
+        self.resources[args.name] = (args.typ, args.inputs)
+        return f"{args.name}-id", outputs
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        if args.token == "aws:index/getRegion:getRegion":
+            return { "name": "eu-west-3", "id": "eu-west-3" }
+        if args.token == "aws:index/getAvailabilityZones:getAvailabilityZones":
+            return { "id": "eu-west-3", "names": AZS, "zoneIds": [f"euw3-az{i + 1}" for i in range(len(AZS))] }
+        return {}
+
+@pytest.fixture
+def mocks():
+    mocks = NetworkMocks()
+    pulumi.runtime.set_mocks(mocks, project="aws-network-python", stack="test", preview=False)
+    yield mocks
+    pulumi.runtime.set_all_config({})
+
+def run_program(config):
+    pulumi.runtime.set_all_config({ f"aws-network-python:{key}": value for key, value in config.items() })
+    return runpy.run_path(os.path.join(PROJECT_DIR, "__main__.py"), run_name="__main__")
+
+@pulumi.runtime.test
+def test_network(mocks):
+    program = run_program({})
+
+    def check(_):
+        typ, inputs = mocks.resources["aws-network-vpc"]
+        assert typ == "awsx:ec2:Vpc"
+        assert inputs["numberOfAvailabilityZones"] == len(AZS)
+        assert [rule["fromPort"] for rule in mocks.resources["aws-network-security-group"][1]["ingress"]] == [22, 80, 443]
+        assert mocks.resources["aws-network-s3-endpoint"][1]["serviceName"] == "com.amazonaws.eu-west-3.s3"
+        assert mocks.resources["aws-network-dynamodb-endpoint"][1]["vpcEndpointType"] == "Gateway"
+        assert "aws-network-endpoints-security-group" not in mocks.resources
+
+    vpc = program["vpc"]
+    return pulumi.Output.all(vpc.security_group.id, *[endpoint.id for endpoint in vpc.gateway_endpoints.values()]).apply(check)
+
+@pulumi.runtime.test
+def test_interface_endpoints(mocks):
+    program = run_program({ "interfaceEndpoints": "true", "dynamodbEndpoint": "false" })
+
+    def check(_):
+        _, inputs = mocks.resources["aws-network-ecr-dkr-endpoint"]
+        assert inputs["vpcEndpointType"] == "Interface"
+        assert inputs["privateDnsEnabled"] is True
+        assert inputs["subnetIds"] == [f"subnet-private-{az}" for az in AZS]
+        assert inputs["securityGroupIds"] == ["aws-network-endpoints-security-group-id"]
+        assert "aws-network-dynamodb-endpoint" not in mocks.resources
+        assert sorted(program["vpc"].interface_endpoints) == sorted(["ecr.api", "ecr.dkr", "sagemaker.runtime", "sts", "logs"])
+
+    return pulumi.Output.all(*[endpoint.id for endpoint in program["vpc"].interface_endpoints.values()]).apply(check)
@@ -3,6 +3,39 @@
 import pulumi
 from pulumi_azure_native import storage
 from pulumi_azure_native import resources
+from storage_tiers import TIERS, expected_limits, premium_files_quota, select_tier
+
+# Get some configuration values or set default values.
+config = pulumi.Config()
+storage_tier = config.get("storageTier") if config.get("storageTier") is not None else "auto"  # "auto" or one of storage_tiers.TIERS
+expected_iops = config.get_float("expectedIops") if config.get_float("expectedIops") is not None else 0
+expected_throughput = config.get_float("expectedThroughputMBps") if config.get_float("expectedThroughputMBps") is not None else 0
+low_latency = config.get_bool("lowLatency") if config.get_bool("lowLatency") is not None else False
+file_share = config.get("fileShare")  # "smb" or "nfs", blobs when not set
+hierarchical_namespace = config.get_bool("hierarchicalNamespace") if config.get_bool("hierarchicalNamespace") is not None else False
+file_share_quota = config.get_int("fileShareQuotaGiB")  # derived from the expected IOPS/throughput for premium files
+
+# A typo would otherwise fail with a bare KeyError, or silently create an SMB share
+if storage_tier != "auto" and storage_tier not in TIERS:
+    raise ValueError(f"Unknown storageTier '{storage_tier}', expected 'auto' or one of: {', '.join(TIERS)}")
+if file_share is not None and file_share not in ("smb", "nfs"):
+    raise ValueError(f"Unknown fileShare '{file_share}', expected 'smb' or 'nfs' (unset for blobs)")
+
+# Pick the tier from the expected load profile (the default profile keeps Standard_LRS StorageV2)
+if storage_tier == "auto":
+    tier, warnings = select_tier(expected_iops, expected_throughput, low_latency, file_share)
+    for warning in warnings:
+        pulumi.log.warn(warning)
+else:
+    tier = TIERS[storage_tier]
+if hierarchical_namespace and not tier.hns:
+    raise ValueError(f"Hierarchical namespace isn't supported by the '{tier.name}' tier")
+if file_share and tier.service != "file":
+    raise ValueError(f"The '{tier.name}' tier serves blobs, not file shares")
+if file_share == "nfs" and not tier.nfs:
+    raise ValueError(f"NFS file shares aren't supported by the '{tier.name}' tier")
+if tier.provisioned and file_share_quota is None:
+    file_share_quota = premium_files_quota(expected_iops, expected_throughput)
 
 # Create an Azure Resource Group
 resource_group = resources.ResourceGroup("resource_group")
@@ -12,11 +45,39 @@ account = storage.StorageAccount(
     "sa",
     resource_group_name=resource_group.name,
     sku=storage.SkuArgs(
-        name=storage.SkuName.STANDARD_LRS,
+        name=tier.sku,
     ),
-    kind=storage.Kind.STORAGE_V2,
+    kind=tier.kind,
+    # Hot access tier on general purpose accounts (premium accounts have no access tier)
+    access_tier=storage.AccessTier.HOT if tier.kind == storage.Kind.STORAGE_V2 else None,
+    # ADLS Gen2: directories are real, renames and deletes of a directory are atomic
+    is_hns_enabled=hierarchical_namespace or None,
+    # Standard file shares up to 100 TiB (and 20,000 IOPS) instead of 5 TiB
+    large_file_shares_state=storage.LargeFileSharesState.ENABLED if tier.name == "standard-files" else None,
+    # NFS doesn't support encryption in transit, the share is only reachable from a virtual network
+    enable_https_traffic_only=False if file_share == "nfs" else None,
 )
 
+# Create a Blob Container for the data synced with `blob_sync.py`, or a File Share
+container = None
+share = None
+if tier.service == "blob":
+    container = storage.BlobContainer(
+        "data",
+        resource_group_name=resource_group.name,
+        account_name=account.name,
+        public_access=storage.PublicAccess.NONE,
+    )
+else:
+    share = storage.FileShare(
+        "data",
+        resource_group_name=resource_group.name,
+        account_name=account.name,
+        share_quota=file_share_quota,
+        enabled_protocols=storage.EnabledProtocols.NFS if file_share == "nfs" else storage.EnabledProtocols.SMB,
+        root_squash=storage.RootSquashType.NO_ROOT_SQUASH if file_share == "nfs" else None,
+    )
+
 # Export the primary key of the Storage Account
 primary_key = (
     pulumi.Output.all(resource_group.name, account.name)
@@ -29,3 +90,10 @@ primary_key = (
 )
 
 pulumi.export("primary_storage_key", primary_key)
+pulumi.export("storage_account_name", account.name)
+pulumi.export("storage_tier", tier.name)
+pulumi.export("expected_limits", expected_limits(tier, file_share_quota))
+if container:
+    pulumi.export("container_name", container.name)
+if share:
+    pulumi.export("file_share_name", share.name)
@@ -0,0 +1,338 @@
+"""
+Sync a local directory to a container of the storage account, with parallel block uploads.
+
+Files are uploaded in parallel (`--workers`), and the blocks of large files in parallel too
+(`--max-concurrency`), with a block size picked from the file size. The SHA-256 of each file is
+stored in the blob metadata: files whose blob has the same size and hash are skipped. The
+throughput (MB/s) of the run is reported at the end.
+
+Usage:
+    # The storage account of the stack
+    python3 blob_sync.py ./data --account-name $(pulumi stack output storage_account_name) \\
+        --account-key $(pulumi stack output primary_storage_key) --container $(pulumi stack output container_name)
+
+    # Locally, against Azurite (npx azurite-blob --silent --location /tmp/azurite)
+    python3 blob_sync.py ./data --azurite --container data
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+MiB = 1024 ** 2
+
+# A block blob has up to 50,000 blocks of up to 4000 MiB each.
+MAX_BLOCKS = 50_000
+MAX_BLOCK_SIZE = 4000 * MiB
+
+# Files up to this size are uploaded with a single request.
+SINGLE_PUT_SIZE = 8 * MiB
+
+# Blob metadata holding the SHA-256 of the file content.
+HASH_METADATA_KEY = "sha256"
+
+# The well-known development account of the Azurite emulator.
+AZURITE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+)
+
+
+def choose_block_size(size: int) -> int:
+    """
+    The block size of a file: larger files get larger blocks (fewer requests, more bytes per request),
+    always within the 50,000 blocks of a block blob. Blocks above 4 MiB also get the high-throughput
+    block blob path of the service.
+    """
+    for limit, block_size in ((256 * MiB, 8 * MiB), (4096 * MiB, 32 * MiB)):
+        if size <= limit:
+            return block_size
+    return min(MAX_BLOCK_SIZE, max(100 * MiB, -(-size // (MAX_BLOCKS * MiB)) * MiB))
+
+
+def file_sha256(path: str, chunk_size: int = 4 * MiB) -> str:
+    """The hex SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class LocalFile:
+    """
+    A file to sync.
+
+    Attributes:
+        path: Local path of the file.
+        blob_name: Name of its blob (the prefix and the relative path, with forward slashes).
+        size: Size of the file, in bytes.
+    """
+    path: str
+    blob_name: str
+    size: int
+
+
+@dataclass
+class SyncStats:
+    """
+    The outcome of a sync.
+
+    Attributes:
+        files: Local files found.
+        uploaded: Files uploaded.
+        skipped: Files skipped, their blob has the same size and hash.
+        deleted: Blobs deleted, their file is gone (with `delete`).
+        failed: Files whose upload failed.
+        bytes_uploaded: Bytes uploaded.
+        bytes_skipped: Bytes of the skipped files.
+        elapsed: Duration of the sync, in seconds.
+        errors: Error message of each failed file.
+    """
+    files: int = 0
+    uploaded: int = 0
+    skipped: int = 0
+    deleted: int = 0
+    failed: int = 0
+    bytes_uploaded: int = 0
+    bytes_skipped: int = 0
+    elapsed: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def mb_per_second(self) -> float:
+        """Upload throughput, in MB/s (10^6 bytes)."""
+        return self.bytes_uploaded / 1e6 / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "mb_per_second": self.mb_per_second}
+
+    def __str__(self) -> str:
+        return (
+            f"{self.files} files: {self.uploaded} uploaded ({self.bytes_uploaded / 1e6:.1f} MB), "
+            f"{self.skipped} unchanged ({self.bytes_skipped / 1e6:.1f} MB), {self.deleted} deleted, {self.failed} failed "
+            f"in {self.elapsed:.1f}s, {self.mb_per_second:.1f} MB/s"
+        )
+
+
+def scan(directory: str, prefix: str = "") -> List[LocalFile]:
+    """The files of a directory (recursively), with their blob names."""
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            if not os.path.isfile(path):
+                continue
+            relative = os.path.relpath(path, directory).replace(os.sep, "/")
+            files.append(LocalFile(path=path, blob_name=f"{prefix}{relative}", size=os.path.getsize(path)))
+    return sorted(files, key=lambda f: f.blob_name)
+
+
+class BlobSync:
+    """
+    Syncs local directories to a blob container, see the module docstring.
+
+    Methods:
+        sync: Upload the new and changed files of a directory, skip the unchanged ones.
+        upload: Upload a single file.
+    """
+    def __init__(self, container_client, workers: int = 8, max_concurrency: int = 8, dry_run: bool = False):
+        """
+        Parameters:
+            container_client: `azure.storage.blob.ContainerClient` of the target container.
+            workers: Files uploaded in parallel.
+            max_concurrency: Blocks of a file uploaded in parallel (up to `max_concurrency` blocks held in memory per file).
+            dry_run: Only report what would be uploaded and deleted.
+        """
+        self.container = container_client
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.dry_run = dry_run
+        self._lock = threading.Lock()
+
+    def sync(self, directory: str, prefix: str = "", delete: bool = False) -> SyncStats:
+        """
+        Upload the files of a directory whose blob is missing, or differs in size or content hash.
+
+        Parameters:
+            directory: Local directory.
+            prefix: Prefix of the blob names, i.e: 'datasets/v2/'.
+            delete: Delete the blobs under the prefix whose file is gone.
+        """
+        start = time.perf_counter()
+        stats = SyncStats()
+        files = scan(directory, prefix)
+        stats.files = len(files)
+
+        # A single listing of the blobs (with their metadata) instead of a request per file
+        remote = {
+            blob.name: (blob.size, (blob.metadata or {}).get(HASH_METADATA_KEY))
+            for blob in self.container.list_blobs(name_starts_with=prefix or None, include=["metadata"])
+        }
+
+        # Blocks get their own pool: file tasks wait on block tasks, a shared pool could deadlock
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="file") as file_pool, \
+                ThreadPoolExecutor(max_workers=self.workers * self.max_concurrency, thread_name_prefix="block") as block_pool:
+            futures = {file_pool.submit(self._sync_file, file, remote.get(file.blob_name), block_pool, stats): file for file in files}
+            for future in as_completed(futures):
+                file = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    with self._lock:
+                        stats.failed += 1
+                        stats.errors[file.blob_name] = (str(e).strip().splitlines() or [repr(e)])[0]
+
+        if delete:
+            local = {file.blob_name for file in files}
+            for name in sorted(set(remote) - local):
+                if not self.dry_run:
+                    self.container.delete_blob(name)
+                stats.deleted += 1
+
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _sync_file(self, file: LocalFile, remote, block_pool: ThreadPoolExecutor, stats: SyncStats):
+        sha256 = file_sha256(file.path)
+        if remote is not None and remote[0] == file.size and remote[1] == sha256:
+            with self._lock:
+                stats.skipped += 1
+                stats.bytes_skipped += file.size
+            return
+        if not self.dry_run:
+            self.upload(file, sha256, block_pool)
+        with self._lock:
+            stats.uploaded += 1
+            stats.bytes_uploaded += file.size
+
+    def upload(self, file: LocalFile, sha256: str, block_pool: Optional[ThreadPoolExecutor] = None):
+        """
+        Upload a file: in a single request up to `SINGLE_PUT_SIZE`, as blocks staged in parallel above.
+
+        Parameters:
+            file: The file.
+            sha256: The SHA-256 of its content, stored in the blob metadata.
+            block_pool: Thread pool of the block uploads (a pool of `max_concurrency` threads when not set).
+        """
+        from azure.storage.blob import BlobBlock, ContentSettings
+
+        blob = self.container.get_blob_client(file.blob_name)
+        metadata = {HASH_METADATA_KEY: sha256}
+        content_settings = ContentSettings(content_type=mimetypes.guess_type(file.path)[0] or "application/octet-stream")
+
+        if file.size <= SINGLE_PUT_SIZE:
+            with open(file.path, "rb") as f:
+                blob.upload_blob(f.read(), overwrite=True, metadata=metadata, content_settings=content_settings)
+            return
+
+        block_size = choose_block_size(file.size)
+        offsets = range(0, file.size, block_size)
+        # Block ids must all have the same length within a blob
+        block_ids = [base64.b64encode(f"{index:08d}".encode()).decode() for index in range(len(offsets))]
+
+        def stage(block_id: str, offset: int):
+            with open(file.path, "rb") as f:
+                f.seek(offset)
+                blob.stage_block(block_id, f.read(block_size))
+
+        pool = block_pool or ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            # At most `max_concurrency` blocks of this file in flight, so every file keeps moving
+            pending = []
+            for block_id, offset in zip(block_ids, offsets):
+                if len(pending) >= self.max_concurrency:
+                    pending.pop(0).result()
+                pending.append(pool.submit(stage, block_id, offset))
+            for future in pending:
+                future.result()
+        finally:
+            if block_pool is None:
+                pool.shutdown()
+        blob.commit_block_list([BlobBlock(block_id=block_id) for block_id in block_ids], metadata=metadata, content_settings=content_settings)
+
+
+def container_client(container: str, connection_string: Optional[str] = None, account_name: Optional[str] = None, account_key: Optional[str] = None, connections: int = 64):
+    """
+    The client of a container (created when missing), over a connection pool sized for the parallel uploads.
+
+    Parameters:
+        container: Name of the container.
+        connection_string: Connection string of the storage account (i.e: `AZURITE_CONNECTION_STRING`).
+        account_name: Name of the storage account, with its key, instead of a connection string.
+        account_key: Key of the storage account.
+        connections: Size of the HTTP connection pool.
+    """
+    import requests
+    from azure.core.exceptions import ResourceExistsError
+    from azure.core.pipeline.transport import RequestsTransport
+    from azure.storage.blob import BlobServiceClient
+
+    # The default pool keeps 10 connections, fewer than the blocks in flight
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=connections, pool_maxsize=connections)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    transport = RequestsTransport(session=session, session_owner=False)
+
+    if connection_string:
+        service = BlobServiceClient.from_connection_string(connection_string, transport=transport)
+    else:
+        service = BlobServiceClient(f"https://{account_name}.blob.core.windows.net", credential={"account_name": account_name, "account_key": account_key}, transport=transport)
+    client = service.get_container_client(container)
+    try:
+        client.create_container()
+    except ResourceExistsError:
+        pass
+    return client
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Sync a local directory to a blob container, with parallel block uploads.")
+    parser.add_argument("directory")
+    parser.add_argument("--container", default="data")
+    parser.add_argument("--prefix", default="", help="Prefix of the blob names, i.e: 'datasets/v2/'")
+    target_group = parser.add_mutually_exclusive_group()
+    target_group.add_argument("--connection-string", default=os.environ.get("AZURE_STORAGE_CONNECTION_STRING"), help="Connection string (default: $AZURE_STORAGE_CONNECTION_STRING)")
+    target_group.add_argument("--account-name", default=None, help="Storage account name, with --account-key")
+    target_group.add_argument("--azurite", action="store_true", help="Use the local Azurite emulator")
+    parser.add_argument("--account-key", default=os.environ.get("AZURE_STORAGE_KEY"))
+    parser.add_argument("--workers", type=int, default=8, help="Files uploaded in parallel")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Blocks of a file uploaded in parallel")
+    parser.add_argument("--delete", action="store_true", help="Delete the blobs whose file is gone")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be uploaded and deleted")
+    parser.add_argument("--json", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if not args.azurite and not args.connection_string and not (args.account_name and args.account_key):
+        parser.error("one of --connection-string, --account-name/--account-key or --azurite is required")
+    client = container_client(
+        args.container,
+        connection_string=AZURITE_CONNECTION_STRING if args.azurite else (None if args.account_name else args.connection_string),
+        account_name=args.account_name,
+        account_key=args.account_key,
+        connections=args.workers * args.max_concurrency,
+    )
+
+    stats = BlobSync(client, workers=args.workers, max_concurrency=args.max_concurrency, dry_run=args.dry_run).sync(args.directory, args.prefix, delete=args.delete)
+    print(stats)
+    for name, error in sorted(stats.errors.items()):
+        print(f"failed: {name}: {error}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(stats.as_dict(), f, indent=2)
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+"""
+Performance tiers of the storage account, and a selector picking one from an expected load profile.
+
+The published scalability targets of each tier are kept in a local table: request rate (IOPS),
+ingress/egress throughput and latency. `select_tier` picks the cheapest tier meeting a profile,
+and `expected_limits` gives the limits to expect once deployed (exported by the stack).
+
+    - standard:        Standard_LRS StorageV2, blobs (the default)
+    - premium-blob:    Premium_LRS BlockBlobStorage, blobs on SSD, low latency and high transaction rates
+    - standard-files:  Standard_LRS StorageV2 with large file shares (up to 100 TiB, SMB)
+    - premium-files:   Premium_LRS FileStorage, provisioned file shares on SSD (SMB or NFS)
+
+Hierarchical namespace (ADLS Gen2, atomic directory renames/deletes) is an option of the blob tiers.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class StorageTier:
+    """
+    A performance tier of the storage account, with its scalability targets.
+
+    Attributes:
+        name: Name of the tier.
+        sku: SKU of the storage account.
+        kind: Kind of the storage account.
+        service: 'blob' or 'file'.
+        max_iops: Requests per second of the account (of a share for file tiers, at the maximum provisioned size).
+        max_ingress_mbps: Ingress of the account (of a share for file tiers), in MB/s.
+        max_egress_mbps: Egress of the account (of a share for file tiers), in MB/s.
+        latency: Expected latency of small requests.
+        hns: Whether the tier supports hierarchical namespace.
+        nfs: Whether the tier supports NFS file shares.
+        provisioned: Whether the limits scale with the provisioned share size.
+    """
+    name: str
+    sku: str
+    kind: str
+    service: Literal["blob", "file"]
+    max_iops: int
+    max_ingress_mbps: float
+    max_egress_mbps: float
+    latency: str
+    hns: bool = False
+    nfs: bool = False
+    provisioned: bool = False
+
+
+# Scalability targets of the tiers (standard accounts in the large regions, i.e: Europe and US).
+TIERS: Dict[str, StorageTier] = {
+    "standard": StorageTier(
+        name="standard", sku="Standard_LRS", kind="StorageV2", service="blob",
+        max_iops=20_000, max_ingress_mbps=7_500, max_egress_mbps=15_000, latency="tens of ms", hns=True,
+    ),
+    # Premium block blob accounts have no published request rate target, sustained rates are several times the standard ones
+    "premium-blob": StorageTier(
+        name="premium-blob", sku="Premium_LRS", kind="BlockBlobStorage", service="blob",
+        max_iops=100_000, max_ingress_mbps=7_500, max_egress_mbps=15_000, latency="single-digit ms", hns=True,
+    ),
+    "standard-files": StorageTier(
+        name="standard-files", sku="Standard_LRS", kind="StorageV2", service="file",
+        max_iops=20_000, max_ingress_mbps=300, max_egress_mbps=300, latency="tens of ms",
+    ),
+    "premium-files": StorageTier(
+        name="premium-files", sku="Premium_LRS", kind="FileStorage", service="file",
+        max_iops=100_000, max_ingress_mbps=4_136, max_egress_mbps=6_204, latency="single-digit ms", nfs=True, provisioned=True,
+    ),
+}
+
+# Premium file shares: baseline IOPS and throughput grow with the provisioned size (GiB, throughput published in MiB/s).
+PREMIUM_FILES_MIN_GIB = 100
+PREMIUM_FILES_MAX_GIB = 102_400
+
+
+def premium_files_limits(quota_gib: int) -> Dict[str, float]:
+    """The baseline IOPS, burst IOPS, ingress and egress (MB/s) of a premium file share of `quota_gib`."""
+    return {
+        "iops": min(3_000 + quota_gib, 100_000),
+        "burst_iops": min(max(10_000, 3 * quota_gib), 100_000),
+        "ingress_mbps": min(40 + math.ceil(0.04 * quota_gib), TIERS["premium-files"].max_ingress_mbps),
+        "egress_mbps": min(60 + math.ceil(0.06 * quota_gib), TIERS["premium-files"].max_egress_mbps),
+    }
+
+
+def premium_files_quota(iops: float, throughput_mbps: float) -> int:
+    """The smallest premium file share size (GiB) whose baseline meets the IOPS and throughput (ingress + egress)."""
+    quota = max(PREMIUM_FILES_MIN_GIB, math.ceil(iops - 3_000), math.ceil((throughput_mbps - 100) / 0.1))
+    return min(quota, PREMIUM_FILES_MAX_GIB)
+
+
+def select_tier(
+        iops: float = 0,
+        throughput_mbps: float = 0,
+        low_latency: bool = False,
+        file_share: Optional[Literal["smb", "nfs"]] = None,
+) -> Tuple[StorageTier, List[str]]:
+    """
+    Pick the cheapest tier meeting an expected load profile, with warnings when no tier of a single account does.
+
+    Parameters:
+        iops: Expected requests per second.
+        throughput_mbps: Expected throughput (reads and writes), in MB/s.
+        low_latency: Whether the workload needs single-digit ms latency (i.e: many small reads).
+        file_share: File share protocol, blobs when not set.
+    """
+    warnings = []
+    if file_share:
+        standard = TIERS["standard-files"]
+        needs_premium = file_share == "nfs" or low_latency or iops > standard.max_iops or throughput_mbps > standard.max_egress_mbps
+        tier = TIERS["premium-files"] if needs_premium else standard
+    else:
+        standard = TIERS["standard"]
+        tier = TIERS["premium-blob"] if low_latency or iops > standard.max_iops else standard
+
+    if iops > tier.max_iops:
+        warnings.append(f"{iops:.0f} IOPS is above the {tier.max_iops} of a '{tier.name}' {'share' if tier.service == 'file' else 'account'}, spread the load over several")
+    if throughput_mbps > tier.max_egress_mbps:
+        warnings.append(f"{throughput_mbps:.0f} MB/s is above the {tier.max_egress_mbps:.0f} MB/s egress of a '{tier.name}' {'share' if tier.service == 'file' else 'account'}, spread the load over several")
+    return tier, warnings
+
+
+def expected_limits(tier: StorageTier, quota_gib: Optional[int] = None) -> Dict[str, object]:
+    """
+    The limits to expect from a deployed tier (of the file share of `quota_gib` for premium files).
+
+    Parameters:
+        tier: The tier.
+        quota_gib: Provisioned size of the premium file share, in GiB.
+    """
+    limits = {
+        "tier": tier.name,
+        "sku": tier.sku,
+        "kind": tier.kind,
+        "iops": tier.max_iops,
+        "ingress_mbps": tier.max_ingress_mbps,
+        "egress_mbps": tier.max_egress_mbps,
+        "latency": tier.latency,
+    }
+    if tier.provisioned and quota_gib:
+        limits.update(premium_files_limits(quota_gib), quota_gib=quota_gib)
+    return limits
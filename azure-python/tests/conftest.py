@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The program imports `blob_sync` and `storage_tiers` from the project directory, as `pulumi up` does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
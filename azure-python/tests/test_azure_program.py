@@ -0,0 +1,45 @@
+"""
+Runs the program (`__main__.py`) against Pulumi mocks, so no cloud calls are made.
+"""
+import os
+import runpy
+
+import pytest
+
+pulumi = pytest.importorskip("pulumi")
+pytest.importorskip("pulumi_azure_native")
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class AzureMocks(pulumi.runtime.Mocks):
+    """
+    Echoes the inputs of the registered resources as their outputs.
+    """
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        return f"{args.name}-id", dict(args.inputs)
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        return {}
+
+@pytest.fixture
+def run_program():
+    pulumi.runtime.set_mocks(AzureMocks(), project="azure-python", stack="test", preview=False)
+
+    def run(config):
+        pulumi.runtime.set_all_config({ f"azure-python:{key}": value for key, value in config.items() })
+        return runpy.run_path(os.path.join(PROJECT_DIR, "__main__.py"), run_name="__main__")
+
+    yield run
+    pulumi.runtime.set_all_config({})
+
+@pytest.mark.parametrize("config, message", [
+    ({ "storageTier": "premium" }, "Unknown storageTier 'premium', expected 'auto' or one of: standard, premium-blob, standard-files, premium-files"),
+    ({ "fileShare": "cifs" }, "Unknown fileShare 'cifs', expected 'smb' or 'nfs' (unset for blobs)"),
+    ({ "storageTier": "standard", "fileShare": "smb" }, "The 'standard' tier serves blobs, not file shares"),
+    ({ "storageTier": "standard-files", "fileShare": "nfs" }, "NFS file shares aren't supported by the 'standard-files' tier"),
+])
+def test_invalid_config(run_program, config, message):
+    with pytest.raises(ValueError) as error:
+        run_program(config)
+    assert str(error.value) == message
@@ -0,0 +1,132 @@
+"""
+Tests of the directory sync, against a fake container client (no storage account nor Azurite needed).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+import blob_sync
+from blob_sync import HASH_METADATA_KEY, MAX_BLOCK_SIZE, MAX_BLOCKS, MiB, BlobSync, LocalFile, SyncStats, choose_block_size, file_sha256
+
+TiB = 1024 ** 4
+
+
+class FakeBlobClient:
+    """
+    Records the uploads of a blob.
+    """
+
+    def __init__(self):
+        self.uploads = []
+
+    def upload_blob(self, data, overwrite=False, metadata=None, content_settings=None):
+        self.uploads.append((data, metadata))
+
+
+class FakeContainerClient:
+    """
+    A container holding `blobs` (name -> (content, metadata)), recording the uploads and deletes.
+    """
+
+    def __init__(self, blobs=None):
+        self.blobs = blobs or {}
+        self.blob_clients = {}
+        self.deleted = []
+
+    def list_blobs(self, name_starts_with=None, include=None):
+        return [
+            SimpleNamespace(name=name, size=len(content), metadata=metadata)
+            for name, (content, metadata) in self.blobs.items()
+            if name.startswith(name_starts_with or "")
+        ]
+
+    def get_blob_client(self, name):
+        return self.blob_clients.setdefault(name, FakeBlobClient())
+
+    def delete_blob(self, name):
+        self.deleted.append(name)
+
+
+@pytest.mark.parametrize("size, block_size", [
+    (0, 8 * MiB),
+    (256 * MiB, 8 * MiB),
+    (256 * MiB + 1, 32 * MiB),
+    (4096 * MiB, 32 * MiB),
+    (4096 * MiB + 1, 100 * MiB),
+    (10 * TiB, 210 * MiB),
+    (300 * TiB, MAX_BLOCK_SIZE),
+])
+def test_choose_block_size(size, block_size):
+    assert choose_block_size(size) == block_size
+
+
+@pytest.mark.parametrize("size", [1, 256 * MiB, 4096 * MiB, 1 * TiB, 50 * TiB, MAX_BLOCKS * MAX_BLOCK_SIZE])
+def test_choose_block_size_within_the_block_limit(size):
+    assert -(-size // choose_block_size(size)) <= MAX_BLOCKS
+
+
+def sync_file(container, file, remote, dry_run=False):
+    stats = SyncStats()
+    with ThreadPoolExecutor(max_workers=1) as block_pool:
+        BlobSync(container, dry_run=dry_run)._sync_file(file, remote, block_pool, stats)
+    return stats
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    path = tmp_path / "train.csv"
+    path.write_bytes(b"a,b\n1,2\n")
+    return LocalFile(path=str(path), blob_name="train.csv", size=path.stat().st_size)
+
+
+def test_sync_file_skips_the_same_hash(local_file):
+    container = FakeContainerClient()
+    stats = sync_file(container, local_file, remote=(local_file.size, file_sha256(local_file.path)))
+    assert (stats.skipped, stats.bytes_skipped, stats.uploaded) == (1, local_file.size, 0)
+    assert container.blob_clients == {}
+
+
+@pytest.mark.parametrize("remote", [
+    None,
+    (8, "0" * 64),
+    (7, None),
+])
+def test_sync_file_uploads_a_missing_or_changed_blob(local_file, remote):
+    pytest.importorskip("azure.storage.blob")
+    container = FakeContainerClient()
+    stats = sync_file(container, local_file, remote=remote)
+    assert (stats.skipped, stats.uploaded, stats.bytes_uploaded) == (0, 1, local_file.size)
+    data, metadata = container.blob_clients["train.csv"].uploads[0]
+    assert data == b"a,b\n1,2\n"
+    assert metadata == {HASH_METADATA_KEY: file_sha256(local_file.path)}
+
+
+def test_sync_file_dry_run_doesnt_upload(local_file):
+    container = FakeContainerClient()
+    stats = sync_file(container, local_file, remote=None, dry_run=True)
+    assert stats.uploaded == 1
+    assert container.blob_clients == {}
+
+
+def test_delete_under_dry_run(tmp_path, monkeypatch, capsys):
+    directory = tmp_path / "data"
+    directory.mkdir()
+    (directory / "kept.txt").write_bytes(b"kept")
+    kept_hash = file_sha256(str(directory / "kept.txt"))
+    container = FakeContainerClient({
+        "kept.txt": (b"kept", {HASH_METADATA_KEY: kept_hash}),
+        "gone.txt": (b"gone", {}),
+    })
+    monkeypatch.setattr(blob_sync, "container_client", lambda *args, **kwargs: container)
+
+    assert blob_sync.main([str(directory), "--azurite", "--delete", "--dry-run", "--json", str(tmp_path / "report.json")]) == 0
+    assert container.deleted == []
+    assert container.blob_clients == {}
+    assert "1 unchanged" in capsys.readouterr().out
+    report = (tmp_path / "report.json").read_text()
+    assert '"deleted": 1' in report
+
+    # Without --dry-run the blob whose file is gone is deleted
+    assert blob_sync.main([str(directory), "--azurite", "--delete"]) == 0
+    assert container.deleted == ["gone.txt"]
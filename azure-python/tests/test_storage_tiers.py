@@ -0,0 +1,57 @@
+"""
+Tests of the tier selection and of the premium file share sizing.
+"""
+import pytest
+
+from storage_tiers import PREMIUM_FILES_MAX_GIB, PREMIUM_FILES_MIN_GIB, premium_files_limits, premium_files_quota, select_tier
+
+
+# (iops, throughput_mbps, low_latency, file_share) -> (tier, number of warnings)
+SELECT_TIER = [
+    ((0, 0, False, None), ("standard", 0)),
+    ((20_000, 0, False, None), ("standard", 0)),
+    ((20_001, 0, False, None), ("premium-blob", 0)),
+    ((0, 0, True, None), ("premium-blob", 0)),
+    ((150_000, 0, False, None), ("premium-blob", 1)),
+    ((0, 16_000, False, None), ("standard", 1)),
+    ((0, 0, False, "smb"), ("standard-files", 0)),
+    ((0, 0, False, "nfs"), ("premium-files", 0)),
+    ((0, 0, True, "smb"), ("premium-files", 0)),
+    ((20_000, 300, False, "smb"), ("standard-files", 0)),
+    ((20_001, 0, False, "smb"), ("premium-files", 0)),
+    ((0, 301, False, "smb"), ("premium-files", 0)),
+    ((150_000, 7_000, False, "nfs"), ("premium-files", 2)),
+]
+
+
+@pytest.mark.parametrize("profile, expected", SELECT_TIER)
+def test_select_tier(profile, expected):
+    tier, warnings = select_tier(*profile)
+    assert (tier.name, len(warnings)) == expected
+
+
+# (iops, throughput_mbps) -> quota (GiB): 1 IOPS and 0.1 MB/s per GiB above the 3000 IOPS and 100 MB/s of the base
+PREMIUM_FILES_QUOTA = [
+    ((0, 0), PREMIUM_FILES_MIN_GIB),
+    ((3_000, 100), PREMIUM_FILES_MIN_GIB),
+    ((5_000, 0), 2_000),
+    ((3_100.5, 0), 101),
+    ((0, 150), 500),
+    ((0, 200), 1_000),
+    ((5_000, 200), 2_000),
+    ((200_000, 0), PREMIUM_FILES_MAX_GIB),
+    ((0, 20_000), PREMIUM_FILES_MAX_GIB),
+]
+
+
+@pytest.mark.parametrize("profile, quota", PREMIUM_FILES_QUOTA)
+def test_premium_files_quota(profile, quota):
+    assert premium_files_quota(*profile) == quota
+
+
+@pytest.mark.parametrize("profile", [profile for profile, quota in PREMIUM_FILES_QUOTA if quota < PREMIUM_FILES_MAX_GIB])
+def test_premium_files_quota_meets_the_profile(profile):
+    iops, throughput_mbps = profile
+    limits = premium_files_limits(premium_files_quota(iops, throughput_mbps))
+    assert limits["iops"] >= iops
+    assert limits["ingress_mbps"] + limits["egress_mbps"] >= throughput_mbps
@@ -5,7 +5,13 @@ import pulumi
 import pulumi_aws as aws
 import pulumi_awsx as awsx
 from src.vpc import Vpcx, VpcxArgs
+from src.network_stack import get_shared_network
+from src.boot_agent import boot_agent_preamble
 from src.download_zip import DownloadZip, DownloadZipArgs
+from src.golden_ami import GoldenAmi, GoldenAmiArgs
+from src.hibernation import interruption_behavior_for, root_volume_size_for
+from src.instance_store import get_instance_store_layout, instance_store_script
+from src.user_data import UserDataPart, render_template, render_user_data
 
 # Get some configuration values or set default values.
 dir_name = pulumi.get_project()
@@ -13,10 +19,27 @@ aws_region = aws.get_region().name
 project_name = "hack-lab"
 config = pulumi.Config()
 vpc_network_cidr = config.get("vpcNetworkCidr") if config.get("vpcNetworkCidr") is not None else "10.0.0.0/16"
+network_stack = config.get("networkStack") # i.e: "my-org/aws-network-python/dev", creates a vpc when unset
 keypair = config.get("keypair") if config.get("keypair") is not None else "jarvis"
+bake_ami = config.get_bool("bakeAmi") if config.get_bool("bakeAmi") is not None else True
+bake_instance_type = config.get("bakeInstanceType") if config.get("bakeInstanceType") is not None else "c5.2xlarge"
+instance_type = config.get("instanceType") if config.get("instanceType") is not None else "i3.16xlarge"
+persistent = config.get_bool("persistent") if config.get_bool("persistent") is not None else False
+root_volume_size = config.get_int("rootVolumeSize") if config.get_int("rootVolumeSize") is not None else 40
 
 scripts_dir = os.path.join(os.path.dirname(__file__), "scripts")
-user_data_file = os.path.join(scripts_dir, f"user_data.sh")
+user_data_file = os.path.join(scripts_dir, f"setup_desktop.sh")
+bake_file = os.path.join(scripts_dir, f"bake.sh")
+
+# Render the user data template with the stack values, as a gzip compressed multipart cloud-init document
+rendered_user_data = render_user_data([
+    UserDataPart(render_template(user_data_file, {
+        # One IMDSv2 session for the metadata and per-phase boot timings (see `src/boot_agent.py`)
+        "boot_agent": boot_agent_preamble(),
+        # Assemble the local NVMe instance store (if any) to hold the VM images
+        "setup_instance_store": instance_store_script([instance_type], mount_point="/mnt/vms", owner="kali"),
+    }), filename="setup_desktop.sh"),
+])
 
 # Look up the latest Kali Linux i.e: ami-094d83ad9850c1a43
 ami = aws.ec2.get_ami(
@@ -31,37 +54,85 @@ ami = aws.ec2.get_ami(
 # Get all availability zones
 azs = aws.get_availability_zones(state="available").names[0]
 
-# Create a VPC with a size /16 CIDR block
-vpc = Vpcx(
-    project_name,
-    VpcxArgs(
-        vpc_cidr_block=vpc_network_cidr,
-        azs=azs,
-        sg_ingress_ports=[22, 80],
-        tags={
-            "Project": project_name,
-            "Environment": "dev",
-        },
-    ),
-)
+# Use the shared network stack (VPC, subnets and security group) when configured, otherwise create them
+if network_stack:
+    network = get_shared_network(network_stack)
+    vpc_id = network.vpc_id
+    public_subnet_ids = network.public_subnet_ids
+    private_subnet_ids = network.private_subnet_ids
+    security_group_id = network.security_group_id
+else:
+    # Create a VPC with a size /16 CIDR block
+    vpc = Vpcx(
+        project_name,
+        VpcxArgs(
+            vpc_cidr_block=vpc_network_cidr,
+            azs=azs,
+            sg_ingress_ports=[22, 80],
+            tags={
+                "Project": project_name,
+                "Environment": "dev",
+            },
+        ),
+    )
+    vpc_id = vpc.vpc.vpc_id
+    public_subnet_ids = vpc.vpc.public_subnet_ids
+    private_subnet_ids = vpc.vpc.private_subnet_ids
+    security_group_id = vpc.security_group.id
+
+# Bake the desktop and tools into a golden AMI once (re-baked only when `bake.sh`, the Kali AMI or the bake instance type change), instead of installing them on every boot
+golden_ami = None
+if bake_ami:
+    golden_ami = GoldenAmi(
+        f"{project_name}-kali",
+        GoldenAmiArgs(
+            base_ami=ami,
+            bake_script=bake_file,
+            subnet_id=public_subnet_ids[0],
+            security_group_ids=[security_group_id],
+            aws_region=aws_region,
+            instance_type=bake_instance_type,
+            tags={
+                "Project": project_name,
+                "Environment": "dev",
+            },
+        ),
+    )
+
+# In persistent mode, the spot instance hibernates (or stops, when the RAM is too large to hibernate) on interruption
+# and can be paused/resumed with `scripts/lab.sh`, instead of being destroyed.
+interruption_behavior = interruption_behavior_for(instance_type) if persistent else "terminate"
+hibernate = interruption_behavior == "hibernate"
+if persistent and not hibernate:
+    pulumi.log.warn(f"'{instance_type}' can't hibernate, the lab will stop (and lose its in-memory state) when paused or interrupted")
+if persistent and get_instance_store_layout(instance_type):
+    pulumi.log.warn(f"The instance store of '{instance_type}' is wiped when the lab is paused or interrupted, keep VM images on the root volume or in s3")
 
 # Create a hacker machine
 hacker_instance_name = f"{project_name}-kali"
 hacker_instance = aws.ec2.Instance(
     hacker_instance_name,
-    ami=ami,
-    instance_type="i3.16xlarge",
+    ami=golden_ami.ami.id if golden_ami else ami,
+    instance_type=instance_type,
     instance_market_options=aws.ec2.InstanceInstanceMarketOptionsArgs(
         market_type="spot",
         spot_options=aws.ec2.InstanceInstanceMarketOptionsSpotOptionsArgs(
             max_price="1.5",
-            spot_instance_type="one-time",
+            spot_instance_type="persistent" if persistent else "one-time",
+            instance_interruption_behavior=interruption_behavior if persistent else None,
         ),
     ),
+    hibernation=hibernate,
+    root_block_device=aws.ec2.InstanceRootBlockDeviceArgs(
+        volume_size=root_volume_size_for(instance_type, root_volume_size, hibernate),
+        volume_type="gp3",
+        encrypted=True,
+        delete_on_termination=True,
+    ),
     key_name=keypair,
-    vpc_security_group_ids=[vpc.security_group.id],
-    subnet_id=vpc.vpc.public_subnet_ids[0],
-    user_data=(lambda path: base64.b64encode(open(path).read().encode()).decode())(f"{user_data_file}"),
+    vpc_security_group_ids=[security_group_id],
+    subnet_id=public_subnet_ids[0],
+    user_data_base64=rendered_user_data.base64,
     tags={
         "Name": "kali",
         "Project": project_name,
@@ -105,11 +176,18 @@ public_access_block = aws.s3.BucketPublicAccessBlock(
 # Export the instance's publicly accessible IP address and hostname.
 pulumi.export("aws_region", aws_region)
 pulumi.export("ami", ami)
+if golden_ami:
+    pulumi.export("golden_ami", golden_ami.ami.id)
+    pulumi.export("golden_ami_script_hash", golden_ami.script_hash)
 pulumi.export("azs", azs)
-pulumi.export("vpc_id", vpc.vpc.vpc_id)
-pulumi.export("security_group_id", vpc.security_group.id)
-pulumi.export("public_subnet_ids", vpc.vpc.public_subnet_ids)
-pulumi.export("private_subnet_ids", vpc.vpc.private_subnet_ids)
+pulumi.export("vpc_id", vpc_id)
+pulumi.export("security_group_id", security_group_id)
+pulumi.export("public_subnet_ids", public_subnet_ids)
+pulumi.export("private_subnet_ids", private_subnet_ids)
 pulumi.export("hacker_instance", hacker_instance.public_ip)
+pulumi.export("hacker_instance_id", hacker_instance.id)
+pulumi.export("interruption_behavior", interruption_behavior)
+pulumi.export("user_data_size", rendered_user_data.report())
+pulumi.export("instance_store", vars(get_instance_store_layout(instance_type)) if get_instance_store_layout(instance_type) else None)
 pulumi.export("bucket", bucket.bucket_domain_name)
 # pulumi.export("vuln_zip.wget.stdout", vuln_zip.wget.stdout)
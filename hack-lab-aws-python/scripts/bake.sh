@@ -0,0 +1,46 @@
+#!/bin/bash
+
+# Bakes the hack lab golden AMI: installs once what `setup_desktop.sh` (and the `Dockerfile`) set up on every boot.
+# The build instance reports the outcome on its console (`GOLDEN_AMI_BAKE_SUCCEEDED` or `GOLDEN_AMI_BAKE_FAILED`,
+# see `src/golden_ami.py`) and shuts itself down when done, which is the signal to create the image.
+
+export DEBIAN_FRONTEND=noninteractive
+output_file="/var/log/bake.log"
+
+log() {
+    echo "[ log ] $1" | tee -a "$output_file"
+}
+
+console() {
+    echo "$1" | sudo tee /dev/console > /dev/null
+}
+
+bake() {
+    sudo apt update -y && \
+    sudo apt install -y wget jq bc mdadm xfsprogs kali-linux-headless kali-desktop-xfce xorg xrdp && \
+    { sudo apt install -y ec2-hibinit-agent || log "ec2-hibinit-agent isn't available, the lab won't hibernate"; } && \
+    sudo apt autoremove -y && \
+    sudo apt clean && \
+    sudo sed -i 's/port=3389/port=3390/g' /etc/xrdp/xrdp.ini && \
+    sudo systemctl enable xrdp && \
+    sudo mkdir -p /etc/hack-lab && \
+    date -u +%FT%TZ | sudo tee /etc/hack-lab/baked
+}
+
+main() {
+    log "bake()";
+    if bake &>> "$output_file"; then
+        log "baked, shutting down";
+        # Let instances launched from the image run their own user data
+        sudo cloud-init clean --logs;
+        console "GOLDEN_AMI_BAKE_SUCCEEDED";
+        sudo shutdown -h now;
+    else
+        log "bake failed, see $output_file";
+        # Fails the bake right away (the build instance is then terminated), with the end of the log
+        console "$(tail -n 20 "$output_file")";
+        console "GOLDEN_AMI_BAKE_FAILED";
+    fi
+}
+
+main
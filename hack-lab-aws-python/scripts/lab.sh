@@ -0,0 +1,65 @@
+#!/bin/bash
+
+# Pause and resume the (persistent) hack lab instance.
+#
+# Usage: bash scripts/lab.sh pause|resume|status
+#
+# Pausing hibernates the instance when it supports it (the RAM is saved to the encrypted root volume),
+# otherwise it stops it. Resuming restores the in-memory state in seconds instead of a fresh boot.
+
+log() {
+    echo "[ log ] $1"
+}
+
+stack_output() {
+    pulumi stack output "$1" 2> /dev/null
+}
+
+instance_id=$(stack_output hacker_instance_id)
+interruption_behavior=$(stack_output interruption_behavior)
+aws_region=$(stack_output aws_region)
+
+if [[ -z "$instance_id" ]]; then
+    log "No 'hacker_instance_id' stack output, run 'pulumi up' first"
+    exit 1
+fi
+
+state() {
+    aws ec2 describe-instances --region "$aws_region" --instance-ids "$instance_id" \
+        --query "Reservations[0].Instances[0].State.Name" --output text
+}
+
+pause() {
+    if [[ "$interruption_behavior" == "terminate" ]]; then
+        log "The lab isn't persistent, run 'pulumi config set persistent true && pulumi up' first"
+        exit 1
+    fi
+    if [[ "$interruption_behavior" == "hibernate" ]]; then
+        log "Hibernating '$instance_id' ..."
+        aws ec2 stop-instances --region "$aws_region" --instance-ids "$instance_id" --hibernate > /dev/null
+    else
+        log "Stopping '$instance_id' ..."
+        aws ec2 stop-instances --region "$aws_region" --instance-ids "$instance_id" > /dev/null
+    fi
+    aws ec2 wait instance-stopped --region "$aws_region" --instance-ids "$instance_id"
+    log "Paused '$instance_id'"
+}
+
+resume() {
+    local start end public_ip
+    start=$(date +%s)
+    log "Resuming '$instance_id' ..."
+    aws ec2 start-instances --region "$aws_region" --instance-ids "$instance_id" > /dev/null
+    aws ec2 wait instance-running --region "$aws_region" --instance-ids "$instance_id"
+    end=$(date +%s)
+    public_ip=$(aws ec2 describe-instances --region "$aws_region" --instance-ids "$instance_id" \
+        --query "Reservations[0].Instances[0].PublicIpAddress" --output text)
+    log "Resumed '$instance_id' in $((end - start)) secs, available at '$public_ip' (xrdp on port 3390)"
+}
+
+case "$1" in
+    pause) pause ;;
+    resume) resume ;;
+    status) log "'$instance_id' is $(state) (interruption behavior: $interruption_behavior)" ;;
+    *) echo "Usage: $0 pause|resume|status"; exit 1 ;;
+esac
@@ -1,44 +1,28 @@
 #!/bin/bash
+{{ boot_agent }}
+{{ setup_instance_store }}
 
-home_dir="$HOME"
+home_dir="/home/kali"
 output_file="$home_dir/output.log"
 
-AMI_ID=$(curl http://169.254.169.254/latest/meta-data/ami-id)
-INSTANCE_ID=$(curl http://169.254.169.254/latest/meta-data/instance-id)
-HOSTNAME=$(curl http://169.254.169.254/latest/meta-data/hostname)
-AWS_REGION=$(curl http://169.254.169.254/latest/meta-data/placement/region)
-INSTANCE_TYPE=$(curl http://169.254.169.254/latest/meta-data/instance-type)
-PUBLIC_IP=$(curl http://169.254.169.254/latest/meta-data/public-ipv4)
-ACCOUNT_ID=$(curl http://169.254.169.254/latest/meta-data/identity-credentials/ec2/info | jq -r .AccountId)
-
-# ------------------------------
-# Logging & Run method
-# ------------------------------
-
-log() {
-    echo "[ log ] $1" | tee -a "$output_file"
-}
-
-run() {
-    start=$(date +%s.%N);
-    # shellcheck disable=SC2048
-    $* | tee -a "$output_file"
-    exit_code=$?
-    end=$(date +%s.%N);
-    _time_diff=$(echo "$end - $start" | bc);
-    echo "[ run ] $* took $_time_diff secs with exit code $exit_code" | tee -a "$output_file"
-    return $exit_code
-}
+# AMI_ID, INSTANCE_ID, INSTANCE_TYPE, ... and the `log`/`run` helpers come from the boot agent preamble (see `src/boot_agent.py`)
+# This is a template, rendered by `src/user_data.py`
 
 # ------------------------------
 # Setup method
 # ------------------------------
 pre_setup() {
+    # Everything is already installed on the golden AMI (see `bake.sh`)
+    [[ -f /etc/hack-lab/baked ]] && return 0
     sudo apt update -y && \
     sudo apt install -y wget jq tee bc
 }
 
 setup_instance() {
+    if [[ -f /etc/hack-lab/baked ]]; then
+        sudo systemctl enable xrdp --now
+        return $?
+    fi
     # sudo apt-get update -y && sudo apt full-upgrade -y && \
     # sudo apt-get update -y && \
     sudo apt install -y wget kali-linux-headless kali-desktop-xfce xorg xrdp && sudo apt autoremove -y && \
@@ -178,7 +162,11 @@ failure_notify() {
 
 main() {
     start_time=$(date +%s.%N);
-    pre_setup;
+    run pre_setup;
+    if declare -F setup_instance_store > /dev/null; then
+        log "setup_instance_store()";
+        run setup_instance_store;
+    fi
     log "start_notify()";
     run start_notify;
     log "setup_instance()";
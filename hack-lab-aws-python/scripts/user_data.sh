@@ -1,3 +0,0 @@
-#!/bin/bash
-
-# /bin/bash -c "$(curl -fsSL https://raw.githubusercontent.com/mohammadzainabbas/pulumi-labs/main/hack-lab-aws-python/scripts/setup_desktop.sh)"
\ No newline at end of file
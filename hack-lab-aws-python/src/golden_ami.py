@@ -0,0 +1,222 @@
+"""
+Contains a Pulumi ComponentResource for baking a golden AMI from a setup script.
+"""
+import hashlib
+import json
+import os
+from typing import Mapping, Optional, Sequence
+
+import pulumi
+import pulumi_aws as aws
+import pulumi_command as command
+
+# Printed to the console by the bake script, when done (before shutting down) or when failed.
+BAKE_SUCCEEDED_MARKER = "GOLDEN_AMI_BAKE_SUCCEEDED"
+BAKE_FAILED_MARKER = "GOLDEN_AMI_BAKE_FAILED"
+
+class GoldenAmiArgs:
+    """
+    The arguments necessary to construct a `GoldenAmi` resource.
+    """
+
+    def __init__(
+            self,
+            base_ami: str,
+            bake_script: str,
+            subnet_id: pulumi.Input[str],
+            security_group_ids: pulumi.Input[Sequence[pulumi.Input[str]]],
+            aws_region: pulumi.Input[str],
+            instance_type: str = "c5.2xlarge",
+            volume_size: int = 40,
+            timeout_in_seconds: int = 3600,
+            tags: Optional[Mapping[str, str]] = {},
+        ):
+        """
+        Constructs a GoldenAmiArgs.
+
+        :param base_ami: The AMI to start the bake from (a plain id, it is part of the bake hash).
+        :param bake_script: Path to the script that sets up the image. It must print `BAKE_SUCCEEDED_MARKER` (or
+            `BAKE_FAILED_MARKER`) to the console, then shut the instance down once done.
+        :param subnet_id: The subnet to launch the build instance in (needs internet access).
+        :param security_group_ids: The security groups of the build instance.
+        :param aws_region: The AWS region of the build instance, used to wait for it.
+        :param instance_type: The instance type of the build instance.
+        :param volume_size: The size (GiB) of the root volume of the image.
+        :param timeout_in_seconds: How long to wait for the bake script to finish.
+        :param tags: Tags which are applied to all taggable resources.
+        """
+        self.base_ami = base_ami
+        self.bake_script = bake_script
+        self.subnet_id = subnet_id
+        self.security_group_ids = security_group_ids
+        self.aws_region = aws_region
+        self.instance_type = instance_type
+        self.volume_size = volume_size
+        self.timeout_in_seconds = timeout_in_seconds
+        self.tags = tags
+
+class GoldenAmi(pulumi.ComponentResource):
+    """
+    Bakes an AMI once, instead of setting up every instance at boot. The bake consists of:
+
+      - A local command launching a build instance running the bake script as user data, and waiting
+        for it to stop (success) or to print the failure marker to its console (failure, fails fast)
+      - An AMI created from the stopped build instance
+      - A local command terminating the build instance once the AMI exists
+
+    The build instance lives outside of the Pulumi state (launched and terminated by the commands), so
+    it costs nothing once the image is baked, and a refresh never brings it back. A failed or timed
+    out bake terminates it too, after printing the tail of its console output.
+
+    Resources are keyed by a hash of the bake script, the base AMI and the build instance type, so
+    changing any of them bakes a new image (and replaces the old one), while an unchanged bake reuses
+    the existing image.
+
+    ### Example Usage
+
+    ```python
+    from src.golden_ami import GoldenAmi, GoldenAmiArgs
+
+    golden_ami = GoldenAmi("kali", GoldenAmiArgs(
+        base_ami=ami,
+        bake_script="scripts/bake.sh",
+        subnet_id=vpc.vpc.public_subnet_ids[0],
+        security_group_ids=[vpc.security_group.id],
+        aws_region=aws_region,
+    ))
+
+    pulumi.export("golden_ami", golden_ami.ami.id)
+    ```
+    """
+
+    def __init__(self,
+                 name: str,
+                 args: GoldenAmiArgs,
+                 opts: pulumi.ResourceOptions = None):
+        """
+        Constructs a GoldenAmi.
+
+        :param name: The Pulumi resource name. Child resource names are constructed based on this.
+        :param args: A GoldenAmiArgs object containing the arguments for the bake.
+        :param opts: A pulumi.ResourceOptions object.
+        """
+        super().__init__(f"{pulumi.get_project()}:ami:GoldenAmi", name, None, opts)
+
+        with open(args.bake_script, "rb") as fh: script = fh.read()
+        self.script_hash = hashlib.sha256(b"\0".join([script, args.base_ami.encode(), args.instance_type.encode()])).hexdigest()[:12]
+        bake_name = f"{name}-{self.script_hash}"
+        tags = { "ScriptHash": self.script_hash, **args.tags }
+
+        build_cmd = pulumi.Output.all(args.aws_region, args.subnet_id, args.security_group_ids).apply(
+            lambda a: build_instance_script(
+                region=a[0],
+                base_ami=args.base_ami,
+                instance_type=args.instance_type,
+                subnet_id=a[1],
+                security_group_ids=a[2],
+                volume_size=args.volume_size,
+                bake_script=os.path.abspath(args.bake_script),
+                timeout_in_seconds=args.timeout_in_seconds,
+                tags={ "Name": f"{bake_name}-build", **tags },
+            )
+        )
+        self.build = command.local.Command(
+            f"{bake_name}-build",
+            args=command.local.CommandArgs(
+                create=build_cmd,
+                # In case the cleanup didn't run, i.e: the AMI failed
+                delete=pulumi.Output.from_input(args.aws_region).apply(lambda region: terminate_script(region, "$PULUMI_COMMAND_STDOUT")),
+                interpreter=["/bin/bash", "-c"],
+            ),
+            opts=pulumi.ResourceOptions( parent=self ),
+        )
+        # The id of the build instance is the only line the build script prints to stdout
+        self.build_instance_id = self.build.stdout.apply(lambda stdout: stdout.strip())
+
+        self.ami = aws.ec2.AmiFromInstance(
+            bake_name,
+            source_instance_id=self.build_instance_id,
+            snapshot_without_reboot=True,
+            description=f"Golden AMI baked from {args.bake_script} ({self.script_hash})",
+            tags={ "Name": bake_name, **tags },
+            opts=pulumi.ResourceOptions( parent=self ),
+        )
+
+        # The image holds its own snapshot, the build instance (and its volume) is no longer needed
+        self.cleanup = command.local.Command(
+            f"{bake_name}-cleanup",
+            args=command.local.CommandArgs(
+                create=pulumi.Output.all(args.aws_region, self.build_instance_id).apply(lambda a: terminate_script(a[0], a[1])),
+                interpreter=["/bin/bash", "-c"],
+            ),
+            opts=pulumi.ResourceOptions( parent=self, depends_on=[self.ami] ),
+        )
+
+        super().register_outputs({
+            "ami_id": self.ami.id,
+            "script_hash": self.script_hash,
+        })
+
+def build_instance_script(
+        region: str,
+        base_ami: str,
+        instance_type: str,
+        subnet_id: str,
+        security_group_ids: Sequence[str],
+        volume_size: int,
+        bake_script: str,
+        timeout_in_seconds: int,
+        tags: Mapping[str, str],
+    ) -> str:
+    """
+    The bash script launching the build instance and waiting for the bake, printing the instance id.
+
+    Polls the instance state and its console output (`--latest` on Nitro instances), and terminates
+    the instance when the bake fails, times out, or the instance stops without the success marker.
+    """
+    network_interfaces = [{ "DeviceIndex": 0, "SubnetId": subnet_id, "Groups": list(security_group_ids), "AssociatePublicIpAddress": True }]
+    tag_specifications = [
+        { "ResourceType": resource_type, "Tags": [{ "Key": key, "Value": value } for key, value in tags.items()] }
+        for resource_type in ("instance", "volume")
+    ]
+    return f"""set -euo pipefail
+root_device=$(aws ec2 describe-images --region {region} --image-ids {base_ami} --query 'Images[0].RootDeviceName' --output text)
+block_device_mappings='[{{"DeviceName": "'"$root_device"'", "Ebs": {{"VolumeSize": {volume_size}, "VolumeType": "gp3", "Iops": 6000, "Throughput": 500, "DeleteOnTermination": true}}}}]'
+instance_id=$(aws ec2 run-instances --region {region} --image-id {base_ami} --instance-type {instance_type} \
+    --network-interfaces '{json.dumps(network_interfaces)}' \
+    --block-device-mappings "$block_device_mappings" \
+    --tag-specifications '{json.dumps(tag_specifications)}' \
+    --instance-initiated-shutdown-behavior stop \
+    --user-data 'file://{bake_script}' \
+    --query 'Instances[0].InstanceId' --output text)
+echo "Baking on $instance_id" >&2
+
+console() {{ aws ec2 get-console-output --region {region} --instance-id "$instance_id" "$@" --query Output --output text 2> /dev/null || true; }}
+fail() {{
+    echo "$1, terminating $instance_id. Console output:" >&2
+    console --latest | tail -n 40 >&2
+    aws ec2 terminate-instances --region {region} --instance-ids "$instance_id" > /dev/null
+    exit 1
+}}
+
+deadline=$((SECONDS + {timeout_in_seconds}))
+until [[ "$(aws ec2 describe-instances --region {region} --instance-ids "$instance_id" --query 'Reservations[0].Instances[0].State.Name' --output text)" == "stopped" ]]; do
+    (( SECONDS < deadline )) || fail "The bake didn't finish within {timeout_in_seconds}s"
+    ! grep -q '{BAKE_FAILED_MARKER}' <<< "$(console --latest)" || fail "The bake script failed"
+    sleep 15
+done
+
+# The console output of a stopped instance can lag behind, wait for either marker
+until output=$(console) && grep -q -e '{BAKE_SUCCEEDED_MARKER}' -e '{BAKE_FAILED_MARKER}' <<< "$output"; do
+    (( SECONDS < deadline )) || fail "The build instance stopped without reporting the bake"
+    sleep 15
+done
+! grep -q '{BAKE_FAILED_MARKER}' <<< "$output" || fail "The bake script failed"
+echo "$instance_id"
+"""
+
+def terminate_script(region: str, instance_id: str) -> str:
+    """
+    The bash script terminating the build instance, a no-op when it's already gone.
+    """
+    return f'[[ -z "{instance_id}" ]] || aws ec2 terminate-instances --region {region} --instance-ids "{instance_id}" > /dev/null 2>&1 || true'
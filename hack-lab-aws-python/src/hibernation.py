@@ -0,0 +1,48 @@
+"""
+Contains helpers for running the lab as a persistent spot instance that can be paused and resumed.
+
+Link: https://docs.aws.amazon.com/AWSEC2/latest/UserGuide/hibernating-prerequisites.html
+"""
+import math
+from typing import Dict, Literal
+
+# Hibernation saves the RAM to the (encrypted) root volume, it isn't supported above 150 GiB of RAM.
+MAX_HIBERNATION_MEMORY_GIB = 150
+
+# Memory (GiB) per instance type.
+MEMORY_GIB: Dict[str, float] = {
+    "c5.large": 4,
+    "c5.xlarge": 8,
+    "c5.2xlarge": 16,
+    "c5.4xlarge": 32,
+    "m5.large": 8,
+    "m5.xlarge": 16,
+    "m5.2xlarge": 32,
+    "m5.4xlarge": 64,
+    "i3.large": 15.25,
+    "i3.xlarge": 30.5,
+    "i3.2xlarge": 61,
+    "i3.4xlarge": 122,
+    "i3.8xlarge": 244,
+    "i3.16xlarge": 488,
+}
+
+def interruption_behavior_for(instance_type: str) -> Literal["hibernate", "stop"]:
+    """
+    Hibernate when the instance type allows it (the RAM fits the limit), otherwise stop.
+
+    :param instance_type: The EC2 instance type, i.e: `i3.4xlarge`.
+    """
+    memory = MEMORY_GIB.get(instance_type)
+    return "hibernate" if memory is not None and memory <= MAX_HIBERNATION_MEMORY_GIB else "stop"
+
+def root_volume_size_for(instance_type: str, base_size: int, hibernate: bool) -> int:
+    """
+    The root volume size (GiB): the OS/tools size plus, when hibernating, room for the whole RAM.
+
+    :param instance_type: The EC2 instance type.
+    :param base_size: The size needed by the OS and tools, in GiB.
+    :param hibernate: Whether the instance hibernates.
+    """
+    if not hibernate: return base_size
+    return base_size + math.ceil(MEMORY_GIB[instance_type])
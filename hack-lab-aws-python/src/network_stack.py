@@ -0,0 +1,31 @@
+"""
+Contains helpers to consume the shared network stack (`aws-network-python`) with a StackReference,
+instead of creating a VPC per workload stack.
+
+Link: https://www.pulumi.com/docs/using-pulumi/stack-outputs-and-references/
+"""
+from functools import lru_cache
+
+import pulumi
+
+class SharedNetwork:
+    """
+    The outputs of a network stack, with the same attribute names as an `awsx.ec2.Vpc`.
+    """
+
+    def __init__(self, stack_reference: pulumi.StackReference):
+        self.stack_reference = stack_reference
+        self.vpc_id = stack_reference.get_output("vpc_id")
+        self.public_subnet_ids = stack_reference.get_output("public_subnet_ids")
+        self.private_subnet_ids = stack_reference.get_output("private_subnet_ids")
+        self.security_group_id = stack_reference.get_output("security_group_id")
+        self.azs = stack_reference.get_output("azs")
+
+@lru_cache(maxsize=None)
+def get_shared_network(stack_name: str) -> SharedNetwork:
+    """
+    The shared network of a stack, the StackReference is created once per stack name.
+
+    :param stack_name: The fully qualified network stack, i.e: `my-org/aws-network-python/dev`.
+    """
+    return SharedNetwork(pulumi.StackReference(stack_name))
@@ -0,0 +1,130 @@
+"""
+Contains a renderer for EC2 user data.
+
+Scripts are templated with stack values (`{{ name }}` placeholders, which don't clash with
+bash `$VAR`/`${VAR}`), assembled into a multipart MIME cloud-init document and gzip
+compressed (cloud-init detects and decompresses it). Rendering is deterministic (fixed MIME
+boundary and gzip mtime), so unchanged inputs never show up as a diff, and memoized by
+content hash, in memory and on disk, so previews don't redo the work.
+
+Link: https://cloudinit.readthedocs.io/en/latest/explanation/format.html
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, asdict
+from email.charset import Charset
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, Mapping, Optional, Sequence
+
+import pulumi
+
+# EC2 rejects user data larger than 16 KB (before base64 encoding).
+USER_DATA_LIMIT = 16 * 1024
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".user-data-cache")
+
+_PLACEHOLDER = re.compile(r"{{\s*([A-Za-z_][A-Za-z0-9_]*)\s*}}")
+_cache: Dict[str, "RenderedUserData"] = {}
+
+@dataclass(frozen=True)
+class UserDataPart:
+    """
+    A part of a multipart cloud-init document, i.e: a shell script or a cloud-config.
+    """
+    content: str
+    content_type: str = "text/x-shellscript"
+    filename: str = "user_data.sh"
+
+@dataclass(frozen=True)
+class RenderedUserData:
+    """
+    Rendered user data, ready for `user_data` (launch template) or `user_data_base64` (instance).
+    """
+    base64: str
+    digest: str
+    raw_size: int
+    compressed_size: int
+    limit: int = USER_DATA_LIMIT
+
+    @property
+    def usage(self) -> float:
+        return self.compressed_size / self.limit
+
+    def report(self) -> Dict[str, float]:
+        return { "raw_size": self.raw_size, "compressed_size": self.compressed_size, "limit": self.limit, "usage": round(self.usage, 3) }
+
+def render_template(path: str, values: Mapping[str, object]) -> str:
+    """
+    Read a script and replace its `{{ name }}` placeholders with the given values.
+
+    :param path: Path to the script template.
+    :param values: Values for the placeholders, every placeholder must have one.
+    """
+    with open(path) as fh: template = fh.read()
+    missing = sorted({ name for name in _PLACEHOLDER.findall(template) if name not in values })
+    if missing: raise KeyError(f"No value for placeholder(s) {missing} in {path}")
+    return _PLACEHOLDER.sub(lambda match: str(values[match.group(1)]), template)
+
+def _digest(parts: Sequence[UserDataPart], compress: bool) -> str:
+    payload = json.dumps({ "parts": [asdict(part) for part in parts], "compress": compress }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _assemble(parts: Sequence[UserDataPart], boundary: str) -> bytes:
+    # Keep the scripts as 8bit text rather than base64, it compresses much better
+    charset = Charset("utf-8")
+    charset.body_encoding = None
+    document = MIMEMultipart("mixed", boundary=boundary)
+    for part in parts:
+        _, subtype = part.content_type.split("/", 1)
+        mime_part = MIMEText(part.content, subtype, charset)
+        mime_part.add_header("Content-Disposition", "attachment", filename=part.filename)
+        document.attach(mime_part)
+    return document.as_bytes()
+
+def render_user_data(
+        parts: Sequence[UserDataPart],
+        compress: bool = True,
+        cache_dir: Optional[str] = CACHE_DIR,
+        limit: int = USER_DATA_LIMIT,
+    ) -> RenderedUserData:
+    """
+    Assemble the parts into a (gzip compressed) multipart cloud-init document.
+
+    Raises a ValueError if the result exceeds the EC2 user data limit.
+
+    :param parts: The parts of the document, run by cloud-init in order.
+    :param compress: Whether to gzip the document.
+    :param cache_dir: Where to keep rendered documents across runs, or None to only memoize in memory.
+    :param limit: The user data size limit, in bytes.
+    """
+    digest = _digest(parts, compress)
+    if digest in _cache: return _cache[digest]
+
+    cache_file = os.path.join(cache_dir, f"{digest}.json") if cache_dir else None
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file) as fh: rendered = RenderedUserData(**json.load(fh))
+    else:
+        document = _assemble(parts, boundary=f"==user-data-{digest[:16]}==")
+        payload = gzip.compress(document, compresslevel=9, mtime=0) if compress else document
+        rendered = RenderedUserData(
+            base64=base64.b64encode(payload).decode(),
+            digest=digest,
+            raw_size=len(document),
+            compressed_size=len(payload),
+            limit=limit,
+        )
+        if cache_file:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file, "w") as fh: json.dump(asdict(rendered), fh)
+
+    if rendered.compressed_size > limit:
+        raise ValueError(f"User data is {rendered.compressed_size} bytes ({rendered.raw_size} bytes uncompressed), over the {limit} bytes limit")
+    if rendered.usage > 0.9:
+        pulumi.log.warn(f"User data is {rendered.compressed_size} bytes, {rendered.usage:.0%} of the {limit} bytes limit")
+
+    _cache[digest] = rendered
+    return rendered
@@ -313,6 +313,10 @@ class Vpc(pulumi.ComponentResource):
                         parent=self.flow_logs_role
                     ))
 
+# Interface endpoints to pull container images (ECR), invoke SageMaker endpoints, assume roles (STS)
+# and ship logs (CloudWatch Logs) from private subnets. ECR image layers come from S3, over the gateway endpoint.
+INTERFACE_ENDPOINTS = ["ecr.api", "ecr.dkr", "sagemaker.runtime", "sts", "logs"]
+
 class VpcxArgs:
     """
     The arguments necessary to construct a `Vpcx` resource.
@@ -325,6 +329,9 @@ class VpcxArgs:
             aws_region: pulumi.Input[str] = aws.get_region().name,
             sg_ingress_ports: Optional[pulumi.Input[Sequence[pulumi.Input[int]]]] = [22, 80, 443],
             tags: Optional[pulumi.Input[Mapping[str, pulumi.Input[str]]]] = {},
+            create_s3_endpoint: bool = True,
+            create_dynamodb_endpoint: bool = True,
+            interface_endpoints: Optional[Sequence[str]] = [],
         ):
         """
         Constructs a VpcxArgs.
@@ -334,13 +341,18 @@ class VpcxArgs:
         :param aws_region: The name of a AWS Region for the VPC.
         :param sg_ingress_ports: Ingress ports for Security groups.
         :param tags: Tags which are applied to all taggable resources.
+        :param create_s3_endpoint: Whether or not to create a gateway VPC endpoint and routes for S3 access.
+        :param create_dynamodb_endpoint: Whether or not to create a gateway VPC endpoint and routes for DynamoDB access.
+        :param interface_endpoints: Services to reach over interface VPC endpoints with private DNS, i.e: `INTERFACE_ENDPOINTS`.
         """
         self.vpc_cidr_block = vpc_cidr_block
-        self.azs = [azs] if isinstance(azs, pulumi.Input[str]) else azs
-        # self.azs = azs
+        self.azs = [azs] if isinstance(azs, str) else azs
         self.aws_region = aws_region
         self.sg_ingress_ports = sg_ingress_ports
         self.tags = tags
+        self.create_s3_endpoint = create_s3_endpoint
+        self.create_dynamodb_endpoint = create_dynamodb_endpoint
+        self.interface_endpoints = interface_endpoints
 
 class Vpcx(pulumi.ComponentResource):
     """
@@ -350,13 +362,14 @@ class Vpcx(pulumi.ComponentResource):
       - An Internet gateway
       - Subnets of appropriate sizes for public and private subnets, for each availability zone specified
       - A route table routing traffic from public subnets to the internet gateway
-      - NAT gateways (and accoutrements) for each private subnet, and appropriate routing
-      - Optionally, S3 and DynamoDB endpoints
+      - No NAT gateways: AWS services are reached over VPC endpoints instead
+      - Optionally, S3 and DynamoDB gateway endpoints on every route table
+      - Optionally, interface endpoints with private DNS (i.e: ECR, SageMaker runtime, STS, CloudWatch Logs) in the private subnets
 
     ### Example Usage
 
     ```python
-    from vpc import Vpcx, VpcxArgs
+    from vpc import INTERFACE_ENDPOINTS, Vpcx, VpcxArgs
     import pulumi
     import pulumi_aws as aws
 
@@ -370,6 +383,9 @@ class Vpcx(pulumi.ComponentResource):
         tags={
             "Project": "Python Example VPC",
         },
+        create_s3_endpoint=True,
+        create_dynamodb_endpoint=True,
+        interface_endpoints=INTERFACE_ENDPOINTS,
     ))
 
     pulumi.export("vpc_id", net.vpc.id)
@@ -417,6 +433,9 @@ class Vpcx(pulumi.ComponentResource):
                     strategy=awsx.ec2.NatGatewayStrategy.NONE,
                 ),
                 subnet_strategy=awsx.ec2.SubnetAllocationStrategy.AUTO,
+                # Required by the private DNS names of the interface endpoints
+                enable_dns_hostnames=True,
+                enable_dns_support=True,
                 tags={ "Name": vpc_name, **args.tags },
             ),
             opts=pulumi.ResourceOptions( parent=self ),
@@ -452,9 +471,62 @@ class Vpcx(pulumi.ComponentResource):
             opts=pulumi.ResourceOptions( parent=self ),
         )
 
+        # Keep the S3 and DynamoDB traffic (i.e: datasets, model weights, ECR layers) on the AWS network, with no NAT
+        # throughput cap or data processing charge. Gateway endpoints are free, and routed from every route table.
+        self.gateway_endpoints: dict[str, aws.ec2.VpcEndpoint] = dict()
+        route_table_ids = self.vpc.route_tables.apply(lambda route_tables: pulumi.Output.all(*[rt.id for rt in route_tables]))
+        for service, enabled in (("s3", args.create_s3_endpoint), ("dynamodb", args.create_dynamodb_endpoint)):
+            if not enabled:
+                continue
+            self.gateway_endpoints[service] = aws.ec2.VpcEndpoint(
+                f"{name}-{service}-endpoint",
+                vpc_id=self.vpc.vpc_id,
+                service_name=pulumi.Output.concat("com.amazonaws.", args.aws_region, f".{service}"),
+                vpc_endpoint_type="Gateway",
+                route_table_ids=route_table_ids,
+                tags={ "Name": f"{project_name}-{service}-endpoint", **args.tags },
+                opts=pulumi.ResourceOptions( parent=self ),
+            )
+
+        # Reach the other AWS APIs from the private subnets over interface endpoints (one network interface per AZ).
+        # Private DNS resolves the public service names (i.e: api.ecr.<region>.amazonaws.com) to them, so SDKs need no change.
+        self.interface_endpoints: dict[str, aws.ec2.VpcEndpoint] = dict()
+        self.endpoint_security_group = None
+        if args.interface_endpoints:
+            endpoint_security_group_name = f"{project_name}-endpoints-security-group"
+            self.endpoint_security_group = aws.ec2.SecurityGroup(
+                endpoint_security_group_name,
+                vpc_id=self.vpc.vpc_id,
+                ingress=[
+                    aws.ec2.SecurityGroupIngressArgs(
+                        from_port=443,
+                        to_port=443,
+                        protocol="tcp",
+                        cidr_blocks=[args.vpc_cidr_block],
+                    ),
+                ],
+                egress=egress_sg,
+                tags={ "Name": endpoint_security_group_name, **args.tags },
+                opts=pulumi.ResourceOptions( parent=self ),
+            )
+
+            for service in args.interface_endpoints:
+                self.interface_endpoints[service] = aws.ec2.VpcEndpoint(
+                    f"{name}-{service.replace('.', '-')}-endpoint",
+                    vpc_id=self.vpc.vpc_id,
+                    service_name=pulumi.Output.concat("com.amazonaws.", args.aws_region, f".{service}"),
+                    vpc_endpoint_type="Interface",
+                    private_dns_enabled=True,
+                    subnet_ids=self.vpc.private_subnet_ids,
+                    security_group_ids=[self.endpoint_security_group.id],
+                    tags={ "Name": f"{project_name}-{service.replace('.', '-')}-endpoint", **args.tags },
+                    opts=pulumi.ResourceOptions( parent=self ),
+                )
+
         super().register_outputs({
             "vpc_id": self.vpc.vpc_id,
             "security_group_id": self.security_group.id,
             "public_subnet_ids": self.vpc.public_subnet_ids,
             "private_subnet_ids": self.vpc.private_subnet_ids,
+            "vpc_endpoint_ids": { service: endpoint.id for service, endpoint in {**self.gateway_endpoints, **self.interface_endpoints}.items() },
         })
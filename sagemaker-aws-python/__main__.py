@@ -18,26 +18,111 @@ Exports:
 
 # Import required modules
 import pulumi
-from huggingface_llm import HuggingFaceLlm
+from json import loads
+from pulumi_aws import config as aws_config
+from huggingface_llm import AsyncInference, AutoScaling, HuggingFaceLlm, Monitoring, ScheduledScaling, Variant
+from model_artifacts import ModelArtifacts
+
+# Get some configuration values or set default values.
+config = pulumi.Config()
+instance_type = config.get('instanceType') if config.get('instanceType') is not None else 'ml.g5.2xlarge'
+model_id = config.get('modelId') if config.get('modelId') is not None else 'NousResearch/Llama-2-7b-chat-hf'
+stage_model = config.get_bool('stageModel') if config.get_bool('stageModel') is not None else False  # needs huggingface-cli and the aws cli where pulumi runs
+model_revision = config.get('modelRevision') if config.get('modelRevision') is not None else 'main'  # a commit hash pins the weights
+model_bucket = config.get('modelBucket')  # defaults to a new bucket
+enable_autoscaling = config.get_bool('enableAutoscaling') if config.get_bool('enableAutoscaling') is not None else False
+min_instances = config.get_int('minInstances') if config.get_int('minInstances') is not None else 1
+max_instances = config.get_int('maxInstances') if config.get_int('maxInstances') is not None else 4
+scaling_metric = config.get('scalingMetric') if config.get('scalingMetric') is not None else 'invocations'  # 'invocations' or 'concurrency'
+scaling_target = config.get_float('scalingTarget') if config.get_float('scalingTarget') is not None else (70.0 if scaling_metric == 'invocations' else 4.0)
+scaling_schedules = config.get('scalingSchedules') if config.get('scalingSchedules') is not None else []  # i.e: [{"name": "business-hours", "schedule": "cron(0 8 ? * MON-FRI *)", "min_capacity": 2, "max_capacity": 8}]
+scaling_schedules = loads(scaling_schedules) if isinstance(scaling_schedules, str) else scaling_schedules
+variants = config.get('variants') if config.get('variants') is not None else []  # i.e: [{"name": "g5-xlarge", "instance_type": "ml.g5.xlarge", "weight": 1}, {"name": "g5-2xlarge", "instance_type": "ml.g5.2xlarge", "weight": 1}]
+variants = loads(variants) if isinstance(variants, str) else variants
+enable_async_inference = config.get_bool('asyncInference') if config.get_bool('asyncInference') is not None else False
+async_output_path = config.get('asyncOutputPath')  # defaults to a new bucket
+max_concurrent_invocations = config.get_int('maxConcurrentInvocationsPerInstance')  # chosen by SageMaker when not set
+enable_monitoring = config.get_bool('enableMonitoring') if config.get_bool('enableMonitoring') is not None else False
+model_latency_alarms = config.get('modelLatencyAlarmsMs') if config.get('modelLatencyAlarmsMs') is not None else {'p50': 10000, 'p90': 20000, 'p99': 30000}
+model_latency_alarms = loads(model_latency_alarms) if isinstance(model_latency_alarms, str) else model_latency_alarms
+overhead_latency_alarms = config.get('overheadLatencyAlarmsMs') if config.get('overheadLatencyAlarmsMs') is not None else {'p50': 50, 'p90': 100, 'p99': 250}
+overhead_latency_alarms = loads(overhead_latency_alarms) if isinstance(overhead_latency_alarms, str) else overhead_latency_alarms
+alarm_topic_arn = config.get('alarmTopicArn')  # i.e: an SNS topic notifying the on-call, no alarm actions when not set
+
+# Scale the endpoint between min/max instances on invocations (per minute) or in-flight requests per instance
+autoscaling = AutoScaling(
+    min_capacity=min_instances,
+    max_capacity=max_instances,
+    metric=scaling_metric,
+    target_value=scaling_target,
+    schedules=[ScheduledScaling(**schedule) for schedule in scaling_schedules],
+) if enable_autoscaling else None
+
+# Queue the requests (payloads and responses in S3, notifications on SNS/SQS) for long generations and offline jobs
+async_inference = AsyncInference(
+    output_s3_uri=async_output_path,
+    max_concurrent_invocations_per_instance=max_concurrent_invocations,
+) if enable_async_inference else None
+
+# Alarm on the latency percentiles of each variant, and chart the endpoint on a dashboard
+monitoring = Monitoring(
+    model_latency_ms=model_latency_alarms,
+    overhead_latency_ms=overhead_latency_alarms,
+    alarm_actions=[alarm_topic_arn] if alarm_topic_arn else [],
+) if enable_monitoring else None
+
+# Stage the model weights in S3 once, so instances (and every scale out) load them from S3 instead of the Hub
+model_artifacts = ModelArtifacts(
+    'Llama2Weights',
+    model_id=model_id,
+    revision=model_revision,
+    bucket_name=model_bucket,
+) if stage_model else None
 
 # Initialize the HuggingFaceLlm component with the required configurations
 # Note: 'Llama2Llm' is a custom name given to this particular LLM instance.
 llm = HuggingFaceLlm(
     'Llama2Llm',  # Custom name for the LLM model
-    instance_type='ml.m5.xlarge',  # AWS instance type for SageMaker deployment
-    # instance_type='ml.g5.xlarge',  # AWS instance type for SageMaker deployment
+    instance_type=instance_type,  # AWS instance type for SageMaker deployment, i.e: 'ml.g5.2xlarge'
+    variants=[Variant(**variant) for variant in variants],  # Instance types and traffic weights to compare behind the endpoint (empty for a single variant)
+    # SM_NUM_GPUS, MAX_BATCH_TOTAL_TOKENS, MAX_BATCH_PREFILL_TOKENS and HF_MODEL_QUANTIZE are derived
+    # from the instance type GPUs and the model size (see `tgi_config.py`), set them here to override.
     environment_variables={
-        'HF_MODEL_ID': 'NousResearch/Llama-2-7b-chat-hf',  # HuggingFace model ID
-        'SM_NUM_GPUS': '1',  # Number of GPUs to use
+        'HF_MODEL_ID': model_id,  # HuggingFace model ID
         'MAX_INPUT_LENGTH': '2048',  # Maximum input length for the model
         'MAX_TOTAL_TOKENS': '4096',  # Maximum number of tokens
-        'MAX_BATCH_TOTAL_TOKENS': '8192',  # Maximum tokens in a batch
     },
     tgi_version='0.9.3',  # TGI version for the backend
     pytorch_version='2.0.1',  # PyTorch version to use
-    startup_health_check_timeout_in_seconds=600  # Health check timeout in seconds
+    startup_health_check_timeout_in_seconds=600,  # Health check timeout in seconds
+    autoscaling=autoscaling,  # Autoscaling options (None for a single instance)
+    model_artifacts=model_artifacts,  # Pre-staged weights (None to download from the Hub)
+    async_inference=async_inference,  # Asynchronous inference options (None for a real-time endpoint)
+    monitoring=monitoring,  # Latency percentile alarms and dashboard (None for no monitoring)
 )
 
 # Export the endpoint name for external access
 # This will be available as an output after successful pulumi up
 pulumi.export('EndpointName', llm.endpoint.name)
+pulumi.export('TgiEnvironment', llm.tgi_environment)
+pulumi.export('Variants', {variant.name: {'instance_type': variant.instance_type, 'weight': variant.weight} for variant in llm.variants})
+if llm.dashboard:
+    pulumi.export('DashboardUrl', llm.dashboard.dashboard_name.apply(
+        lambda dashboard_name: f'https://console.aws.amazon.com/cloudwatch/home?region={aws_config.region}#dashboards:name={dashboard_name}'))
+if async_inference:
+    pulumi.export('AsyncInference', {
+        'input_path': llm.async_input_path,
+        'output_path': llm.async_output_path,
+        'failure_path': llm.async_failure_path,
+        'notification_queue_url': llm.notification_queue.url if llm.notification_queue else None,
+    })
+if model_artifacts:
+    pulumi.export('ModelArtifacts', model_artifacts.s3_uri)
+if llm.scalable_target:
+    pulumi.export('Autoscaling', {
+        'min_capacity': llm.scalable_target.min_capacity,
+        'max_capacity': llm.scalable_target.max_capacity,
+        'metric': scaling_metric,
+        'target_value': scaling_target,
+        'schedules': [schedule['name'] for schedule in scaling_schedules],
+    })
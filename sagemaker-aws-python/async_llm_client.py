@@ -0,0 +1,307 @@
+"""
+An async client to fan out many prompts to a Hugging Face LLM (TGI) endpoint.
+
+This Python module wraps `LlmClient` for asyncio, with:
+    - A shared connection pool: one SageMaker client and a bounded thread pool for all the requests
+    - Retries with exponential backoff and full jitter on throttling and transient errors
+    - Admission control: a limiter keeping the tokens in flight (prompt + `max_new_tokens`) under the
+      `MAX_BATCH_TOTAL_TOKENS` of the endpoint, shrunk on throttling and grown back on success (AIMD)
+    - Optional micro-batching: small prompts arriving within a few milliseconds are sent as one
+      request with a list of inputs (only for containers accepting batched inputs, TGI batches
+      concurrent requests on its own)
+    - An optional prompt-response cache (`response_cache.py`), checked before admission, with
+      identical requests in flight coalesced into one
+
+Usage:
+    client = AsyncLlmClient(endpoint_name='Llama2Llm-endpoint-1234567', region='us-east-1', max_batch_total_tokens=18432)
+    responses = await client.generate_many(prompts, max_new_tokens=64)
+    print(client.stats)
+    client.close()
+"""
+
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from llm_client import LlmClient
+from response_cache import ResponseCache
+
+# Rough number of characters per token, to estimate the tokens of a prompt without a tokenizer.
+CHARS_PER_TOKEN = 4
+
+THROTTLING_CODES = {'ThrottlingException', 'TooManyRequestsException', 'Throttling'}
+TRANSIENT_CODES = {'ModelNotReadyException', 'ServiceUnavailable', 'InternalFailure', 'InternalServerError'}
+
+
+def estimate_tokens(prompt: str) -> int:
+    """A rough estimate of the number of tokens of a prompt."""
+    return max(1, len(prompt) // CHARS_PER_TOKEN)
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    """
+    'throttled', 'transient' or None (not retryable), from a botocore `ClientError` or an `urllib` `HTTPError`.
+
+    A `ModelError` (HTTP 424) wraps the response of the container, so its `OriginalStatusCode` is
+    classified instead: 429 when TGI is out of capacity, 5xx when the container is overloaded or restarting.
+    """
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code')
+        status = response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        if code == 'ModelError' and response.get('OriginalStatusCode') is not None:
+            status = int(response['OriginalStatusCode'])
+    else:
+        code, status = None, getattr(error, 'code', None)
+    if code in THROTTLING_CODES or status == 429:
+        return 'throttled'
+    if code in TRANSIENT_CODES or (isinstance(status, int) and 500 <= status < 600) or isinstance(error, (ConnectionError, TimeoutError)):
+        return 'transient'
+    return None
+
+
+class TokenBudgetLimiter:
+    """
+    Admits requests while the tokens in flight fit the budget (the `MAX_BATCH_TOTAL_TOKENS` of the endpoint).
+
+    The budget is multiplied by `decrease` on throttling and grows back by `increase` (share of the
+    maximum) on every success, so the client settles just under what the endpoint absorbs.
+    """
+    def __init__(self, max_tokens: int, min_tokens: Optional[int] = None, increase: float = 0.02, decrease: float = 0.7):
+        """
+        Parameters:
+            max_tokens: The maximum tokens in flight.
+            min_tokens: The budget never shrinks below it (default is 10% of `max_tokens`).
+            increase: Budget growth on success, as a share of `max_tokens`.
+            decrease: Budget factor on throttling.
+        """
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens or max(1, max_tokens // 10)
+        self.budget = float(max_tokens)
+        self.in_flight = 0
+        self.increase = increase
+        self.decrease = decrease
+        self.condition = asyncio.Condition()
+
+    async def acquire(self, tokens: int) -> int:
+        """Wait until `tokens` fit the budget, and reserve them. Returns the reserved tokens."""
+        async with self.condition:
+            # A request larger than the budget runs alone
+            await self.condition.wait_for(lambda: self.in_flight == 0 or self.in_flight + tokens <= self.budget)
+            self.in_flight += tokens
+            return tokens
+
+    async def release(self, tokens: int):
+        async with self.condition:
+            self.in_flight -= tokens
+            self.condition.notify_all()
+
+    def on_success(self):
+        self.budget = min(self.max_tokens, self.budget + self.increase * self.max_tokens)
+
+    def on_throttle(self):
+        self.budget = max(self.min_tokens, self.budget * self.decrease)
+
+
+@dataclass
+class ClientStats:
+    """
+    Counters of the client.
+
+    Attributes:
+        requests: Requests sent to the endpoint (a micro-batch is one request).
+        prompts: Prompts completed.
+        retries: Retried requests.
+        throttled: Throttled requests.
+        failures: Requests failed after the retries.
+        batches: Micro-batches sent.
+        coalesced: Prompts answered by an identical request already in flight.
+    """
+    requests: int = 0
+    prompts: int = 0
+    retries: int = 0
+    throttled: int = 0
+    failures: int = 0
+    batches: int = 0
+    coalesced: int = 0
+
+
+class AsyncLlmClient:
+    """
+    An asyncio client for the LLM endpoint, see the module docstring.
+
+    Methods:
+        generate: Generate the response of one prompt.
+        generate_many: Generate the responses of many prompts, in order.
+        close: Shut the thread pool down.
+    """
+    def __init__(
+            self,
+            endpoint_name: Optional[str] = None,
+            url: Optional[str] = None,
+            region: Optional[str] = None,
+            max_connections: int = 32,
+            max_batch_total_tokens: int = 8192,
+            max_attempts: int = 6,
+            base_delay: float = 0.2,
+            max_delay: float = 20.0,
+            micro_batch: bool = False,
+            batch_window_ms: float = 5.0,
+            max_batch_size: int = 8,
+            small_prompt_tokens: int = 128,
+            cache: Optional[ResponseCache] = None,
+            model_id: Optional[str] = None,
+            target_variant: Optional[str] = None,
+    ):
+        """
+        Parameters:
+            endpoint_name: Name of the SageMaker endpoint.
+            url: Base URL of a TGI server instead, i.e: the local stub.
+            region: AWS region of the endpoint.
+            max_connections: Size of the connection pool (and of the thread pool).
+            max_batch_total_tokens: The `MAX_BATCH_TOTAL_TOKENS` of the endpoint (see the `TgiEnvironment` stack output).
+            max_attempts: Attempts per request, including the first one.
+            base_delay: Backoff of the first retry, in seconds (doubled on every retry, with full jitter).
+            max_delay: Maximum backoff, in seconds.
+            micro_batch: Send small prompts together as one request with a list of inputs.
+            batch_window_ms: How long a micro-batch waits for more prompts, in milliseconds.
+            max_batch_size: Maximum number of prompts of a micro-batch.
+            small_prompt_tokens: Prompts up to this estimated size are micro-batched.
+            cache: Cache of the deterministic responses, hits don't take any token budget.
+            model_id: Model id of the cache keys (default is the endpoint name or url).
+            target_variant: Send the requests to this production variant instead of splitting them by weight.
+        """
+        # Retries are handled here (with the limiter), not by boto3
+        self.client = LlmClient(endpoint_name=endpoint_name, url=url, region=region, max_connections=max_connections, max_attempts=1, model_id=model_id, target_variant=target_variant)
+        self.executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='llm')
+        self.max_batch_total_tokens = max_batch_total_tokens
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.micro_batch = micro_batch
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.small_prompt_tokens = small_prompt_tokens
+        self.cache = cache
+        self.model_id = self.client.model_id
+        self.stats = ClientStats()
+        self._limiter: Optional[TokenBudgetLimiter] = None
+        self._pending: Dict[Tuple, List[Tuple[str, asyncio.Future]]] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def limiter(self) -> TokenBudgetLimiter:
+        # Created lazily, inside the running event loop
+        if self._limiter is None:
+            self._limiter = TokenBudgetLimiter(self.max_batch_total_tokens)
+        return self._limiter
+
+    async def generate(self, prompt: str, **parameters) -> Any:
+        """
+        Generate the response of one prompt (the TGI result, i.e: `{'generated_text': ...}`).
+
+        Parameters:
+            prompt: The prompt.
+            parameters: TGI generation parameters, i.e: `max_new_tokens=64`.
+        """
+        key = self.cache.key(self.model_id, prompt, parameters) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None: return cached
+            # An identical request is already in flight: wait for its response instead of sending another one
+            if key in self._in_flight:
+                self.stats.coalesced += 1
+                return await asyncio.shield(self._in_flight[key])
+            self._in_flight[key] = asyncio.get_running_loop().create_future()
+            try:
+                response = await self._generate(prompt, parameters)
+                self.cache.put(key, response)
+                self._in_flight[key].set_result(response)
+                return response
+            except Exception as e:
+                self._in_flight[key].set_exception(e)
+                self._in_flight[key].exception()  # retrieved, even without waiters
+                raise
+            finally:
+                del self._in_flight[key]
+        return await self._generate(prompt, parameters)
+
+    async def _generate(self, prompt: str, parameters: dict) -> Any:
+        if self.micro_batch and estimate_tokens(prompt) <= self.small_prompt_tokens:
+            return await self._enqueue(prompt, parameters)
+        response = await self._send(prompt, parameters, estimate_tokens(prompt))
+        self.stats.prompts += 1
+        return response[0] if isinstance(response, list) and len(response) == 1 else response
+
+    async def generate_many(self, prompts: Sequence[str], return_exceptions: bool = False, **parameters) -> List[Any]:
+        """
+        Generate the responses of many prompts, in the order of the prompts.
+
+        Parameters:
+            prompts: The prompts.
+            return_exceptions: Return the errors in place of the responses instead of raising the first one.
+            parameters: TGI generation parameters, i.e: `max_new_tokens=64`.
+        """
+        return await asyncio.gather(*(self.generate(prompt, **parameters) for prompt in prompts), return_exceptions=return_exceptions)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    async def _send(self, inputs, parameters: dict, input_tokens: int) -> Any:
+        """Send one request within the token budget, retrying throttling and transient errors with jittered backoff."""
+        loop = asyncio.get_running_loop()
+        tokens = input_tokens + int(parameters.get('max_new_tokens', 20)) * (len(inputs) if isinstance(inputs, list) else 1)
+        for attempt in range(self.max_attempts):
+            reserved = await self.limiter.acquire(tokens)
+            try:
+                self.stats.requests += 1
+                response = await loop.run_in_executor(self.executor, partial(self.client.generate, inputs, **parameters))
+                self.limiter.on_success()
+                return response
+            except Exception as e:
+                kind = classify_error(e)
+                if kind == 'throttled':
+                    self.stats.throttled += 1
+                    self.limiter.on_throttle()
+                if kind is None or attempt == self.max_attempts - 1:
+                    self.stats.failures += 1
+                    raise
+                self.stats.retries += 1
+            finally:
+                await self.limiter.release(reserved)
+            await asyncio.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    async def _enqueue(self, prompt: str, parameters: dict) -> Any:
+        """Add a small prompt to the micro-batch of its parameters, flushed when full or after the batch window."""
+        key = tuple(sorted(parameters.items()))
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((prompt, future))
+        if len(batch) == 1:
+            asyncio.get_running_loop().call_later(self.batch_window, lambda: self._flush(key, batch))
+        if len(batch) >= self.max_batch_size:
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key: Tuple, batch: List[Tuple[str, asyncio.Future]]):
+        if self._pending.get(key) is not batch:
+            return
+        del self._pending[key]
+        asyncio.ensure_future(self._send_batch(batch, dict(key)))
+
+    async def _send_batch(self, batch: List[Tuple[str, asyncio.Future]], parameters: dict):
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            self.stats.batches += 1
+            responses = await self._send(prompts, parameters, sum(estimate_tokens(prompt) for prompt in prompts))
+            if not isinstance(responses, list) or len(responses) != len(prompts):
+                raise ValueError(f'Expected {len(prompts)} results for the micro-batch, got: {str(responses)[:200]}')
+            for (_, future), response in zip(batch, responses):
+                if not future.done(): future.set_result(response)
+            self.stats.prompts += len(prompts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done(): future.set_exception(e)
@@ -0,0 +1,48 @@
+"""
+Benchmark the import time of the image URI resolution, bundled tables vs the SageMaker SDK.
+
+Each import runs in a fresh interpreter (no module cache), several times, and the median is reported.
+
+Usage:
+    python3 benchmark_import.py --runs 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+CASES = {
+    'image_uris (bundled tables)': "import image_uris; image_uris.get_llm_image_uri('us-east-1', '0.9.3')",
+    'sagemaker SDK': "from sagemaker import huggingface; huggingface.get_huggingface_llm_image_uri(backend='huggingface', region='us-east-1', version='0.9.3')",
+}
+
+
+def time_import(statement: str, runs: int) -> float:
+    """The median wall time (seconds) of a fresh interpreter running `statement`."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5, help='Number of runs per case')
+    args = parser.parse_args()
+
+    baseline = time_import('pass', args.runs)
+    print(f"{'interpreter startup':<32}{baseline * 1000:>10.0f} ms")
+    for name, statement in CASES.items():
+        try:
+            elapsed = time_import(statement, args.runs)
+            print(f'{name:<32}{elapsed * 1000:>10.0f} ms  (+{(elapsed - baseline) * 1000:.0f} ms)')
+        except subprocess.CalledProcessError as e:
+            print(f'{name:<32}{"failed":>10}  {e.stderr.decode().strip().splitlines()[-1]}')
+
+
+if __name__ == "__main__":
+    main()
@@ -7,10 +7,119 @@ LLM model on Amazon SageMaker. It also sets up CloudWatch monitoring for the dep
 
 import json
 import pulumi
+from dataclasses import dataclass, field
 from pulumi import Output
-from pulumi_aws import config, iam, sagemaker, cloudwatch
-from sagemaker import huggingface
-from typing import Mapping, Optional
+from pulumi_aws import appautoscaling, config, iam, s3, sagemaker, sns, sqs, cloudwatch
+from image_uris import get_llm_image_uri
+from model_artifacts import ModelArtifacts
+from tgi_config import derive_tgi_config, resolve_environment
+from typing import Dict, List, Literal, Mapping, Optional
+
+
+@dataclass
+class ScheduledScaling:
+    """
+    A scheduled change of the endpoint capacity bounds, i.e: scale out ahead of business hours.
+
+    Attributes:
+        name: Name of the scheduled action.
+        schedule: `cron(...)`, `rate(...)` or `at(...)` expression.
+        min_capacity: Minimum number of instances from the scheduled time.
+        max_capacity: Maximum number of instances from the scheduled time.
+        timezone: Time zone of the schedule (default is 'UTC').
+    """
+    name: str
+    schedule: str
+    min_capacity: int
+    max_capacity: int
+    timezone: str = 'UTC'
+
+
+@dataclass
+class AutoScaling:
+    """
+    Autoscaling options of the endpoint variants.
+
+    Attributes:
+        min_capacity: Minimum number of instances, also a floor of the initial instance count of each variant (default is 1).
+            0 is only allowed for asynchronous inference, the endpoint then scales from zero on its backlog.
+        max_capacity: Maximum number of instances (default is 4).
+        metric: Target tracking metric, `invocations` (SageMakerVariantInvocationsPerInstance, per minute),
+            `concurrency` (ConcurrentRequestsPerModel, in-flight requests per model copy)
+            or `backlog` (ApproximateBacklogSizePerInstance, queued requests per instance, asynchronous inference only).
+        target_value: Target value of the metric per instance (default is 70 invocations per minute).
+        scale_in_cooldown: Seconds to wait after a scale in before scaling in again (default is 300).
+        scale_out_cooldown: Seconds to wait after a scale out before scaling out again (default is 60).
+        disable_scale_in: Only let the policy scale out (default is False).
+        schedules: Optional scheduled scaling actions.
+    """
+    min_capacity: int = 1
+    max_capacity: int = 4
+    metric: Literal['invocations', 'concurrency', 'backlog'] = 'invocations'
+    target_value: float = 70.0
+    scale_in_cooldown: int = 300
+    scale_out_cooldown: int = 60
+    disable_scale_in: bool = False
+    schedules: List[ScheduledScaling] = field(default_factory=list)
+
+
+@dataclass
+class Variant:
+    """
+    A production variant of the endpoint, to compare instance types behind a single endpoint.
+
+    Attributes:
+        name: Name of the variant, i.e: 'g5-2xlarge'.
+        instance_type: AWS instance type of the variant.
+        weight: Traffic weight of the variant, relative to the weights of the other variants (default is 1.0).
+        initial_instance_count: Number of instances at creation, at least the autoscaling minimum when autoscaling is enabled (default is 1).
+    """
+    name: str
+    instance_type: str
+    weight: float = 1.0
+    initial_instance_count: int = 1
+
+
+@dataclass
+class AsyncInference:
+    """
+    Asynchronous inference options: requests are queued, their payloads read from S3 and their responses written to S3.
+
+    Attributes:
+        output_s3_uri: S3 prefix of the responses, in a new bucket when not set.
+        failure_s3_uri: S3 prefix of the failed requests (default is `failures/` next to the responses).
+        notifications: Publish success and error notifications to SNS topics, subscribed by an SQS queue (default is True).
+        max_concurrent_invocations_per_instance: Requests sent to each instance at once, chosen by SageMaker when not set.
+    """
+    output_s3_uri: Optional[str] = None
+    failure_s3_uri: Optional[str] = None
+    notifications: bool = True
+    max_concurrent_invocations_per_instance: Optional[int] = None
+
+
+@dataclass
+class Monitoring:
+    """
+    CloudWatch alarms and dashboard of the endpoint.
+
+    Attributes:
+        model_latency_ms: Alarm thresholds of the ModelLatency percentiles (time spent in the container), in milliseconds.
+        overhead_latency_ms: Alarm thresholds of the OverheadLatency percentiles (time added by SageMaker), in milliseconds.
+        errors: Alarm threshold of the 5XX errors per period (default is 5).
+        period: Period of the alarms, in seconds (default is 60).
+        evaluation_periods: Periods evaluated by the alarms (default is 5).
+        datapoints_to_alarm: Breaching periods, out of the evaluated ones, to alarm (default is 3).
+        alarm_actions: ARNs notified when an alarm fires and recovers, i.e: an SNS topic.
+        dashboard: Create the CloudWatch dashboard (default is True).
+    """
+    model_latency_ms: Dict[str, float] = field(default_factory=lambda: {'p50': 10000, 'p90': 20000, 'p99': 30000})
+    overhead_latency_ms: Dict[str, float] = field(default_factory=lambda: {'p50': 50, 'p90': 100, 'p99': 250})
+    errors: float = 5
+    period: int = 60
+    evaluation_periods: int = 5
+    datapoints_to_alarm: int = 3
+    alarm_actions: List[str] = field(default_factory=list)
+    dashboard: bool = True
 
 
 class HuggingFaceLlm(pulumi.ComponentResource):
@@ -19,18 +128,43 @@ class HuggingFaceLlm(pulumi.ComponentResource):
 
     Attributes:
         endpoint: The deployed SageMaker endpoint for the model.
+        variants: The production variants of the endpoint.
+        variant_name: The name of the first variant ('primary' unless variants are given).
+        scalable_target: The Application Auto Scaling target of the first variant (when autoscaling is enabled).
+        scaling_policy: The target tracking policy of the first variant (when autoscaling is enabled).
+        scalable_targets: The Application Auto Scaling targets, by variant name.
+        scaling_policies: The target tracking policies, by variant name.
+        scheduled_actions: The scheduled scaling actions of the variants.
+        tgi_environment: The TGI environment variables of the container of the first variant (derived, then explicit).
+        tgi_environments: The TGI environment variables, by variant name.
+        async_input_path: The S3 prefix to upload the asynchronous request payloads to (asynchronous inference only).
+        async_output_path: The S3 prefix of the asynchronous responses.
+        async_failure_path: The S3 prefix of the failed asynchronous requests.
+        notification_queue: The SQS queue receiving the success and error notifications.
+        alarms: The CloudWatch alarms of the variants (when monitoring is enabled).
+        dashboard: The CloudWatch dashboard of the endpoint (when monitoring is enabled).
 
     Methods:
+        setup_autoscaling: Registers the endpoint variants with Application Auto Scaling.
         setup_cloudwatch_alarms: Sets up CloudWatch alarms for monitoring the deployed model.
+        setup_dashboard: Sets up the CloudWatch dashboard of the endpoint.
     """
     def __init__(
             self,
             name: str,
-            instance_type: str,
+            instance_type: Optional[str],
             environment_variables: Mapping[str, str],
             tgi_version: str = '0.9.3',
             pytorch_version: str = '2.0.1',
             startup_health_check_timeout_in_seconds: int = 600,
+            autoscaling: Optional[AutoScaling] = None,
+            model_parameters: Optional[float] = None,
+            model_dtype: str = 'float16',
+            derive_tgi_settings: bool = True,
+            model_artifacts: Optional[ModelArtifacts] = None,
+            variants: Optional[List[Variant]] = None,
+            async_inference: Optional[AsyncInference] = None,
+            monitoring: Optional[Monitoring] = None,
             opts: Optional[pulumi.ResourceOptions] = None
     ):
         """
@@ -38,25 +172,51 @@ class HuggingFaceLlm(pulumi.ComponentResource):
 
         Parameters:
             name: Name of the deployment.
-            instance_type: AWS instance type for the deployment.
+            instance_type: AWS instance type for the deployment (of the single 'primary' variant, unused with `variants`).
             environment_variables: Environment variables for the model.
             tgi_version: Version for the backend technology (default is '0.9.3').
             pytorch_version: PyTorch version for the model (default is '2.0.1').
             startup_health_check_timeout_in_seconds: Health check timeout (default is 600 seconds).
+            autoscaling: Autoscaling options, applied to every variant, which keep their instance count when not set.
+            model_parameters: Number of parameters of the model in billions, for models missing from `tgi_config.MODELS`.
+            model_dtype: dtype of the model weights (default is 'float16').
+            derive_tgi_settings: Derive GPU count, quantization and batch token budgets from the instance type (default is True).
+            model_artifacts: Weights pre-staged in S3, loaded uncompressed at startup instead of downloaded from the Hub.
+            variants: Production variants (instance types and traffic weights) behind the endpoint, a single variant when not set.
+            async_inference: Asynchronous inference options, a real-time endpoint when not set.
+            monitoring: Latency percentile alarms and dashboard, no monitoring when not set.
             opts: Additional options for the Pulumi resource.
         """
         super().__init__('huggingface:llm:HuggingFaceLlm', name, None, opts)
 
-        # Merge environment variables with optional version specifications
-        extended_env_vars = {
-            **environment_variables,
-            'TGI_VERSION': tgi_version,
-            'PYTORCH_VERSION': pytorch_version
+        if not variants and not instance_type:
+            raise ValueError('Either instance_type or variants is required')
+        self.variants = variants or [Variant(name='primary', instance_type=instance_type)]
+        names = [variant.name for variant in self.variants]
+        if len(set(names)) != len(names):
+            raise ValueError(f'Duplicate variant names: {names}')
+        self.variant_name = self.variants[0].name
+        self.scalable_target = None
+        self.scaling_policy = None
+        self.scalable_targets = {}
+        self.scaling_policies = {}
+        self.scheduled_actions = []
+        self.async_input_path = None
+        self.async_output_path = None
+        self.async_failure_path = None
+        self.notification_queue = None
+        self.alarms = []
+        self.dashboard = None
+
+        # Derive the TGI settings of each variant from its instance GPUs and the model size, explicit environment variables win
+        self.tgi_environments = {
+            variant.name: self.derive_tgi_environment(variant.instance_type, environment_variables, model_parameters, model_dtype, tgi_version) if derive_tgi_settings else dict(environment_variables)
+            for variant in self.variants
         }
+        self.tgi_environment = self.tgi_environments[self.variant_name]
 
-        # Fetch the container image URI
-        container_image = huggingface.get_huggingface_llm_image_uri(
-            backend='huggingface',
+        # Fetch the container image URI (bundled tables, the SageMaker SDK is only imported for unknown combinations)
+        container_image = get_llm_image_uri(
             region=config.region,
             version=tgi_version
         )
@@ -75,28 +235,64 @@ class HuggingFaceLlm(pulumi.ComponentResource):
             opts=pulumi.ResourceOptions(parent=self)
         )
 
-        # Create a SageMaker model
-        sage_maker_model = sagemaker.Model(f'{name}-model',
-            execution_role_arn=role.arn,
-            primary_container=sagemaker.ModelContainerArgs(
-                image=container_image,
-                environment=extended_env_vars
-            ),
-            opts=pulumi.ResourceOptions(parent=self)
-        )
+        # Load the pre-staged weights from S3 as is (no model.tar.gz to download and extract)
+        model_data_source = None
+        depends_on = []
+        if model_artifacts:
+            model_data_source = sagemaker.ModelContainerModelDataSourceArgs(
+                s3_data_source=sagemaker.ModelContainerModelDataSourceS3DataSourceArgs(
+                    s3_uri=model_artifacts.s3_uri,
+                    s3_data_type='S3Prefix',
+                    compression_type='None',
+                ),
+            )
+            depends_on = [model_artifacts.stage, model_artifacts.grant_read(f'{name}-model-artifacts-read', role)]
+
+        # Queue the requests, read their payloads from S3 and write the responses to S3
+        async_inference_config = None
+        if async_inference:
+            async_inference_config, async_policy = self.setup_async_inference(name, async_inference, role)
+            depends_on = depends_on + [async_policy]
+
+        # Create a SageMaker model per variant (the first one keeps the resource names of a single variant endpoint)
+        production_variants = []
+        for index, variant in enumerate(self.variants):
+            prefix = self.variant_prefix(name, index)
+
+            # Merge environment variables with optional version specifications
+            extended_env_vars = {
+                **self.tgi_environments[variant.name],
+                'TGI_VERSION': tgi_version,
+                'PYTORCH_VERSION': pytorch_version
+            }
+            # SageMaker copies the pre-staged weights to /opt/ml/model, TGI loads them from there
+            if model_artifacts:
+                extended_env_vars['HF_MODEL_ID'] = '/opt/ml/model'
+
+            sage_maker_model = sagemaker.Model(f'{prefix}-model',
+                execution_role_arn=role.arn,
+                primary_container=sagemaker.ModelContainerArgs(
+                    image=container_image,
+                    environment=extended_env_vars,
+                    model_data_source=model_data_source
+                ),
+                opts=pulumi.ResourceOptions(parent=self, depends_on=depends_on)
+            )
+
+            production_variants.append(sagemaker.EndpointConfigurationProductionVariantArgs(
+                model_name=sage_maker_model.name,
+                variant_name=variant.name,
+                initial_variant_weight=variant.weight,
+                # The autoscaling minimum is a floor, asynchronous endpoints scaling from zero start with the variant count
+                initial_instance_count=max(variant.initial_instance_count, autoscaling.min_capacity) if autoscaling else variant.initial_instance_count,
+                instance_type=variant.instance_type,
+                container_startup_health_check_timeout_in_seconds=startup_health_check_timeout_in_seconds
+            ))
 
         # Configure the SageMaker endpoint
         cfn_endpoint_config = sagemaker.EndpointConfiguration(f'{name}-config',
-            production_variants=[
-                sagemaker.EndpointConfigurationProductionVariantArgs(
-                    model_name=sage_maker_model.name,
-                    variant_name='primary',
-                    initial_variant_weight=1.0,
-                    initial_instance_count=1,
-                    instance_type=instance_type,
-                    container_startup_health_check_timeout_in_seconds=startup_health_check_timeout_in_seconds
-                ),
-            ],
+            production_variants=production_variants,
+            async_inference_config=async_inference_config,
             opts=pulumi.ResourceOptions(parent=self)
         )
 
@@ -106,49 +302,377 @@ class HuggingFaceLlm(pulumi.ComponentResource):
             opts=pulumi.ResourceOptions(parent=self)
         )
 
-        # Set up CloudWatch alarms for monitoring
-        # self.setup_cloudwatch_alarms(self.endpoint.name)
+        # Scale the variants with the traffic
+        if autoscaling:
+            self.setup_autoscaling(name, autoscaling, asynchronous=async_inference is not None)
+
+        # Set up CloudWatch alarms and dashboard for monitoring
+        if monitoring:
+            self.setup_cloudwatch_alarms(name, monitoring)
+            if monitoring.dashboard:
+                self.setup_dashboard(name, monitoring, asynchronous=async_inference is not None)
+
+    def variant_prefix(self, name: str, index: int) -> str:
+        """The prefix of the resource names of a variant, the first one keeps the names of a single variant endpoint."""
+        return name if index == 0 else f'{name}-{self.variants[index].name}'
 
-    def setup_cloudwatch_alarms(self, endpoint_name: Output[str]):
+    def derive_tgi_environment(self, instance_type: str, environment_variables: Mapping[str, str], model_parameters: Optional[float], model_dtype: str, tgi_version: str) -> dict:
         """
-        Set up CloudWatch alarms for monitoring the SageMaker endpoint.
+        The TGI environment variables of an instance type: derived from its GPUs and the model size, explicit ones win.
 
-        Creates two alarms:
-        - One for high latency
-        - One for high error rates
+        Parameters:
+            instance_type: AWS instance type.
+            environment_variables: Explicit environment variables for the model.
+            model_parameters: Number of parameters of the model in billions.
+            model_dtype: dtype of the model weights.
+            tgi_version: Version of the TGI container, which sets the quantization modes.
+        """
+        tgi = derive_tgi_config(
+            instance_type,
+            environment_variables.get('HF_MODEL_ID'),
+            parameters=model_parameters,
+            dtype=model_dtype,
+            max_input_length=int(environment_variables.get('MAX_INPUT_LENGTH', 2048)),
+            max_total_tokens=int(environment_variables.get('MAX_TOTAL_TOKENS', 4096)),
+            tgi_version=tgi_version,
+        )
+        derived_budget = tgi.environment.get('MAX_BATCH_TOTAL_TOKENS')
+        environment, warnings = resolve_environment(tgi.environment, environment_variables, int(derived_budget) if derived_budget else None)
+        for warning in tgi.warnings + warnings:
+            pulumi.log.warn(warning, resource=self)
+        return environment
+
+    def setup_async_inference(self, name: str, async_inference: AsyncInference, role: iam.Role):
+        """
+        Set up asynchronous inference.
+
+        Creates:
+        - A private bucket for the request payloads, responses and failures (unless an output path is given)
+        - SNS success and error topics, subscribed by an SQS queue (with notifications)
+        - A role policy letting SageMaker read and write the bucket and publish to the topics
+
+        Returns the async inference config of the endpoint configuration and the role policy.
 
         Parameters:
-            endpoint_name: The name of the SageMaker endpoint to monitor.
+            name: Name of the deployment.
+            async_inference: Asynchronous inference options.
+            role: The SageMaker execution role.
         """
+        if async_inference.output_s3_uri:
+            bucket_name = Output.from_input(async_inference.output_s3_uri.removeprefix('s3://').split('/')[0])
+            self.async_output_path = Output.from_input(async_inference.output_s3_uri)
+        else:
+            bucket = s3.BucketV2(f'{name}-async-bucket',
+                force_destroy=True,
+                opts=pulumi.ResourceOptions(parent=self)
+            )
+            s3.BucketPublicAccessBlock(f'{name}-async-public-access-block',
+                bucket=bucket.id,
+                block_public_acls=True,
+                block_public_policy=True,
+                ignore_public_acls=True,
+                restrict_public_buckets=True,
+                opts=pulumi.ResourceOptions(parent=self)
+            )
+            bucket_name = bucket.bucket
+            self.async_output_path = bucket_name.apply(lambda bucket: f's3://{bucket}/async/output/')
+        self.async_failure_path = Output.from_input(async_inference.failure_s3_uri) if async_inference.failure_s3_uri else \
+            self.async_output_path.apply(lambda uri: f"{uri.rstrip('/')}/failures/")
+        self.async_input_path = bucket_name.apply(lambda bucket: f's3://{bucket}/async/input/')
+
+        notification_config = None
+        topic_arns = []
+        if async_inference.notifications:
+            topics = {kind: sns.Topic(f'{name}-async-{kind}', opts=pulumi.ResourceOptions(parent=self)) for kind in ('success', 'error')}
+            topic_arns = [topic.arn for topic in topics.values()]
+            self.notification_queue = sqs.Queue(f'{name}-async-notifications',
+                opts=pulumi.ResourceOptions(parent=self)
+            )
+            sqs.QueuePolicy(f'{name}-async-notifications-policy',
+                queue_url=self.notification_queue.id,
+                policy=Output.all(self.notification_queue.arn, *topic_arns).apply(lambda arns: json.dumps({
+                    'Version': '2012-10-17',
+                    'Statement': [{
+                        'Effect': 'Allow',
+                        'Principal': {'Service': 'sns.amazonaws.com'},
+                        'Action': 'sqs:SendMessage',
+                        'Resource': arns[0],
+                        'Condition': {'ArnEquals': {'aws:SourceArn': arns[1:]}},
+                    }],
+                })),
+                opts=pulumi.ResourceOptions(parent=self)
+            )
+            for kind, topic in topics.items():
+                sns.TopicSubscription(f'{name}-async-{kind}-subscription',
+                    topic=topic.arn,
+                    protocol='sqs',
+                    endpoint=self.notification_queue.arn,
+                    raw_message_delivery=True,
+                    opts=pulumi.ResourceOptions(parent=self)
+                )
+            notification_config = sagemaker.EndpointConfigurationAsyncInferenceConfigOutputConfigNotificationConfigArgs(
+                success_topic=topics['success'].arn,
+                error_topic=topics['error'].arn,
+            )
+
+        policy = iam.RolePolicy(f'{name}-async-inference',
+            role=role.id,
+            policy=Output.all(bucket_name, *topic_arns).apply(lambda args: json.dumps({
+                'Version': '2012-10-17',
+                'Statement': [{
+                    'Effect': 'Allow',
+                    'Action': ['s3:GetObject', 's3:PutObject', 's3:AbortMultipartUpload', 's3:ListBucket'],
+                    'Resource': [f'arn:aws:s3:::{args[0]}', f'arn:aws:s3:::{args[0]}/*'],
+                }] + ([{
+                    'Effect': 'Allow',
+                    'Action': 'sns:Publish',
+                    'Resource': list(args[1:]),
+                }] if args[1:] else []),
+            })),
+            opts=pulumi.ResourceOptions(parent=self)
+        )
+
+        async_inference_config = sagemaker.EndpointConfigurationAsyncInferenceConfigArgs(
+            output_config=sagemaker.EndpointConfigurationAsyncInferenceConfigOutputConfigArgs(
+                s3_output_path=self.async_output_path,
+                s3_failure_path=self.async_failure_path,
+                notification_config=notification_config,
+            ),
+            client_config=sagemaker.EndpointConfigurationAsyncInferenceConfigClientConfigArgs(
+                max_concurrent_invocations_per_instance=async_inference.max_concurrent_invocations_per_instance,
+            ) if async_inference.max_concurrent_invocations_per_instance else None,
+        )
+        return async_inference_config, policy
+
+    def setup_autoscaling(self, name: str, autoscaling: AutoScaling, asynchronous: bool = False):
+        """
+        Register the endpoint variants with Application Auto Scaling.
+
+        Creates, for each variant:
+        - A scalable target on the variant instance count, bounded by min/max
+        - A target tracking policy on invocations, concurrency or backlog per instance
+        - A step scaling policy out of zero instances on `HasBacklogWithoutCapacity` (asynchronous endpoints scaling to zero)
+        - The scheduled actions, if any
+
+        Parameters:
+            name: Name of the deployment.
+            autoscaling: Autoscaling options.
+            asynchronous: Whether the endpoint serves asynchronous inference.
+        """
+        if autoscaling.min_capacity < (0 if asynchronous else 1) or autoscaling.max_capacity < max(1, autoscaling.min_capacity):
+            raise ValueError(f'Invalid autoscaling capacity: min={autoscaling.min_capacity}, max={autoscaling.max_capacity}')
+        if autoscaling.metric == 'backlog' and not asynchronous:
+            raise ValueError("The 'backlog' scaling metric requires asynchronous inference")
+
+        for index, variant in enumerate(self.variants):
+            prefix = self.variant_prefix(name, index)
 
-        def create_high_latency_alarm(name: str):
-            """Create a CloudWatch alarm for high latency."""
-            cloudwatch.MetricAlarm(f"{name}-HighLatency",
-                metric_name="ModelLatency",
-                namespace="AWS/SageMaker",
-                statistic="Average",
-                period=60,
-                evaluation_periods=1,
-                threshold=100000,  # in microseconds
-                comparison_operator="GreaterThanOrEqualToThreshold",
-                alarm_description=f"High latency alarm for {name}",
+            scalable_target = appautoscaling.Target(f'{prefix}-scalable-target',
+                service_namespace='sagemaker',
+                scalable_dimension='sagemaker:variant:DesiredInstanceCount',
+                resource_id=self.endpoint.name.apply(lambda endpoint_name, variant_name=variant.name: f'endpoint/{endpoint_name}/variant/{variant_name}'),
+                min_capacity=autoscaling.min_capacity,
+                max_capacity=autoscaling.max_capacity,
                 opts=pulumi.ResourceOptions(parent=self)
             )
 
-        def create_high_errors_alarm(name: str):
-            """Create a CloudWatch alarm for high error rates."""
-            cloudwatch.MetricAlarm(f"{name}-HighErrors",
-                metric_name="ModelError",
-                namespace="AWS/SageMaker",
-                statistic="SampleCount",
-                period=60,
-                evaluation_periods=1,
-                threshold=5,
-                comparison_operator="GreaterThanOrEqualToThreshold",
-                alarm_description=f"High error rate alarm for {name}",
+            if autoscaling.metric == 'invocations':
+                metric = dict(predefined_metric_specification=appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationPredefinedMetricSpecificationArgs(
+                    predefined_metric_type='SageMakerVariantInvocationsPerInstance',
+                ))
+            else:
+                # The backlog is queued per endpoint, the concurrency is per variant
+                dimensions = {'EndpointName': self.endpoint.name} if autoscaling.metric == 'backlog' else {'EndpointName': self.endpoint.name, 'VariantName': variant.name}
+                metric = dict(customized_metric_specification=appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationCustomizedMetricSpecificationArgs(
+                    metric_name='ApproximateBacklogSizePerInstance' if autoscaling.metric == 'backlog' else 'ConcurrentRequestsPerModel',
+                    namespace='AWS/SageMaker',
+                    statistic='Average',
+                    dimensions=[
+                        appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationCustomizedMetricSpecificationDimensionArgs(
+                            name=dimension,
+                            value=value,
+                        )
+                        for dimension, value in dimensions.items()
+                    ],
+                ))
+
+            scaling_policy = appautoscaling.Policy(f'{prefix}-scaling-policy',
+                policy_type='TargetTrackingScaling',
+                service_namespace=scalable_target.service_namespace,
+                scalable_dimension=scalable_target.scalable_dimension,
+                resource_id=scalable_target.resource_id,
+                target_tracking_scaling_policy_configuration=appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationArgs(
+                    target_value=autoscaling.target_value,
+                    scale_in_cooldown=autoscaling.scale_in_cooldown,
+                    scale_out_cooldown=autoscaling.scale_out_cooldown,
+                    disable_scale_in=autoscaling.disable_scale_in,
+                    **metric
+                ),
+                opts=pulumi.ResourceOptions(parent=self)
+            )
+
+            # Target tracking doesn't scale out of zero instances: add an instance as soon as requests are queued
+            if asynchronous and autoscaling.min_capacity == 0:
+                scale_from_zero = appautoscaling.Policy(f'{prefix}-scale-from-zero',
+                    policy_type='StepScaling',
+                    service_namespace=scalable_target.service_namespace,
+                    scalable_dimension=scalable_target.scalable_dimension,
+                    resource_id=scalable_target.resource_id,
+                    step_scaling_policy_configuration=appautoscaling.PolicyStepScalingPolicyConfigurationArgs(
+                        adjustment_type='ChangeInCapacity',
+                        cooldown=autoscaling.scale_out_cooldown,
+                        metric_aggregation_type='Average',
+                        step_adjustments=[appautoscaling.PolicyStepScalingPolicyConfigurationStepAdjustmentArgs(
+                            metric_interval_lower_bound='0',
+                            scaling_adjustment=1,
+                        )],
+                    ),
+                    opts=pulumi.ResourceOptions(parent=self)
+                )
+                cloudwatch.MetricAlarm(f'{prefix}-backlog-without-capacity',
+                    metric_name='HasBacklogWithoutCapacity',
+                    namespace='AWS/SageMaker',
+                    statistic='Average',
+                    dimensions={'EndpointName': self.endpoint.name},
+                    period=60,
+                    evaluation_periods=2,
+                    threshold=1,
+                    comparison_operator='GreaterThanOrEqualToThreshold',
+                    treat_missing_data='missing',
+                    alarm_description=f'Requests queued without instances on the {variant.name} variant',
+                    alarm_actions=[scale_from_zero.arn],
+                    opts=pulumi.ResourceOptions(parent=self)
+                )
+
+            self.scheduled_actions += [
+                appautoscaling.ScheduledAction(f'{prefix}-schedule-{schedule.name}',
+                    service_namespace=scalable_target.service_namespace,
+                    scalable_dimension=scalable_target.scalable_dimension,
+                    resource_id=scalable_target.resource_id,
+                    schedule=schedule.schedule,
+                    timezone=schedule.timezone,
+                    scalable_target_action=appautoscaling.ScheduledActionScalableTargetActionArgs(
+                        min_capacity=schedule.min_capacity,
+                        max_capacity=schedule.max_capacity,
+                    ),
+                    opts=pulumi.ResourceOptions(parent=self, depends_on=[scaling_policy])
+                )
+                for schedule in autoscaling.schedules
+            ]
+            self.scalable_targets[variant.name] = scalable_target
+            self.scaling_policies[variant.name] = scaling_policy
+
+        self.scalable_target = self.scalable_targets[self.variant_name]
+        self.scaling_policy = self.scaling_policies[self.variant_name]
+
+    def setup_cloudwatch_alarms(self, name: str, monitoring: Monitoring):
+        """
+        Set up CloudWatch alarms for monitoring the SageMaker endpoint, bound to each variant
+        with the `EndpointName` and `VariantName` dimensions.
+
+        Creates, for each variant:
+        - One alarm per ModelLatency percentile (i.e: p50, p90, p99)
+        - One alarm per OverheadLatency percentile
+        - One for high 5XX error counts
+
+        Parameters:
+            name: Name of the deployment.
+            monitoring: Monitoring options.
+        """
+        for index, variant in enumerate(self.variants):
+            prefix = self.variant_prefix(name, index)
+            dimensions = {'EndpointName': self.endpoint.name, 'VariantName': variant.name}
+            alarm_options = dict(
+                namespace='AWS/SageMaker',
+                dimensions=dimensions,
+                period=monitoring.period,
+                evaluation_periods=monitoring.evaluation_periods,
+                datapoints_to_alarm=monitoring.datapoints_to_alarm,
+                comparison_operator='GreaterThanOrEqualToThreshold',
+                treat_missing_data='notBreaching',
+                alarm_actions=monitoring.alarm_actions,
+                ok_actions=monitoring.alarm_actions,
                 opts=pulumi.ResourceOptions(parent=self)
             )
 
-        # Apply the alarms to the endpoint
-        endpoint_name.apply(create_high_latency_alarm)
-        endpoint_name.apply(create_high_errors_alarm)
+            # ModelLatency and OverheadLatency are in microseconds
+            for metric_name, thresholds in (('ModelLatency', monitoring.model_latency_ms), ('OverheadLatency', monitoring.overhead_latency_ms)):
+                for percentile, threshold_ms in thresholds.items():
+                    self.alarms.append(cloudwatch.MetricAlarm(f'{prefix}-{metric_name}-{percentile}',
+                        metric_name=metric_name,
+                        extended_statistic=percentile,
+                        threshold=threshold_ms * 1000,
+                        alarm_description=f'{metric_name} {percentile} of the {variant.name} variant above {threshold_ms}ms',
+                        **alarm_options
+                    ))
+
+            self.alarms.append(cloudwatch.MetricAlarm(f'{prefix}-HighErrors',
+                metric_name='Invocation5XXErrors',
+                statistic='Sum',
+                threshold=monitoring.errors,
+                alarm_description=f'5XX errors of the {variant.name} variant above {monitoring.errors} per {monitoring.period}s',
+                **alarm_options
+            ))
+
+    def setup_dashboard(self, name: str, monitoring: Monitoring, asynchronous: bool = False):
+        """
+        Set up the CloudWatch dashboard of the endpoint, one line per variant on every widget:
+        invocations and errors, ModelLatency and OverheadLatency percentiles (with the alarm thresholds),
+        concurrency and invocations per instance, and GPU/CPU/memory/disk utilization.
+
+        Parameters:
+            name: Name of the deployment.
+            monitoring: Monitoring options.
+            asynchronous: Whether the endpoint serves asynchronous inference (adds the backlog).
+        """
+        variant_names = [variant.name for variant in self.variants]
+
+        def body(endpoint_name: str) -> str:
+            def metrics(namespace: str, metric_name: str, stat: str, label: str = '{variant}') -> list:
+                return [
+                    [namespace, metric_name, 'EndpointName', endpoint_name, 'VariantName', variant, {'stat': stat, 'label': label.format(variant=variant, stat=stat)}]
+                    for variant in variant_names
+                ]
+
+            def widget(title: str, metric_lines: list, stacked: bool = False, unit: Optional[str] = None, thresholds: Optional[Mapping[str, float]] = None, scale: float = 1) -> dict:
+                properties = {
+                    'title': title,
+                    'view': 'timeSeries',
+                    'stacked': stacked,
+                    'region': config.region,
+                    'period': monitoring.period,
+                    'metrics': metric_lines,
+                }
+                if unit:
+                    properties['yAxis'] = {'left': {'label': unit, 'showUnits': False}}
+                if thresholds:
+                    properties['annotations'] = {'horizontal': [{'label': f'{percentile} alarm', 'value': value * scale} for percentile, value in thresholds.items()]}
+                return {'type': 'metric', 'width': 12, 'height': 6, 'properties': properties}
+
+            percentiles = sorted({*monitoring.model_latency_ms, *monitoring.overhead_latency_ms}) or ['p50', 'p90', 'p99']
+            endpoint_metrics = '/aws/sagemaker/Endpoints'
+            widgets = [
+                widget('Invocations', metrics('AWS/SageMaker', 'Invocations', 'Sum'), stacked=True),
+                widget('Errors', metrics('AWS/SageMaker', 'Invocation4XXErrors', 'Sum', '{variant} 4XX') + metrics('AWS/SageMaker', 'Invocation5XXErrors', 'Sum', '{variant} 5XX')),
+                widget('ModelLatency', [line for p in percentiles for line in metrics('AWS/SageMaker', 'ModelLatency', p, '{variant} {stat}')], unit='microseconds', thresholds=monitoring.model_latency_ms, scale=1000),
+                widget('OverheadLatency', [line for p in percentiles for line in metrics('AWS/SageMaker', 'OverheadLatency', p, '{variant} {stat}')], unit='microseconds', thresholds=monitoring.overhead_latency_ms, scale=1000),
+                widget('Concurrent requests per instance', metrics('AWS/SageMaker', 'ConcurrentRequestsPerModel', 'Average', '{variant} average') + metrics('AWS/SageMaker', 'ConcurrentRequestsPerModel', 'Maximum', '{variant} maximum')),
+                widget('Invocations per instance', metrics('AWS/SageMaker', 'InvocationsPerInstance', 'Sum')),
+                widget('GPU utilization', metrics(endpoint_metrics, 'GPUUtilization', 'Average'), unit='% (100 per GPU)'),
+                widget('GPU memory utilization', metrics(endpoint_metrics, 'GPUMemoryUtilization', 'Average'), unit='% (100 per GPU)'),
+                widget('CPU utilization', metrics(endpoint_metrics, 'CPUUtilization', 'Average'), unit='% (100 per vCPU)'),
+                widget('Memory and disk utilization', metrics(endpoint_metrics, 'MemoryUtilization', 'Average', '{variant} memory') + metrics(endpoint_metrics, 'DiskUtilization', 'Average', '{variant} disk'), unit='%'),
+            ]
+            if asynchronous:
+                widgets.append(widget('Backlog', [
+                    ['AWS/SageMaker', 'ApproximateBacklogSize', 'EndpointName', endpoint_name, {'stat': 'Average', 'label': 'backlog'}],
+                    ['AWS/SageMaker', 'ApproximateBacklogSizePerInstance', 'EndpointName', endpoint_name, {'stat': 'Average', 'label': 'backlog per instance'}],
+                    ['AWS/SageMaker', 'ApproximateAgeOfOldestRequest', 'EndpointName', endpoint_name, {'stat': 'Maximum', 'label': 'age of the oldest request (s)', 'yAxis': 'right'}],
+                ]))
+            return json.dumps({'widgets': widgets})
+
+        self.dashboard = cloudwatch.Dashboard(f'{name}-dashboard',
+            dashboard_name=self.endpoint.name,
+            dashboard_body=self.endpoint.name.apply(body),
+            opts=pulumi.ResourceOptions(parent=self)
+        )
@@ -0,0 +1,82 @@
+"""
+Resolve the Hugging Face LLM (TGI) container image URI without the SageMaker SDK.
+
+This Python module bundles the ECR image URIs of the Hugging Face TGI Deep Learning Containers
+per region and TGI version, so deploying the stack doesn't import the full `sagemaker` SDK
+(boto3, pandas, ...) nor need its config files. The SDK is only imported, lazily, for the
+region/version combinations missing from the tables.
+
+Link: https://github.com/aws/deep-learning-containers/blob/master/available_images.md
+"""
+
+from typing import Dict, Optional
+
+REPOSITORY = 'huggingface-pytorch-tgi-inference'
+
+# Image tag per TGI version.
+TGI_IMAGE_TAGS: Dict[str, str] = {
+    '0.6.0': '2.0.0-tgi0.6.0-gpu-py39-cu118-ubuntu20.04',
+    '0.8.2': '2.0.0-tgi0.8.2-gpu-py39-cu118-ubuntu20.04',
+    '0.9.3': '2.0.1-tgi0.9.3-gpu-py39-cu118-ubuntu20.04',
+    '1.0.3': '2.0.1-tgi1.0.3-gpu-py39-cu118-ubuntu20.04',
+    '1.1.0': '2.0.1-tgi1.1.0-gpu-py39-cu118-ubuntu20.04',
+    '1.3.3': '2.1.1-tgi1.3.3-gpu-py310-cu121-ubuntu20.04',
+    '1.4.0': '2.1.1-tgi1.4.0-gpu-py310-cu121-ubuntu20.04',
+}
+
+# The account hosting the Deep Learning Containers, per region.
+DLC_ACCOUNTS: Dict[str, str] = {
+    'us-east-1': '763104351884',
+    'us-east-2': '763104351884',
+    'us-west-1': '763104351884',
+    'us-west-2': '763104351884',
+    'ca-central-1': '763104351884',
+    'sa-east-1': '763104351884',
+    'eu-west-1': '763104351884',
+    'eu-west-2': '763104351884',
+    'eu-west-3': '763104351884',
+    'eu-central-1': '763104351884',
+    'eu-north-1': '763104351884',
+    'eu-south-1': '692866216735',
+    'ap-northeast-1': '763104351884',
+    'ap-northeast-2': '763104351884',
+    'ap-northeast-3': '364406365360',
+    'ap-southeast-1': '763104351884',
+    'ap-southeast-2': '763104351884',
+    'ap-southeast-3': '907027046896',
+    'ap-south-1': '763104351884',
+    'ap-east-1': '871362719292',
+    'me-south-1': '217643126080',
+    'af-south-1': '626614931356',
+}
+
+
+def lookup_llm_image_uri(region: str, version: str) -> Optional[str]:
+    """
+    The TGI image URI from the bundled tables, or None when the region or the version is missing.
+
+    Parameters:
+        region: AWS region, i.e: 'us-east-1'.
+        version: TGI version, i.e: '0.9.3'.
+    """
+    account, tag = DLC_ACCOUNTS.get(region), TGI_IMAGE_TAGS.get(version)
+    if account is None or tag is None:
+        return None
+    return f'{account}.dkr.ecr.{region}.amazonaws.com/{REPOSITORY}:{tag}'
+
+
+def get_llm_image_uri(region: str, version: str) -> str:
+    """
+    The TGI image URI, from the bundled tables or, for unknown combinations, from the SageMaker SDK.
+
+    Parameters:
+        region: AWS region, i.e: 'us-east-1'.
+        version: TGI version, i.e: '0.9.3'.
+    """
+    image_uri = lookup_llm_image_uri(region, version)
+    if image_uri is not None:
+        return image_uri
+
+    # Slow path: the SDK import takes seconds, only pay it when the tables don't know the combination
+    from sagemaker import huggingface
+    return huggingface.get_huggingface_llm_image_uri(backend='huggingface', region=region, version=version)
@@ -0,0 +1,332 @@
+"""
+A client for the Hugging Face LLM (TGI) endpoint, with streaming token responses.
+
+This Python module invokes the SageMaker endpoint (or a TGI server over HTTP, i.e: the local
+stub `stub_tgi.py`), either blocking (`generate`) or streaming (`stream`, `astream`) with
+`invoke_endpoint_with_response_stream`. The server-sent events of TGI are parsed incrementally
+(an event can be split over several payload parts), tokens are yielded as they arrive, and the
+time to first token and inter-token latencies are measured. Asynchronous inference endpoints
+take their payloads from S3 (`submit_async`, then `fetch_async` polls for the response).
+
+Usage:
+    client = LlmClient(endpoint_name='Llama2Llm-endpoint-1234567', region='us-east-1')
+    stream = client.stream('In 3 words, name the biggest mountain on earth?', max_new_tokens=64)
+    for token in stream:
+        print(token, end='', flush=True)
+    print(stream.timings.ttft, stream.timings.inter_token_latency())
+"""
+
+import asyncio
+import json
+import math
+import threading
+import time
+import urllib.request
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple, Union
+
+from response_cache import ResponseCache
+
+
+class SseParser:
+    """
+    Incremental parser of server-sent events: feed it bytes as they arrive, get back the complete events.
+    """
+    def __init__(self):
+        self.buffer = b''
+
+    def feed(self, chunk: bytes) -> List[dict]:
+        """Parse a chunk, return the JSON payload of every event completed by it."""
+        self.buffer += chunk.replace(b'\r\n', b'\n')
+        events = []
+        while b'\n\n' in self.buffer:
+            raw, self.buffer = self.buffer.split(b'\n\n', 1)
+            event = self._parse(raw)
+            if event is not None: events.append(event)
+        return events
+
+    def flush(self) -> List[dict]:
+        """Parse what is left once the stream is over (a last event without a trailing blank line)."""
+        raw, self.buffer = self.buffer, b''
+        event = self._parse(raw)
+        return [event] if event is not None else []
+
+    @staticmethod
+    def _parse(raw: bytes) -> Optional[dict]:
+        data = b'\n'.join(line[5:].lstrip() for line in raw.split(b'\n') if line.startswith(b'data:'))
+        if not data or data == b'[DONE]':
+            return None
+        return json.loads(data)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    The q-th percentile (0-100) of the values, linearly interpolated between the closest ranks.
+    """
+    if not values: return math.nan
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+@dataclass
+class StreamTimings:
+    """
+    The timings of a streamed generation (seconds, from `time.perf_counter()`).
+
+    Attributes:
+        start: When the request was sent.
+        token_times: When each token arrived.
+        end: When the stream was over.
+    """
+    start: float
+    token_times: List[float] = field(default_factory=list)
+    end: Optional[float] = None
+
+    @property
+    def tokens(self) -> int:
+        return len(self.token_times)
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """Time to first token."""
+        return self.token_times[0] - self.start if self.token_times else None
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Time until the end of the stream."""
+        return self.end - self.start if self.end is not None else None
+
+    def inter_token_latencies(self) -> List[float]:
+        """Time between consecutive tokens."""
+        return [b - a for a, b in zip(self.token_times, self.token_times[1:])]
+
+    def inter_token_latency(self) -> dict:
+        """Mean and p50/p90/p99 of the inter-token latencies."""
+        values = self.inter_token_latencies()
+        return {'mean': sum(values) / len(values) if values else math.nan} | {f'p{q}': percentile(values, q) for q in (50, 90, 99)}
+
+
+class TokenStream:
+    """
+    An iterator over the tokens (text) of a streamed generation, timing them as they arrive.
+
+    Attributes:
+        timings: The time to first token and inter-token latencies.
+        generated_text: The full text, once the stream is over.
+        details: The TGI details of the generation (finish reason, generated tokens), once the stream is over.
+    """
+    def __init__(self, chunks: Iterable[bytes], start: float):
+        self.chunks = chunks
+        self.timings = StreamTimings(start=start)
+        self.generated_text: Optional[str] = None
+        self.details: Optional[dict] = None
+
+    def __iter__(self) -> Iterator[str]:
+        parser = SseParser()
+        for chunk in self.chunks:
+            yield from self._tokens(parser.feed(chunk))
+        yield from self._tokens(parser.flush())
+        self.timings.end = time.perf_counter()
+
+    def _tokens(self, events: List[dict]) -> Iterator[str]:
+        for event in events:
+            if 'error' in event:
+                raise RuntimeError(f"Generation failed: {event['error']}")
+            token = event.get('token') or {}
+            if event.get('generated_text') is not None: self.generated_text = event['generated_text']
+            if event.get('details'): self.details = event['details']
+            if not token or token.get('special'): continue
+            self.timings.token_times.append(time.perf_counter())
+            yield token.get('text', '')
+
+
+class LlmClient:
+    """
+    Invokes the LLM, on a SageMaker endpoint or on a TGI server over HTTP.
+
+    Methods:
+        generate: Blocking generation, the TGI response.
+        stream: Streaming generation, a `TokenStream`.
+        astream: Streaming generation as an async iterator of tokens.
+        submit_async: Queue a request on an asynchronous inference endpoint.
+        fetch_async: Wait for the response of a queued request.
+    """
+    def __init__(self, endpoint_name: Optional[str] = None, url: Optional[str] = None, region: Optional[str] = None, max_connections: int = 10, timeout: float = 120, max_attempts: Optional[int] = None, cache: Optional[ResponseCache] = None, model_id: Optional[str] = None, target_variant: Optional[str] = None):
+        """
+        Parameters:
+            endpoint_name: Name of the SageMaker endpoint.
+            url: Base URL of a TGI server instead, i.e: 'http://127.0.0.1:8080' (the local stub).
+            region: AWS region of the endpoint.
+            max_connections: Size of the HTTP connection pool of the SageMaker client.
+            timeout: Request timeout, in seconds (HTTP only).
+            max_attempts: Attempts of the boto3 retries (1 to leave the retries to the caller), boto3's default when not set.
+            cache: Cache of the deterministic responses of `generate`.
+            model_id: Model id of the cache keys (default is the endpoint name or url).
+            target_variant: Send the requests to this production variant instead of splitting them by weight.
+        """
+        if not endpoint_name and not url:
+            raise ValueError('Either endpoint_name or url is required')
+        self.endpoint_name = endpoint_name
+        self.url = url.rstrip('/') if url else None
+        self.timeout = timeout
+        self.cache = cache
+        self.model_id = (model_id or endpoint_name or url) + (f'@{target_variant}' if target_variant else '')
+        self.target_variant = target_variant
+        self.region = region
+        self.client = None
+        self.s3 = None
+        if endpoint_name:
+            # boto3 is only needed for the endpoint, not for the local stub
+            import boto3
+            from botocore.config import Config
+            retries = {'total_max_attempts': max_attempts, 'mode': 'standard'} if max_attempts else None
+            self.client = boto3.client('sagemaker-runtime', region_name=region, config=Config(max_pool_connections=max_connections, retries=retries))
+
+    @staticmethod
+    def payload(prompt: Union[str, List[str]], **parameters) -> dict:
+        return {'inputs': prompt, 'parameters': {'details': True, **parameters}}
+
+    def generate(self, prompt: Union[str, List[str]], **parameters):
+        """
+        Generate the whole response at once.
+
+        Parameters:
+            prompt: The prompt (or a list of prompts, for containers accepting batched inputs).
+            parameters: TGI generation parameters, i.e: `max_new_tokens=64`, `temperature=0.7`.
+        """
+        key = self.cache.key(self.model_id, prompt, parameters) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None: return cached
+
+        body = json.dumps(self.payload(prompt, **parameters))
+        if self.client:
+            response = self.client.invoke_endpoint(EndpointName=self.endpoint_name, ContentType='application/json', Body=body, **self._variant())
+            result = json.loads(response['Body'].read())
+        else:
+            with self._post('/invocations', body) as response:
+                result = json.loads(response.read())
+        if key: self.cache.put(key, result)
+        return result
+
+    def stream(self, prompt: str, **parameters) -> TokenStream:
+        """
+        Stream the response, token by token.
+
+        Parameters:
+            prompt: The prompt.
+            parameters: TGI generation parameters, i.e: `max_new_tokens=64`.
+        """
+        body = json.dumps({**self.payload(prompt, **parameters), 'stream': True})
+        start = time.perf_counter()
+        if self.client:
+            response = self.client.invoke_endpoint_with_response_stream(EndpointName=self.endpoint_name, ContentType='application/json', Body=body, **self._variant())
+            chunks = self._payload_parts(response['Body'])
+        else:
+            chunks = self._http_chunks(self._post('/invocations-response-stream', body))
+        return TokenStream(chunks, start)
+
+    async def astream(self, prompt: str, **parameters) -> AsyncIterator[str]:
+        """
+        Stream the response as an async iterator: the blocking stream is read on a thread,
+        tokens are handed over to the event loop as they arrive.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def produce():
+            try:
+                for token in self.stream(prompt, **parameters):
+                    loop.call_soon_threadsafe(queue.put_nowait, token)
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+
+        threading.Thread(target=produce, daemon=True).start()
+        while True:
+            item = await queue.get()
+            if item is done: return
+            if isinstance(item, Exception): raise item
+            yield item
+
+    def submit_async(self, prompt: str, input_s3_uri: str, **parameters) -> dict:
+        """
+        Upload the payload to S3 and queue it on the asynchronous inference endpoint.
+        Returns the `InferenceId`, `OutputLocation` and `FailureLocation` of the request.
+
+        Parameters:
+            prompt: The prompt.
+            input_s3_uri: S3 prefix to upload the payload to (the `AsyncInference.input_path` stack output).
+            parameters: TGI generation parameters, i.e: `max_new_tokens=512`.
+        """
+        if not self.client:
+            raise ValueError('Asynchronous inference requires an endpoint_name')
+        bucket, key = self._split_s3_uri(f"{input_s3_uri.rstrip('/')}/{uuid.uuid4()}.json")
+        self._s3().put_object(Bucket=bucket, Key=key, Body=json.dumps(self.payload(prompt, **parameters)).encode(), ContentType='application/json')
+        response = self.client.invoke_endpoint_async(EndpointName=self.endpoint_name, ContentType='application/json', InputLocation=f's3://{bucket}/{key}')
+        return {name: response.get(name) for name in ('InferenceId', 'OutputLocation', 'FailureLocation')}
+
+    def fetch_async(self, submission: dict, timeout: float = 900, poll_interval: float = 5):
+        """
+        Poll S3 until the response (or the failure) of a queued request is written, and return the TGI response.
+
+        Parameters:
+            submission: What `submit_async` returned.
+            timeout: Maximum time to wait, in seconds.
+            poll_interval: Time between polls, in seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            for location, failed in ((submission['OutputLocation'], False), (submission.get('FailureLocation'), True)):
+                body = self._read_s3(location) if location else None
+                if body is None: continue
+                if failed: raise RuntimeError(f"Asynchronous inference {submission.get('InferenceId')} failed: {body.decode(errors='replace')}")
+                return json.loads(body)
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No response for {submission.get('InferenceId')} after {timeout}s")
+            time.sleep(poll_interval)
+
+    def _variant(self) -> dict:
+        return {'TargetVariant': self.target_variant} if self.target_variant else {}
+
+    def _s3(self):
+        if self.s3 is None:
+            import boto3
+            self.s3 = boto3.client('s3', region_name=self.region)
+        return self.s3
+
+    def _read_s3(self, uri: str) -> Optional[bytes]:
+        bucket, key = self._split_s3_uri(uri)
+        try:
+            return self._s3().get_object(Bucket=bucket, Key=key)['Body'].read()
+        except self._s3().exceptions.NoSuchKey:
+            return None
+
+    @staticmethod
+    def _split_s3_uri(uri: str) -> Tuple[str, str]:
+        bucket, _, key = uri.removeprefix('s3://').partition('/')
+        return bucket, key
+
+    def _post(self, path: str, body: str):
+        request = urllib.request.Request(f'{self.url}{path}', data=body.encode(), headers={'Content-Type': 'application/json'})
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    @staticmethod
+    def _payload_parts(event_stream) -> Iterator[bytes]:
+        for event in event_stream:
+            if 'PayloadPart' in event:
+                yield event['PayloadPart']['Bytes']
+            elif 'ModelStreamError' in event:
+                raise RuntimeError(f"Model stream error: {event['ModelStreamError'].get('Message')}")
+
+    @staticmethod
+    def _http_chunks(response) -> Iterator[bytes]:
+        with response:
+            while True:
+                chunk = response.read1(65536)
+                if not chunk: return
+                yield chunk
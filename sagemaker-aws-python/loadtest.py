@@ -0,0 +1,221 @@
+"""
+Load test a SageMaker LLM endpoint (or the local stub TGI server) and report latency percentiles.
+
+Prompts from a corpus are sent at a fixed concurrency (closed loop: N workers, each sending its
+next request when the previous one is done) or at a fixed arrival rate (open loop: requests are
+sent on schedule whatever the response times). Latency p50/p90/p99, time to first token
+(with `--stream`), tokens/s and error rates are printed, and written as JSON and CSV reports.
+
+Usage:
+    # Offline, against the stub (python3 stub_tgi.py --port 8080)
+    python3 loadtest.py --url http://127.0.0.1:8080 --concurrency 8 --requests 200 --stream
+
+    # The deployed endpoint
+    python3 loadtest.py --endpoint $(pulumi stack output EndpointName) --region us-east-1 --rate 2 --duration 120
+
+    # One production variant of a multi-variant endpoint
+    python3 loadtest.py --endpoint $(pulumi stack output EndpointName) --target-variant g5-xlarge --concurrency 8 --requests 200
+"""
+
+import argparse
+import csv
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Sequence
+
+from llm_client import LlmClient, percentile
+
+DEFAULT_PROMPTS = [
+    'In 3 words, name the biggest mountain on earth?',
+    "What's the most beautiful thing in life? Provide a short essay on this.",
+    'Explain the difference between a process and a thread.',
+    'Write a haiku about autumn leaves.',
+    'Summarize the plot of Hamlet in two sentences.',
+]
+
+
+@dataclass
+class RequestResult:
+    """
+    The outcome of one request.
+
+    Attributes:
+        start: Start time, in seconds since the start of the run.
+        latency: Time until the full response, in seconds.
+        ttft: Time to first token, in seconds (only when streaming).
+        tokens: Number of generated tokens.
+        status: 'ok' or 'error'.
+        error: The error message, if any.
+    """
+    start: float
+    latency: float
+    ttft: Optional[float] = None
+    tokens: int = 0
+    status: str = 'ok'
+    error: Optional[str] = None
+
+
+def count_tokens(response) -> int:
+    """The number of generated tokens of a TGI response (`details.generated_tokens`, or a word count)."""
+    result = response[0] if isinstance(response, list) and response else response
+    if not isinstance(result, dict):
+        return 0
+    details = result.get('details') or {}
+    if details.get('generated_tokens') is not None:
+        return int(details['generated_tokens'])
+    return len(str(result.get('generated_text', '')).split())
+
+
+def send(client: LlmClient, prompt: str, max_new_tokens: int, stream: bool, t0: float) -> RequestResult:
+    """Send one request and time it. Never raises: errors are recorded in the result."""
+    start = time.perf_counter()
+    result = RequestResult(start=start - t0, latency=0.0)
+    try:
+        if stream:
+            tokens = client.stream(prompt, max_new_tokens=max_new_tokens)
+            for _ in tokens: pass
+            result.tokens, result.ttft = tokens.timings.tokens, tokens.timings.ttft
+        else:
+            result.tokens = count_tokens(client.generate(prompt, max_new_tokens=max_new_tokens))
+    except Exception as e:
+        result.status, result.error = 'error', (str(e).strip().splitlines() or [repr(e)])[-1]
+    result.latency = time.perf_counter() - start
+    return result
+
+
+def run_concurrency(client: LlmClient, prompts: Sequence[str], concurrency: int, requests: Optional[int], duration: Optional[float], max_new_tokens: int, stream: bool) -> List[RequestResult]:
+    """Closed loop: `concurrency` workers send requests back to back, until `requests` are sent or `duration` elapsed."""
+    results, lock, sent = [], threading.Lock(), [0]
+    t0 = time.perf_counter()
+
+    def worker():
+        while True:
+            with lock:
+                if (requests is not None and sent[0] >= requests) or (duration is not None and time.perf_counter() - t0 >= duration):
+                    return
+                prompt = prompts[sent[0] % len(prompts)]
+                sent[0] += 1
+            result = send(client, prompt, max_new_tokens, stream, t0)
+            with lock:
+                results.append(result)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    return results
+
+
+def run_rate(client: LlmClient, prompts: Sequence[str], rate: float, requests: Optional[int], duration: Optional[float], max_new_tokens: int, stream: bool, poisson: bool = True, max_in_flight: int = 256) -> List[RequestResult]:
+    """Open loop: requests arrive at `rate` per second (Poisson or evenly spaced), until `requests` are sent or `duration` elapsed."""
+    t0 = time.perf_counter()
+    futures, next_at, i = [], 0.0, 0
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        while (requests is None or i < requests) and (duration is None or next_at < duration):
+            delay = t0 + next_at - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+            futures.append(executor.submit(send, client, prompts[i % len(prompts)], max_new_tokens, stream, t0))
+            i += 1
+            next_at += random.expovariate(rate) if poisson else 1 / rate
+    return [future.result() for future in futures]
+
+
+def summarize(results: Sequence[RequestResult]) -> Dict[str, object]:
+    """Aggregate the results: counts, error rate, throughput and p50/p90/p99 of latency, TTFT and tokens/s."""
+    ok = [r for r in results if r.status == 'ok']
+    elapsed = max((r.start + r.latency for r in results), default=0.0) - min((r.start for r in results), default=0.0)
+    tokens = sum(r.tokens for r in ok)
+
+    def stats(values: List[float]) -> Dict[str, float]:
+        return {f'p{q}': percentile(values, q) for q in (50, 90, 99)} | {'mean': sum(values) / len(values) if values else math.nan}
+
+    return {
+        'requests': len(results),
+        'errors': len(results) - len(ok),
+        'error_rate': (len(results) - len(ok)) / len(results) if results else 0.0,
+        'elapsed': elapsed,
+        'requests_per_second': len(ok) / elapsed if elapsed else 0.0,
+        'tokens_per_second': tokens / elapsed if elapsed else 0.0,
+        'latency': stats([r.latency for r in ok]),
+        'ttft': stats([r.ttft for r in ok if r.ttft is not None]),
+        'request_tokens_per_second': stats([r.tokens / r.latency for r in ok if r.latency > 0 and r.tokens]),
+        'error_messages': sorted({r.error for r in results if r.error}),
+    }
+
+
+def format_summary(summary: Dict[str, object]) -> str:
+    lines = [
+        f"requests {summary['requests']}  errors {summary['errors']} ({summary['error_rate']:.1%})  "
+        f"elapsed {summary['elapsed']:.1f}s  {summary['requests_per_second']:.2f} req/s  {summary['tokens_per_second']:.1f} tokens/s",
+        f"{'':<24}{'p50':>10}{'p90':>10}{'p99':>10}",
+    ]
+    for key, label, scale, unit in [('latency', 'latency', 1000, 'ms'), ('ttft', 'time to first token', 1000, 'ms'), ('request_tokens_per_second', 'tokens/s per request', 1, '')]:
+        values = summary[key]
+        lines.append(f'{label:<24}' + ''.join(f"{values[p] * scale:>8.0f}{unit:<2}" if not math.isnan(values[p]) else f"{'-':>10}" for p in ('p50', 'p90', 'p99')))
+    for message in summary['error_messages']:
+        lines.append(f'error: {message}')
+    return '\n'.join(lines)
+
+
+def load_prompts(path: Optional[str]) -> List[str]:
+    """The prompts of a corpus file, one per line (plain text, or JSON lines with an `inputs` field)."""
+    if not path:
+        return DEFAULT_PROMPTS
+    prompts = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            prompts.append(json.loads(line)['inputs'] if line.startswith('{') else line)
+    return prompts
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description='Load test a SageMaker LLM endpoint.')
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument('--endpoint', help='SageMaker endpoint name')
+    target_group.add_argument('--url', help='Base URL of a TGI server, i.e: the local stub http://127.0.0.1:8080')
+    parser.add_argument('--region', default=None, help='AWS region of the endpoint')
+    parser.add_argument('--target-variant', default=None, help='Send every request to this production variant (default: split by weight)')
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument('--concurrency', type=int, default=None, help='Closed loop: number of concurrent workers (default: 4)')
+    mode_group.add_argument('--rate', type=float, default=None, help='Open loop: arrival rate, in requests per second')
+    parser.add_argument('--uniform', action='store_true', help='Evenly spaced arrivals instead of Poisson (with --rate)')
+    parser.add_argument('--requests', type=int, default=None, help='Number of requests (default: 100 unless --duration)')
+    parser.add_argument('--duration', type=float, default=None, help='Duration of the test, in seconds')
+    parser.add_argument('--prompts', default=None, help='Prompt corpus, one prompt per line (or JSON lines with "inputs")')
+    parser.add_argument('--max-new-tokens', type=int, default=64)
+    parser.add_argument('--stream', action='store_true', help='Use the streaming API (measures time to first token)')
+    parser.add_argument('--json', default=None, help='Write the summary as JSON to this file')
+    parser.add_argument('--csv', default=None, help='Write the per request results as CSV to this file')
+    args = parser.parse_args(argv)
+
+    requests = args.requests if args.requests is not None else (None if args.duration else 100)
+    prompts = load_prompts(args.prompts)
+    concurrency = args.concurrency or 4
+    client = LlmClient(endpoint_name=args.endpoint, url=args.url, region=args.region, max_connections=max(10, concurrency), target_variant=args.target_variant)
+
+    if args.rate:
+        results = run_rate(client, prompts, args.rate, requests, args.duration, args.max_new_tokens, args.stream, poisson=not args.uniform)
+    else:
+        results = run_concurrency(client, prompts, concurrency, requests, args.duration, args.max_new_tokens, args.stream)
+
+    summary = summarize(results)
+    print(format_summary(summary))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(RequestResult.__dataclass_fields__))
+            writer.writeheader()
+            writer.writerows(asdict(r) for r in sorted(results, key=lambda r: r.start))
+    return 1 if summary['requests'] and summary['errors'] == summary['requests'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""
+A Pulumi component staging Hugging Face model weights in S3 for SageMaker.
+
+This Python module defines a Pulumi component resource that downloads the safetensors weights
+of a Hugging Face model once (from the machine running Pulumi) and uploads them uncompressed
+to S3, keyed by model id and revision. SageMaker endpoints then load them from S3 at startup
+(`model_data_source` with `CompressionType=None`), instead of every instance, including each
+autoscale-out, downloading the model from the Hub.
+"""
+
+import json
+import pulumi
+import pulumi_command as command
+from pulumi_aws import iam, s3
+from typing import Optional
+
+
+class ModelArtifacts(pulumi.ComponentResource):
+    """
+    A Pulumi component for pre-staging Hugging Face model weights in S3.
+
+    Attributes:
+        bucket: The S3 bucket holding the model artifacts.
+        s3_uri: The S3 prefix of the model, `s3://<bucket>/models/<model id>/<revision>/`.
+        marker_uri: The completion marker, `s3://<bucket>/models/<model id>/<revision>.staged`, written once the weights are uploaded.
+        stage: The local command downloading and uploading the weights.
+
+    Methods:
+        grant_read: Allows an IAM role to read the model artifacts.
+    """
+    def __init__(
+            self,
+            name: str,
+            model_id: str,
+            revision: str = 'main',
+            bucket_name: Optional[str] = None,
+            opts: Optional[pulumi.ResourceOptions] = None
+    ):
+        """
+        Initialize the staging of a model.
+
+        Parameters:
+            name: Name of the artifacts.
+            model_id: Hugging Face model id, i.e: 'NousResearch/Llama-2-7b-chat-hf'.
+            revision: Model revision, a commit hash pins the weights (default is 'main').
+            bucket_name: Existing S3 bucket to stage into, a new bucket is created when not set.
+            opts: Additional options for the Pulumi resource.
+        """
+        super().__init__('huggingface:llm:ModelArtifacts', name, None, opts)
+
+        if revision == 'main':
+            pulumi.log.warn(f"'{model_id}' is staged from the 'main' branch, set a commit hash as revision to pin the weights", resource=self)
+
+        # Create a private bucket for the weights (or use the given one)
+        if bucket_name:
+            self.bucket = s3.BucketV2.get(f'{name}-bucket', bucket_name, opts=pulumi.ResourceOptions(parent=self))
+        else:
+            self.bucket = s3.BucketV2(f'{name}-bucket',
+                force_destroy=True,
+                opts=pulumi.ResourceOptions(parent=self)
+            )
+            s3.BucketPublicAccessBlock(f'{name}-public-access-block',
+                bucket=self.bucket.id,
+                block_public_acls=True,
+                block_public_policy=True,
+                ignore_public_acls=True,
+                restrict_public_buckets=True,
+                opts=pulumi.ResourceOptions(parent=self)
+            )
+
+        prefix = f'models/{model_id}/{revision}/'
+        # Written last, next to the prefix (not in it, SageMaker copies the whole prefix to the model directory)
+        marker_key = f'models/{model_id}/{revision}.staged'
+        self.s3_uri = self.bucket.bucket.apply(lambda bucket: f's3://{bucket}/{prefix}')
+        self.marker_uri = self.bucket.bucket.apply(lambda bucket: f's3://{bucket}/{marker_key}')
+
+        # Download the safetensors weights (no .bin/.pth duplicates), upload them uncompressed and write
+        # the marker once the sync completes. Skipped when the marker exists, so an interrupted sync is
+        # redone. Re-runs only when the model or the revision changes.
+        stage_cmd = self.bucket.bucket.apply(lambda bucket: ' && '.join([
+            'set -euo pipefail',
+            f'if aws s3api head-object --bucket {bucket} --key {marker_key} > /dev/null 2>&1; then echo "{model_id}@{revision} already staged"; exit 0; fi',
+            'dir=$(mktemp -d)',
+            "trap 'rm -rf $dir' EXIT",
+            f'huggingface-cli download {model_id} --revision {revision} --local-dir $dir --exclude "*.bin" "*.pth" "*.pt" "original/*"',
+            'rm -rf $dir/.cache',
+            f'aws s3 sync --only-show-errors $dir s3://{bucket}/{prefix}',
+            f'echo "{model_id}@{revision} staged $(date -u +%Y-%m-%dT%H:%M:%SZ)" | aws s3 cp --only-show-errors - s3://{bucket}/{marker_key}',
+        ]))
+        self.stage = command.local.Command(f'{name}-stage',
+            create=stage_cmd,
+            interpreter=['/bin/bash', '-c'],
+            triggers=[model_id, revision],
+            opts=pulumi.ResourceOptions(parent=self)
+        )
+
+        self.register_outputs({
+            's3_uri': self.s3_uri,
+            'marker_uri': self.marker_uri,
+        })
+
+    def grant_read(self, name: str, role: iam.Role) -> iam.RolePolicy:
+        """
+        Allow an IAM role (i.e: the SageMaker execution role) to read the model artifacts.
+
+        Parameters:
+            name: Name of the role policy.
+            role: The IAM role.
+        """
+        return iam.RolePolicy(name,
+            role=role.id,
+            policy=self.bucket.arn.apply(lambda arn: json.dumps({
+                'Version': '2012-10-17',
+                'Statement': [{
+                    'Effect': 'Allow',
+                    'Action': ['s3:GetObject', 's3:ListBucket'],
+                    'Resource': [arn, f'{arn}/*'],
+                }],
+            })),
+            opts=pulumi.ResourceOptions(parent=self)
+        )
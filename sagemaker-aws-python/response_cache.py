@@ -0,0 +1,212 @@
+"""
+A prompt-response cache for the LLM clients, so identical deterministic requests don't pay a GPU inference.
+
+This Python module caches the responses keyed by a hash of the model id, the prompt and the
+generation parameters, in two tiers:
+    - An in-memory LRU (number of entries)
+    - An optional on-disk tier (one JSON file per response) with a size budget, least recently used files evicted first
+Entries expire after a TTL. Sampling requests (`do_sample`, or a nonzero `temperature`) bypass the cache.
+
+Usage:
+    cache = ResponseCache(max_entries=1024, ttl=24 * 3600, disk_dir='.llm-cache', disk_budget_bytes=256 * 1024 ** 2)
+    client = LlmClient(endpoint_name='Llama2Llm-endpoint-1234567', cache=cache, model_id='NousResearch/Llama-2-7b-chat-hf')
+    print(cache.stats)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Mapping, Optional, Tuple
+
+
+def cache_key(model_id: str, prompt: Any, parameters: Mapping[str, Any]) -> str:
+    """The hash of the model id, the prompt and the generation parameters."""
+    payload = json.dumps({'model_id': model_id, 'prompt': prompt, 'parameters': parameters}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_cacheable(parameters: Mapping[str, Any]) -> bool:
+    """Only deterministic (greedy) generations are cached: no sampling, no nonzero temperature."""
+    return not parameters.get('do_sample') and not parameters.get('temperature')
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters of the cache.
+
+    Attributes:
+        memory_hits: Responses served from memory.
+        disk_hits: Responses served from disk.
+        misses: Cacheable requests sent to the endpoint.
+        bypassed: Sampling requests, not cached.
+        evictions: Entries evicted to respect the memory and disk budgets.
+        expirations: Entries dropped once their TTL elapsed.
+    """
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), 'hit_rate': self.hit_rate}
+
+
+class ResponseCache:
+    """
+    A two-tier (memory LRU + disk) response cache with TTL, see the module docstring.
+
+    Methods:
+        get: The cached response of a key, or None.
+        put: Cache a response.
+        purge_expired: Drop the expired entries of both tiers.
+        clear: Drop every entry.
+    """
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 24 * 3600, disk_dir: Optional[str] = None, disk_budget_bytes: int = 256 * 1024 ** 2):
+        """
+        Parameters:
+            max_entries: Maximum number of responses in memory.
+            ttl: Time to live of the entries, in seconds (None for no expiry).
+            disk_dir: Directory of the disk tier, no disk tier when not set.
+            disk_budget_bytes: Maximum size of the disk tier, in bytes.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_budget_bytes = disk_budget_bytes
+        self.stats = CacheStats()
+        self._memory: 'OrderedDict[str, Tuple[Optional[float], Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._disk_files())
+
+    def key(self, model_id: str, prompt: Any, parameters: Mapping[str, Any]) -> Optional[str]:
+        """The cache key of a request, or None (counted as bypassed) when it samples."""
+        if not is_cacheable(parameters):
+            with self._lock:
+                self.stats.bypassed += 1
+            return None
+        return cache_key(model_id, prompt, parameters)
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return value
+                del self._memory[key]
+                self.stats.expirations += 1
+
+            entry = self._read_disk(key, now)
+            if entry is not None:
+                self.stats.disk_hits += 1
+                self._put_memory(key, *entry)
+                return entry[1]
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._put_memory(key, expires_at, value)
+            self._write_disk(key, expires_at, value)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (expires_at, _) in self._memory.items() if expires_at is not None and expires_at <= now]:
+                del self._memory[key]
+                self.stats.expirations += 1
+            for path, _, _ in self._disk_files():
+                self._read_file(path, now)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            for path, _, _ in self._disk_files():
+                os.remove(path)
+            self._disk_bytes = 0
+
+    def _put_memory(self, key: str, expires_at: Optional[float], value: Any):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f'{key}.json')
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[Optional[float], Any]]:
+        if not self.disk_dir:
+            return None
+        return self._read_file(self._path(key), now)
+
+    def _read_file(self, path: str, now: float) -> Optional[Tuple[Optional[float], Any]]:
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry['expires_at'] is not None and entry['expires_at'] <= now:
+            self._disk_bytes -= os.path.getsize(path)
+            os.remove(path)
+            self.stats.expirations += 1
+            return None
+        os.utime(path)  # the modification time tracks the last use, for the LRU eviction
+        return entry['expires_at'], entry['value']
+
+    def _write_disk(self, key: str, expires_at: Optional[float], value: Any):
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'expires_at': expires_at, 'value': value}, f)
+        os.replace(tmp, path)
+        self._disk_bytes += os.path.getsize(path) - previous
+        # Only list the files when over the budget
+        if self._disk_bytes > self.disk_budget_bytes:
+            self._enforce_disk_budget()
+
+    def _disk_files(self):
+        if not self.disk_dir:
+            return []
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    files.append((path, stat.st_mtime, stat.st_size))
+        return files
+
+    def _enforce_disk_budget(self):
+        files = self._disk_files()
+        self._disk_bytes = sum(size for _, _, size in files)
+        # Evict down to 90% of the budget, so the files aren't listed again on the next write
+        for path, _, size in sorted(files, key=lambda f: f[1]):
+            if self._disk_bytes <= self.disk_budget_bytes * 0.9:
+                break
+            os.remove(path)
+            self._disk_bytes -= size
+            self.stats.evictions += 1
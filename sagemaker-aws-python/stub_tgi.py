@@ -0,0 +1,168 @@
+"""
+A local stub of a Text Generation Inference (TGI) server behind SageMaker, for offline testing.
+
+It answers like the TGI container of the endpoint, with a configurable time to first token,
+generation speed, error rate and concurrency limit (429 above it):
+    POST /invocations, /generate                 -> [{"generated_text": ..., "details": {...}}]
+    POST /invocations-response-stream, /generate_stream -> server-sent events, one per token
+    GET  /ping, /health                          -> 200
+
+Usage:
+    python3 stub_tgi.py --port 8080 --ttft-ms 200 --tokens-per-second 40 --error-rate 0.01 --max-concurrent-requests 16
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+WORDS = 'the quick brown fox jumps over the lazy dog while mount everest stands tall above the clouds'.split()
+
+
+class StubTgiHandler(BaseHTTPRequestHandler):
+    """Handles the TGI/SageMaker routes, see the module docstring."""
+    protocol_version = 'HTTP/1.1'
+    ttft = 0.2
+    tokens_per_second = 40.0
+    error_rate = 0.0
+    max_concurrent_requests = 0
+    max_new_tokens = 64
+    in_flight = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path in ('/ping', '/health'):
+            self._send(200, b'')
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+    def do_POST(self):
+        cls = type(self)
+        with cls.lock:
+            throttled = bool(self.max_concurrent_requests) and cls.in_flight >= self.max_concurrent_requests
+            if not throttled: cls.in_flight += 1
+        if throttled:
+            self.rfile.read(int(self.headers.get('Content-Length', 0)) or 0)
+            return self._send(429, json.dumps({'error': 'Model is overloaded', 'error_type': 'overloaded'}).encode())
+        try:
+            self._handle()
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def _handle(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)) or 0)
+        try:
+            payload = json.loads(body or b'{}')
+        except json.JSONDecodeError:
+            return self._send(400, json.dumps({'error': 'Input payload must be valid json'}).encode())
+        if random.random() < self.error_rate:
+            return self._send(500, json.dumps({'error': 'stub error', 'error_type': 'generation'}).encode())
+
+        parameters = payload.get('parameters') or {}
+        max_new_tokens = int(parameters.get('max_new_tokens', self.max_new_tokens))
+        inputs = payload.get('inputs', '')
+        if isinstance(inputs, list) and self.path in ('/invocations', '/generate'):
+            # Batched inputs: the prompts are generated together, one result each
+            time.sleep(self.ttft + max_new_tokens / self.tokens_per_second)
+            results = [self._result([WORDS[(len(str(p)) + i) % len(WORDS)] for i in range(max_new_tokens)], parameters) for p in inputs]
+            return self._send(200, json.dumps(results).encode())
+
+        prompt = str(inputs)
+        tokens = [WORDS[(len(prompt) + i) % len(WORDS)] for i in range(max_new_tokens)]
+
+        if self.path in ('/invocations-response-stream', '/generate_stream') or payload.get('stream'):
+            self._stream(tokens)
+        elif self.path in ('/invocations', '/generate'):
+            time.sleep(self.ttft + len(tokens) / self.tokens_per_second)
+            self._send(200, json.dumps([self._result(tokens, parameters)]).encode())
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+    @staticmethod
+    def _result(tokens, parameters) -> dict:
+        result = {'generated_text': ' '.join(tokens)}
+        if parameters.get('details'):
+            result['details'] = {'finish_reason': 'length', 'generated_tokens': len(tokens), 'seed': None}
+        return result
+
+    def _stream(self, tokens):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        time.sleep(self.ttft)
+        for i, text in enumerate(tokens):
+            if i: time.sleep(1 / self.tokens_per_second)
+            last = i == len(tokens) - 1
+            event = {
+                'token': {'id': i, 'text': f' {text}', 'logprob': 0.0, 'special': False},
+                'generated_text': ' '.join(tokens) if last else None,
+                'details': {'finish_reason': 'length', 'generated_tokens': len(tokens), 'seed': None} if last else None,
+            }
+            self._chunk(f'data:{json.dumps(event)}\n\n'.encode())
+        self._chunk(b'')
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def _send(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(port: int = 8080, ttft_ms: float = 200, tokens_per_second: float = 40, error_rate: float = 0.0, max_concurrent_requests: int = 0, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """
+    Create the stub server (call `serve_forever()` on it, i.e: in a thread for tests).
+
+    Parameters:
+        port: Port to listen on (0 for any free port).
+        ttft_ms: Time to first token, in milliseconds.
+        tokens_per_second: Generation speed after the first token.
+        error_rate: Share of the requests answered with a 500 error.
+        max_concurrent_requests: Requests above this many in flight are answered with a 429 (0 for no limit).
+        host: Address to listen on.
+    """
+    handler = type('ConfiguredStubTgiHandler', (StubTgiHandler,), {
+        'ttft': ttft_ms / 1000,
+        'tokens_per_second': tokens_per_second,
+        'error_rate': error_rate,
+        'max_concurrent_requests': max_concurrent_requests,
+        'in_flight': 0,
+        'lock': threading.Lock(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description='Local stub of a TGI server behind SageMaker.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--ttft-ms', type=float, default=200, help='Time to first token, in milliseconds')
+    parser.add_argument('--tokens-per-second', type=float, default=40, help='Generation speed after the first token')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of the requests failing with a 500')
+    parser.add_argument('--max-concurrent-requests', type=int, default=0, help='Answer 429 above this many requests in flight (0 for no limit)')
+    args = parser.parse_args(argv)
+
+    server = serve(args.port, args.ttft_ms, args.tokens_per_second, args.error_rate, args.max_concurrent_requests, args.host)
+    print(f'Stub TGI listening on http://{args.host}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
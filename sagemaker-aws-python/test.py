@@ -1,13 +1,22 @@
-import json, boto3, argparse
+import json, argparse
+from llm_client import LlmClient
 
-def main(endpoint_name, text):
-    client = boto3.client('sagemaker-runtime', region_name='us-east-1')
-    payload = json.dumps({"inputs": text})
-    response = client.invoke_endpoint(EndpointName=endpoint_name, ContentType="application/json", Body=payload)
-    print("Response:", json.loads(response['Body'].read().decode()))
+def main(endpoint_name, text, stream=False, region='us-east-1'):
+    client = LlmClient(endpoint_name=endpoint_name, region=region)
+    if not stream:
+        print("Response:", client.generate(text))
+        return
+    tokens = client.stream(text, max_new_tokens=256)
+    print("Response:", end=" ", flush=True)
+    for token in tokens:
+        print(token, end="", flush=True)
+    print(f"\nTime to first token: {tokens.timings.ttft:.3f}s, inter-token latency: {json.dumps(tokens.timings.inter_token_latency())}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("endpoint_name")
     parser.add_argument("--text", default="In 3 words, name the biggest mountain on earth?")
-    main(parser.parse_args().endpoint_name, parser.parse_args().text)
\ No newline at end of file
+    parser.add_argument("--stream", action="store_true", help="Print the tokens as they are generated")
+    parser.add_argument("--region", default="us-east-1")
+    args = parser.parse_args()
+    main(args.endpoint_name, args.text, args.stream, args.region)
@@ -0,0 +1,71 @@
+import io
+import urllib.error
+
+import pytest
+
+from async_llm_client import classify_error
+
+
+def client_error(code: str, http_status: int, **fields):
+    """A botocore `ClientError`, shaped as `invoke_endpoint` raises it."""
+    exceptions = pytest.importorskip('botocore.exceptions')
+    response = {
+        'Error': {'Code': code, 'Message': f'{code} message'},
+        'ResponseMetadata': {'RequestId': 'c0ffee', 'HTTPStatusCode': http_status, 'HTTPHeaders': {}, 'RetryAttempts': 0},
+        **fields,
+    }
+    return exceptions.ClientError(response, 'InvokeEndpoint')
+
+
+def model_error(original_status_code: int):
+    """A `ModelError` (HTTP 424) wrapping the response of the container."""
+    return client_error(
+        'ModelError', 424,
+        OriginalStatusCode=original_status_code,
+        OriginalMessage='{"error":"Model is overloaded","error_type":"overloaded"}',
+        LogStreamArn='arn:aws:logs:us-east-1:123456789012:log-group:/aws/sagemaker/Endpoints/Llama2Llm-endpoint',
+    )
+
+
+@pytest.mark.parametrize('original_status_code, expected', [
+    (429, 'throttled'),
+    (500, 'transient'),
+    (503, 'transient'),
+    (507, 'transient'),
+    (400, None),
+    (422, None),
+])
+def test_model_error_original_status_code(original_status_code, expected):
+    assert classify_error(model_error(original_status_code)) == expected
+
+
+def test_model_error_without_original_status_code():
+    assert classify_error(client_error('ModelError', 424)) is None
+
+
+@pytest.mark.parametrize('code, http_status, expected', [
+    ('ThrottlingException', 400, 'throttled'),
+    ('TooManyRequestsException', 429, 'throttled'),
+    ('ModelNotReadyException', 429, 'throttled'),
+    ('ServiceUnavailable', 503, 'transient'),
+    ('InternalFailure', 500, 'transient'),
+    ('ValidationError', 400, None),
+    ('AccessDeniedException', 403, None),
+])
+def test_client_error(code, http_status, expected):
+    assert classify_error(client_error(code, http_status)) == expected
+
+
+@pytest.mark.parametrize('status, expected', [(429, 'throttled'), (502, 'transient'), (404, None)])
+def test_http_error(status, expected):
+    error = urllib.error.HTTPError('http://localhost:8080/generate', status, 'error', {}, io.BytesIO(b''))
+    assert classify_error(error) == expected
+
+
+@pytest.mark.parametrize('error', [ConnectionResetError(), TimeoutError()])
+def test_connection_errors_are_transient(error):
+    assert classify_error(error) == 'transient'
+
+
+def test_other_errors_are_not_retried():
+    assert classify_error(ValueError('bad prompt')) is None
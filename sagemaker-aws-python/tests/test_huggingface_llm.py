@@ -0,0 +1,70 @@
+import pytest
+
+pulumi = pytest.importorskip('pulumi')
+pytest.importorskip('pulumi_aws')
+
+
+class EndpointMocks(pulumi.runtime.Mocks):
+    """Records the inputs of the registered resources, no invoke is needed by the component."""
+
+    def __init__(self):
+        self.resources = {}
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        self.resources[args.name] = args.inputs
+        outputs = {'arn': f'arn:aws:mock:::{args.name}', 'name': args.name, **args.inputs}
+        return f'{args.name}-id', outputs
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        return {}
+
+
+@pytest.fixture
+def mocks():
+    mocks = EndpointMocks()
+    pulumi.runtime.set_mocks(mocks, project='sagemaker-aws-python', stack='test', preview=False)
+    pulumi.runtime.set_all_config({'aws:region': 'us-east-1'})
+    yield mocks
+    pulumi.runtime.set_all_config({})
+
+
+def deploy(**kwargs) -> 'HuggingFaceLlm':
+    from huggingface_llm import HuggingFaceLlm, Variant
+    return HuggingFaceLlm('Llama2Llm',
+        instance_type=None,
+        environment_variables={'HF_MODEL_ID': 'NousResearch/Llama-2-7b-chat-hf'},
+        variants=[
+            Variant(name='g5-xlarge', instance_type='ml.g5.xlarge', initial_instance_count=3),
+            Variant(name='g5-2xlarge', instance_type='ml.g5.2xlarge'),
+        ],
+        **kwargs
+    )
+
+
+def initial_instance_counts(mocks) -> dict:
+    variants = mocks.resources['Llama2Llm-config']['productionVariants']
+    return {variant['variantName']: variant['initialInstanceCount'] for variant in variants}
+
+
+@pulumi.runtime.test
+def test_initial_instance_count_without_autoscaling(mocks):
+    llm = deploy()
+    return llm.endpoint.id.apply(lambda _: assert_equal(initial_instance_counts(mocks), {'g5-xlarge': 3, 'g5-2xlarge': 1}))
+
+
+@pulumi.runtime.test
+def test_initial_instance_count_is_at_least_the_autoscaling_minimum(mocks):
+    from huggingface_llm import AutoScaling
+    llm = deploy(autoscaling=AutoScaling(min_capacity=2, max_capacity=4))
+    return llm.endpoint.id.apply(lambda _: assert_equal(initial_instance_counts(mocks), {'g5-xlarge': 3, 'g5-2xlarge': 2}))
+
+
+@pulumi.runtime.test
+def test_asynchronous_endpoint_scaling_from_zero_keeps_the_variant_count(mocks):
+    from huggingface_llm import AsyncInference, AutoScaling
+    llm = deploy(autoscaling=AutoScaling(min_capacity=0, max_capacity=2, metric='backlog', target_value=5), async_inference=AsyncInference())
+    return llm.endpoint.id.apply(lambda _: assert_equal(initial_instance_counts(mocks), {'g5-xlarge': 3, 'g5-2xlarge': 1}))
+
+
+def assert_equal(actual, expected):
+    assert actual == expected
@@ -0,0 +1,60 @@
+import pytest
+
+from tgi_config import MODELS, derive_tgi_config, quantization_modes
+
+# Attention shape of each model, from its config.json on the Hub: (layers, KV heads, head size).
+# Grouped/multi-query attention models have fewer KV heads than attention heads.
+ATTENTION = {
+    'NousResearch/Llama-2-7b-chat-hf': (32, 32, 128),
+    'meta-llama/Llama-2-7b-chat-hf': (32, 32, 128),
+    'meta-llama/Llama-2-13b-chat-hf': (40, 40, 128),
+    'meta-llama/Llama-2-70b-chat-hf': (80, 8, 128),
+    'mistralai/Mistral-7B-Instruct-v0.1': (32, 8, 128),
+    'tiiuae/falcon-7b-instruct': (32, 1, 64),
+    'tiiuae/falcon-40b-instruct': (60, 8, 64),
+}
+
+
+def test_every_model_is_checked():
+    assert sorted(MODELS) == sorted(ATTENTION)
+
+
+@pytest.mark.parametrize('model_id, layers, num_kv_heads, head_dim', [(model_id, *shape) for model_id, shape in ATTENTION.items()])
+def test_model_spec(model_id, layers, num_kv_heads, head_dim):
+    spec = MODELS[model_id]
+    assert spec.layers == layers
+    assert spec.kv_dim == num_kv_heads * head_dim
+    assert spec.kv_bytes_per_token(dtype_bytes=2) == 2 * layers * num_kv_heads * head_dim * 2
+
+
+# fp16 weights larger than the GPU memory: quantized with the most precise mode the TGI version accepts (None when nothing fits).
+QUANTIZATION = [
+    ('NousResearch/Llama-2-7b-chat-hf', 'ml.g5.2xlarge', '0.9.3', None),
+    ('meta-llama/Llama-2-13b-chat-hf', 'ml.g5.2xlarge', '0.9.3', 'bitsandbytes'),
+    ('meta-llama/Llama-2-13b-chat-hf', 'ml.g5.2xlarge', '1.4.0', 'bitsandbytes'),
+    ('tiiuae/falcon-40b-instruct', 'ml.g5.2xlarge', '1.0.3', 'bitsandbytes-nf4'),
+    ('tiiuae/falcon-40b-instruct', 'ml.g5.2xlarge', '0.9.3', None),
+]
+
+
+@pytest.mark.parametrize('model_id, instance_type, tgi_version, quantize', QUANTIZATION)
+def test_quantization_fallback(model_id, instance_type, tgi_version, quantize):
+    tgi = derive_tgi_config(instance_type, model_id, tgi_version=tgi_version)
+    assert tgi.environment.get('HF_MODEL_QUANTIZE') == quantize
+
+
+def test_quantization_needs_a_supported_tgi_version():
+    tgi = derive_tgi_config('ml.g5.2xlarge', 'tiiuae/falcon-40b-instruct', tgi_version='0.9.3')
+    assert tgi.environment == {}
+    assert tgi.warnings == [
+        "'tiiuae/falcon-40b-instruct' (41.8B parameters) doesn't fit on 'ml.g5.2xlarge' (1x 24 GiB), even quantized to 8 bits with TGI 0.9.3"
+    ]
+
+
+@pytest.mark.parametrize('tgi_version, modes', [
+    ('0.9.3', ['bitsandbytes']),
+    ('1.0.3', ['bitsandbytes', 'bitsandbytes-nf4']),
+    ('1.4.0', ['bitsandbytes', 'bitsandbytes-nf4']),
+])
+def test_quantization_modes(tgi_version, modes):
+    assert [mode for mode, _ in quantization_modes(tgi_version)] == modes
@@ -0,0 +1,232 @@
+"""
+Derive the Text Generation Inference (TGI) launcher settings from the hardware.
+
+This Python module sizes the TGI environment variables (GPU count/sharding, quantization,
+MAX_BATCH_TOTAL_TOKENS and MAX_BATCH_PREFILL_TOKENS) from a local table of the accelerator
+memory of SageMaker instance types and from the model's parameter count and dtype, so the
+tuning follows the instance type that is actually deployed.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Accelerators:
+    """
+    The GPUs of an instance type.
+
+    Attributes:
+        gpus: Number of GPUs.
+        memory_gib: Memory of each GPU, in GiB.
+        name: Name of the GPU.
+    """
+    gpus: int
+    memory_gib: float
+    name: str = ''
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """
+    The size of a model.
+
+    Attributes:
+        parameters: Number of parameters, in billions.
+        layers: Number of transformer layers.
+        kv_dim: Width of the keys/values per layer (number of KV heads * head size).
+    """
+    parameters: float
+    layers: int
+    kv_dim: int
+
+    def kv_bytes_per_token(self, dtype_bytes: float = 2) -> float:
+        """The KV cache size of a single token (keys and values of every layer), in bytes."""
+        return 2 * self.layers * self.kv_dim * dtype_bytes
+
+
+@dataclass
+class TgiConfig:
+    """
+    The derived TGI settings.
+
+    Attributes:
+        environment: The TGI environment variables.
+        warnings: What is wrong, or left on the table, with this instance type and model.
+    """
+    environment: Dict[str, str] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+
+
+# GPUs per SageMaker instance type (0 for CPU only instance types).
+ACCELERATORS: Dict[str, Accelerators] = {
+    'ml.m5.xlarge': Accelerators(gpus=0, memory_gib=0),
+    'ml.m5.2xlarge': Accelerators(gpus=0, memory_gib=0),
+    'ml.c5.2xlarge': Accelerators(gpus=0, memory_gib=0),
+    'ml.g4dn.xlarge': Accelerators(gpus=1, memory_gib=16, name='T4'),
+    'ml.g4dn.2xlarge': Accelerators(gpus=1, memory_gib=16, name='T4'),
+    'ml.g4dn.12xlarge': Accelerators(gpus=4, memory_gib=16, name='T4'),
+    'ml.g5.xlarge': Accelerators(gpus=1, memory_gib=24, name='A10G'),
+    'ml.g5.2xlarge': Accelerators(gpus=1, memory_gib=24, name='A10G'),
+    'ml.g5.4xlarge': Accelerators(gpus=1, memory_gib=24, name='A10G'),
+    'ml.g5.12xlarge': Accelerators(gpus=4, memory_gib=24, name='A10G'),
+    'ml.g5.24xlarge': Accelerators(gpus=4, memory_gib=24, name='A10G'),
+    'ml.g5.48xlarge': Accelerators(gpus=8, memory_gib=24, name='A10G'),
+    'ml.g6.xlarge': Accelerators(gpus=1, memory_gib=24, name='L4'),
+    'ml.g6.12xlarge': Accelerators(gpus=4, memory_gib=24, name='L4'),
+    'ml.g6.48xlarge': Accelerators(gpus=8, memory_gib=24, name='L4'),
+    'ml.p3.2xlarge': Accelerators(gpus=1, memory_gib=16, name='V100'),
+    'ml.p3.8xlarge': Accelerators(gpus=4, memory_gib=16, name='V100'),
+    'ml.p4d.24xlarge': Accelerators(gpus=8, memory_gib=40, name='A100'),
+    'ml.p4de.24xlarge': Accelerators(gpus=8, memory_gib=80, name='A100'),
+    'ml.p5.48xlarge': Accelerators(gpus=8, memory_gib=80, name='H100'),
+}
+
+# Size of the models we deploy (Hugging Face model id -> spec).
+MODELS: Dict[str, ModelSpec] = {
+    'NousResearch/Llama-2-7b-chat-hf': ModelSpec(parameters=6.74, layers=32, kv_dim=4096),
+    'meta-llama/Llama-2-7b-chat-hf': ModelSpec(parameters=6.74, layers=32, kv_dim=4096),
+    'meta-llama/Llama-2-13b-chat-hf': ModelSpec(parameters=13.0, layers=40, kv_dim=5120),
+    'meta-llama/Llama-2-70b-chat-hf': ModelSpec(parameters=69.0, layers=80, kv_dim=1024),
+    'mistralai/Mistral-7B-Instruct-v0.1': ModelSpec(parameters=7.24, layers=32, kv_dim=1024),
+    'tiiuae/falcon-7b-instruct': ModelSpec(parameters=7.22, layers=32, kv_dim=64),
+    'tiiuae/falcon-40b-instruct': ModelSpec(parameters=41.8, layers=60, kv_dim=512),
+}
+
+# Bytes per parameter of the model dtypes and of the TGI quantization modes, with the first TGI version accepting the mode.
+DTYPE_BYTES: Dict[str, float] = {'float32': 4, 'float16': 2, 'bfloat16': 2}
+QUANTIZATION_BYTES: List[Tuple[str, float, str]] = [('bitsandbytes', 1, '0.6.0'), ('bitsandbytes-nf4', 0.5, '1.0.0')]
+
+# Share of the GPU memory usable by TGI (CUDA context, activations and fragmentation take the rest).
+GPU_MEMORY_UTILIZATION = 0.9
+# The batch token budget is rounded down to this granularity.
+TOKEN_BUDGET_STEP = 256
+
+
+def parse_version(version: str) -> Tuple[int, ...]:
+    """The numeric parts of a TGI version, i.e: '0.9.3' -> (0, 9, 3)."""
+    return tuple(int(part) for part in version.split('.') if part.isdigit())
+
+
+def quantization_modes(tgi_version: str) -> List[Tuple[str, float]]:
+    """
+    The quantization modes (and their bytes per parameter) accepted by a TGI version, from the most to the least precise.
+
+    Parameters:
+        tgi_version: TGI version, i.e: '0.9.3'.
+    """
+    return [(mode, mode_bytes) for mode, mode_bytes, since in QUANTIZATION_BYTES if parse_version(tgi_version) >= parse_version(since)]
+
+
+def estimate_model_spec(parameters: float) -> ModelSpec:
+    """
+    Estimate the spec of an unknown model from its parameter count, with Llama-like proportions
+    (parameters ~= 12 * layers * hidden^2 and hidden ~= 128 * layers).
+
+    Parameters:
+        parameters: Number of parameters, in billions.
+    """
+    layers = max(1, round((parameters * 1e9 / (12 * 128 ** 2)) ** (1 / 3)))
+    return ModelSpec(parameters=parameters, layers=layers, kv_dim=128 * layers)
+
+
+def derive_tgi_config(
+        instance_type: str,
+        model_id: Optional[str],
+        parameters: Optional[float] = None,
+        dtype: str = 'float16',
+        max_input_length: int = 2048,
+        max_total_tokens: int = 4096,
+        tgi_version: str = '0.9.3',
+) -> TgiConfig:
+    """
+    Derive the TGI settings for a model on an instance type.
+
+    The model is sharded over every GPU of the instance, quantized (8 then 4 bits, as far as the TGI
+    version allows) only when its weights don't fit, and what is left of the GPU memory goes to the KV cache, which sets the
+    number of tokens that can be batched.
+
+    Parameters:
+        instance_type: SageMaker instance type, i.e: 'ml.g5.2xlarge'.
+        model_id: Hugging Face model id, looked up in `MODELS`.
+        parameters: Number of parameters (in billions), for models missing from `MODELS`.
+        dtype: dtype of the weights (default is 'float16').
+        max_input_length: Maximum number of input tokens of a request.
+        max_total_tokens: Maximum number of input and generated tokens of a request.
+        tgi_version: TGI version of the container (default is '0.9.3'), 4 bits quantization needs '1.0.0' or later.
+    """
+    tgi = TgiConfig()
+    accelerators = ACCELERATORS.get(instance_type)
+    if accelerators is None:
+        tgi.warnings.append(f"Unknown instance type '{instance_type}', TGI settings are not derived")
+        return tgi
+    if accelerators.gpus == 0:
+        tgi.warnings.append(f"'{instance_type}' has no GPU, the TGI container needs one (i.e: 'ml.g5.2xlarge')")
+        return tgi
+
+    spec = MODELS.get(model_id) if model_id else None
+    if spec is None and parameters is None:
+        tgi.warnings.append(f"Unknown model '{model_id}', set its parameter count to derive the TGI settings")
+        return tgi
+    if spec is None or (parameters is not None and parameters != spec.parameters):
+        spec = estimate_model_spec(parameters)
+
+    dtype_bytes = DTYPE_BYTES.get(dtype, 2)
+    usable_bytes = accelerators.gpus * accelerators.memory_gib * 1024 ** 3 * GPU_MEMORY_UTILIZATION
+    kv_bytes_per_token = spec.kv_bytes_per_token(min(dtype_bytes, 2))
+
+    # Quantize only when the weights (plus one full-length request) don't fit
+    modes = quantization_modes(tgi_version)
+    for mode, mode_bytes in [(None, dtype_bytes), *modes]:
+        quantize, weights_bytes = mode, spec.parameters * 1e9 * mode_bytes
+        if weights_bytes + max_total_tokens * kv_bytes_per_token <= usable_bytes:
+            break
+    else:
+        precision = f'quantized to {int(modes[-1][1] * 8)} bits' if modes else f'in {dtype}'
+        tgi.warnings.append(
+            f"'{model_id}' ({spec.parameters}B parameters) doesn't fit on '{instance_type}' "
+            f"({accelerators.gpus}x {accelerators.memory_gib} GiB), even {precision} with TGI {tgi_version}"
+        )
+        return tgi
+
+    batch_total_tokens = int((usable_bytes - weights_bytes) / kv_bytes_per_token) // TOKEN_BUDGET_STEP * TOKEN_BUDGET_STEP
+    batch_prefill_tokens = min(batch_total_tokens, max(max_input_length + 50, batch_total_tokens // 2))
+
+    tgi.environment = {
+        'SM_NUM_GPUS': str(accelerators.gpus),
+        'MAX_BATCH_TOTAL_TOKENS': str(batch_total_tokens),
+        'MAX_BATCH_PREFILL_TOKENS': str(batch_prefill_tokens),
+    }
+    if quantize:
+        tgi.environment['HF_MODEL_QUANTIZE'] = quantize
+        tgi.warnings.append(f"'{model_id}' is quantized with '{quantize}' to fit on '{instance_type}', a larger instance type keeps the full precision")
+
+    # Throughput left on the table: a model fitting on one GPU is better served by one copy per GPU than sharded
+    single_gpu_bytes = accelerators.memory_gib * 1024 ** 3 * GPU_MEMORY_UTILIZATION
+    if accelerators.gpus > 1 and not quantize and weights_bytes + max_total_tokens * kv_bytes_per_token <= single_gpu_bytes:
+        tgi.warnings.append(
+            f"'{model_id}' fits on a single GPU, sharding it over {accelerators.gpus} GPUs of '{instance_type}' adds "
+            f"communication overhead: prefer a smaller instance type and more instances"
+        )
+    return tgi
+
+
+def resolve_environment(derived: Mapping[str, str], explicit: Mapping[str, str], max_batch_total_tokens: Optional[int] = None) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Merge the derived and the explicit environment variables, the explicit ones win.
+
+    Parameters:
+        derived: The derived TGI environment variables.
+        explicit: The environment variables given to the component.
+        max_batch_total_tokens: The derived batch token budget, to warn when an explicit one wastes the KV cache.
+    """
+    warnings = []
+    explicit_budget = explicit.get('MAX_BATCH_TOTAL_TOKENS')
+    if max_batch_total_tokens and explicit_budget and int(explicit_budget) < max_batch_total_tokens / 2:
+        warnings.append(
+            f"MAX_BATCH_TOTAL_TOKENS={explicit_budget} uses less than half of the KV cache "
+            f"(room for {max_batch_total_tokens} tokens), batching is limited"
+        )
+    if explicit_budget and max_batch_total_tokens and int(explicit_budget) > max_batch_total_tokens:
+        warnings.append(f"MAX_BATCH_TOTAL_TOKENS={explicit_budget} is above the estimated KV cache ({max_batch_total_tokens} tokens), the container may run out of memory")
+    return {**derived, **explicit}, warnings
@@ -0,0 +1,171 @@
+"""
+Compare the production variants of a SageMaker endpoint side by side: latency, throughput and price.
+
+SageMaker publishes the invocation metrics of every variant (`EndpointName` and `VariantName`
+dimensions). This script reads the ModelLatency p50/p90/p99, invocations and errors of each variant
+over a window from CloudWatch, takes the instance type and count of each variant from the endpoint,
+and prices them with the hourly on-demand prices below, to print the cost per 1000 invocations.
+
+Usage:
+    # Split the traffic over the variants (or drive each one with `loadtest.py --target-variant`), then
+    python3 variant_metrics.py $(pulumi stack output EndpointName) --region us-east-1 --minutes 60
+"""
+
+import argparse
+import json
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+# Hourly on-demand prices of real-time inference instances, in USD (us-east-1, override with --price).
+HOURLY_PRICES: Dict[str, float] = {
+    'ml.m5.xlarge': 0.23,
+    'ml.m5.2xlarge': 0.461,
+    'ml.c5.2xlarge': 0.408,
+    'ml.g4dn.xlarge': 0.736,
+    'ml.g4dn.2xlarge': 0.94,
+    'ml.g4dn.12xlarge': 4.89,
+    'ml.g5.xlarge': 1.408,
+    'ml.g5.2xlarge': 1.515,
+    'ml.g5.4xlarge': 2.03,
+    'ml.g5.12xlarge': 7.09,
+    'ml.g5.24xlarge': 10.18,
+    'ml.g5.48xlarge': 20.36,
+    'ml.g6.xlarge': 1.006,
+    'ml.g6.12xlarge': 5.752,
+    'ml.p3.2xlarge': 3.825,
+    'ml.p4d.24xlarge': 37.688,
+}
+
+LATENCY_STATS = ('p50', 'p90', 'p99')
+
+
+def describe_variants(sagemaker_client, endpoint_name: str) -> List[dict]:
+    """The variants of the endpoint: name, instance type, current instance count and weight."""
+    endpoint = sagemaker_client.describe_endpoint(EndpointName=endpoint_name)
+    endpoint_config = sagemaker_client.describe_endpoint_config(EndpointConfigName=endpoint['EndpointConfigName'])
+    instance_types = {variant['VariantName']: variant.get('InstanceType') for variant in endpoint_config['ProductionVariants']}
+    return [{
+        'name': variant['VariantName'],
+        'instance_type': instance_types.get(variant['VariantName']),
+        'instances': variant.get('CurrentInstanceCount', 0),
+        'weight': variant.get('CurrentWeight'),
+    } for variant in endpoint['ProductionVariants']]
+
+
+def metric_queries(endpoint_name: str, variants: Sequence[dict], period: int) -> List[dict]:
+    """The CloudWatch metric data queries of every variant (ids `v<index>_<stat>`)."""
+    queries = []
+    for index, variant in enumerate(variants):
+        dimensions = [{'Name': 'EndpointName', 'Value': endpoint_name}, {'Name': 'VariantName', 'Value': variant['name']}]
+        metrics = [('ModelLatency', stat, stat) for stat in LATENCY_STATS] + [
+            ('Invocations', 'Sum', 'invocations'),
+            ('Invocation4XXErrors', 'Sum', 'errors_4xx'),
+            ('Invocation5XXErrors', 'Sum', 'errors_5xx'),
+        ]
+        for metric_name, stat, label in metrics:
+            queries.append({
+                'Id': f'v{index}_{label}',
+                'MetricStat': {
+                    'Metric': {'Namespace': 'AWS/SageMaker', 'MetricName': metric_name, 'Dimensions': dimensions},
+                    'Period': period,
+                    'Stat': stat,
+                },
+            })
+    return queries
+
+
+def compare(variants: Sequence[dict], values: Dict[str, List[float]], minutes: int, prices: Dict[str, float]) -> List[dict]:
+    """
+    Aggregate the metric values of each variant: latency percentiles (ms), invocations, error rate,
+    invocations per minute and per instance, and the cost of the window per 1000 invocations.
+    """
+    rows = []
+    for index, variant in enumerate(variants):
+        def value(label: str, total: bool = False) -> float:
+            points = values.get(f'v{index}_{label}') or []
+            if total: return sum(points)
+            return max(points) if points else math.nan
+
+        invocations = value('invocations', total=True)
+        errors = value('errors_4xx', total=True) + value('errors_5xx', total=True)
+        price = prices.get(variant['instance_type'])
+        cost = price * variant['instances'] * minutes / 60 if price is not None else math.nan
+        rows.append({
+            **variant,
+            # ModelLatency is in microseconds
+            **{f'latency_{stat}_ms': value(stat) / 1000 for stat in LATENCY_STATS},
+            'invocations': invocations,
+            'error_rate': errors / invocations if invocations else 0.0,
+            'invocations_per_minute': invocations / minutes,
+            'invocations_per_instance_minute': invocations / minutes / variant['instances'] if variant['instances'] else math.nan,
+            'hourly_price': price,
+            'cost_per_1000_invocations': cost / invocations * 1000 if invocations else math.nan,
+        })
+    return rows
+
+
+def format_rows(rows: Sequence[dict]) -> str:
+    columns = [
+        ('name', 'variant', 14, ''), ('instance_type', 'instance type', 16, ''), ('instances', 'n', 3, 'd'),
+        ('latency_p50_ms', 'p50 ms', 9, '.0f'), ('latency_p90_ms', 'p90 ms', 9, '.0f'), ('latency_p99_ms', 'p99 ms', 9, '.0f'),
+        ('invocations', 'invocations', 12, '.0f'), ('error_rate', 'errors', 8, '.1%'),
+        ('invocations_per_instance_minute', 'inv/inst/min', 14, '.1f'), ('cost_per_1000_invocations', '$/1k inv', 10, '.3f'),
+    ]
+    lines = [''.join(f'{label:<{width}}' if not spec else f'{label:>{width}}' for _, label, width, spec in columns)]
+    for row in rows:
+        cells = []
+        for key, _, width, spec in columns:
+            value = row[key]
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                cells.append(f"{'-':>{width}}")
+            else:
+                cells.append(f'{value:<{width}}' if not spec else f'{value:>{width}{spec}}')
+        lines.append(''.join(cells))
+    return '\n'.join(lines)
+
+
+def parse_prices(overrides: Sequence[str]) -> Dict[str, float]:
+    """The hourly prices, with the `instance_type=price` overrides."""
+    prices = dict(HOURLY_PRICES)
+    for override in overrides:
+        instance_type, _, price = override.partition('=')
+        prices[instance_type] = float(price)
+    return prices
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description='Compare the production variants of a SageMaker endpoint.')
+    parser.add_argument('endpoint_name')
+    parser.add_argument('--region', default=None, help='AWS region of the endpoint')
+    parser.add_argument('--minutes', type=int, default=60, help='Window to compare, in minutes up to now')
+    parser.add_argument('--price', action='append', default=[], help='Hourly price of an instance type, i.e: ml.g5.xlarge=1.408 (repeatable)')
+    parser.add_argument('--json', default=None, help='Write the comparison as JSON to this file')
+    args = parser.parse_args(argv)
+
+    import boto3
+    sagemaker_client = boto3.client('sagemaker', region_name=args.region)
+    cloudwatch = boto3.client('cloudwatch', region_name=args.region)
+
+    variants = describe_variants(sagemaker_client, args.endpoint_name)
+    end = datetime.now(timezone.utc)
+    # A single period over the whole window, so the percentiles are over every request of the window
+    period = args.minutes * 60
+    values: Dict[str, List[float]] = {}
+    queries = metric_queries(args.endpoint_name, variants, period)
+    # GetMetricData takes up to 500 queries per call
+    for i in range(0, len(queries), 500):
+        paginator = cloudwatch.get_paginator('get_metric_data')
+        for page in paginator.paginate(MetricDataQueries=queries[i:i + 500], StartTime=end - timedelta(minutes=args.minutes), EndTime=end):
+            for result in page['MetricDataResults']:
+                values.setdefault(result['Id'], []).extend(result['Values'])
+
+    rows = compare(variants, values, args.minutes, parse_prices(args.price))
+    print(format_rows(rows))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()